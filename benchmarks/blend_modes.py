@@ -0,0 +1,46 @@
+import argparse
+import time
+import numpy as np
+from src.nodes.intermediate.blend_node import BLEND_MODES, blend_float, blend_images
+
+
+def best_time(function, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Blend modes: float path vs 8-bit kernels")
+    parser.add_argument("--megapixels", type=float, default=12)
+    parser.add_argument("--opacity", type=float, nargs="+", default=[1.0, 0.5])
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    side = int((args.megapixels * 1e6) ** 0.5)
+    image1 = rng.integers(0, 256, (side, side, 3), dtype=np.uint8)
+    image2 = rng.integers(0, 256, (side, side, 3), dtype=np.uint8)
+
+    #buffers are kept between runs the same way BlendNode keeps them
+    dst = np.empty_like(image1)
+    scratch = {}
+
+    print(f"{args.megapixels:.0f} MP RGB")
+    print(f"{'mode':>10} {'opacity':>8} {'float (ms)':>11} {'uint8 (ms)':>11} {'speedup':>8}")
+
+    for mode in BLEND_MODES:
+        for opacity in args.opacity:
+            float_time = best_time(lambda: blend_float(image1, image2, mode, opacity), args.repeats)
+            uint8_time = best_time(
+                lambda: blend_images(image1, image2, mode, opacity, dst, scratch), args.repeats
+            )
+            print(f"{mode:>10} {opacity:8.2f} {float_time * 1000:11.1f} {uint8_time * 1000:11.1f} "
+                  f"{float_time / uint8_time:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+import argparse
+import time
+import cv2
+import numpy as np
+from src.nodes.basic.brightness_contrast_node import adjust_float, build_lut
+
+
+def best_time(function, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Brightness/contrast: float path vs lookup table")
+    parser.add_argument("--megapixels", type=float, nargs="+", default=[1, 12, 48])
+    parser.add_argument("--brightness", type=int, default=20)
+    parser.add_argument("--contrast", type=float, default=1.3)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'MP':>6} {'float (ms)':>12} {'LUT (ms)':>10} {'speedup':>8}")
+
+    for megapixels in args.megapixels:
+        side = int((megapixels * 1e6) ** 0.5)
+        image = rng.integers(0, 256, (side, side, 3), dtype=np.uint8)
+
+        float_time = best_time(lambda: adjust_float(image, args.brightness, args.contrast), args.repeats)
+        lut_time = best_time(lambda: cv2.LUT(image, build_lut(args.brightness, args.contrast)), args.repeats)
+
+        print(f"{megapixels:6.0f} {float_time * 1000:12.1f} {lut_time * 1000:10.1f} {float_time / lut_time:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+import argparse
+import os
+import random
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtCore import QPointF, QRectF
+from PyQt5.QtWidgets import QApplication
+from src.node_graph import NodeGraph, NODE_TYPES
+from src.node_canvas import NodeCanvas
+
+
+def build_canvas(count, seed=0):
+    #nodes scattered over a square sized for about one node per 300x300 px
+    rng = random.Random(seed)
+    graph = NodeGraph(cache_max_bytes=0)
+    canvas = NodeCanvas(graph)
+
+    side = int((count ** 0.5) * 300)
+    node_types = list(NODE_TYPES)
+    for _ in range(count):
+        node = graph.create_node(rng.choice(node_types))
+        node.set_position(rng.uniform(0, side), rng.uniform(0, side))
+
+    return graph, canvas, side
+
+
+def linear_node_at_pos(canvas, pos):
+    #what every mouse move used to cost: a scan over all nodes
+    for node_id, node in canvas.node_graph.nodes.items():
+        x, y = node.position
+        rect = QRectF(x, y, canvas.node_width, canvas.node_header_height + canvas.node_content_height)
+        if rect.contains(pos):
+            return node_id
+    return None
+
+
+def linear_connector_at_pos(canvas, pos):
+    for node_id, node in canvas.node_graph.nodes.items():
+        for input_name in node.inputs.keys():
+            if (pos - canvas._get_input_connector_pos(node, input_name)).manhattanLength() <= canvas.connector_radius:
+                return (node_id, input_name, True)
+        for output_name in node.outputs.keys():
+            if (pos - canvas._get_output_connector_pos(node, output_name)).manhattanLength() <= canvas.connector_radius:
+                return (node_id, output_name, False)
+    return None
+
+
+def time_hover(points, node_at_pos, connector_at_pos):
+    start = time.perf_counter()
+    for pos in points:
+        connector_at_pos(pos)
+        node_at_pos(pos)
+    return (time.perf_counter() - start) / len(points)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cost of canvas hit tests on every mouse move")
+    parser.add_argument("--nodes", type=int, default=2000)
+    parser.add_argument("--events", type=int, default=20000)
+    parser.add_argument("--baseline-events", type=int, default=500,
+                        help="events used to time the old linear scan (0 to skip)")
+    args = parser.parse_args()
+
+    app = QApplication.instance() or QApplication([])
+
+    start = time.perf_counter()
+    graph, canvas, side = build_canvas(args.nodes)
+    build_time = time.perf_counter() - start
+
+    rng = random.Random(1)
+    points = [QPointF(rng.uniform(0, side), rng.uniform(0, side)) for _ in range(args.events)]
+
+    indexed = time_hover(points, canvas._get_node_at_pos, canvas._get_connector_at_pos)
+
+    #dragging a node re-indexes it on every move
+    nodes = list(graph.nodes.values())
+    start = time.perf_counter()
+    for pos in points:
+        rng.choice(nodes).set_position(pos.x(), pos.y())
+    move_time = (time.perf_counter() - start) / len(points)
+
+    print(f"{'nodes':>7} {'build (s)':>10} {'hover (us)':>11} {'move (us)':>10}")
+    print(f"{args.nodes:7d} {build_time:10.2f} {indexed * 1e6:11.1f} {move_time * 1e6:10.1f}")
+
+    if args.baseline_events > 0:
+        linear = time_hover(
+            points[:args.baseline_events],
+            lambda pos: linear_node_at_pos(canvas, pos),
+            lambda pos: linear_connector_at_pos(canvas, pos),
+        )
+        print()
+        print(f"linear scan: {linear * 1e6:.1f} us per mouse move, {linear / indexed:.0f}x slower")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+import argparse
+import os
+import random
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtCore import QRect, QRectF
+from PyQt5.QtGui import QImage, QPainter
+from PyQt5.QtWidgets import QApplication
+from src.node_graph import NodeGraph
+from src.node_canvas import NodeCanvas
+
+
+def build_canvas(count, seed=0):
+    #inputs feed a random network of processing nodes laid out left to right in
+    #columns of 30, every node reading from the column before it, like a hand-built graph
+    rng = random.Random(seed)
+    graph = NodeGraph(cache_max_bytes=0)
+    canvas = NodeCanvas(graph)
+
+    sources = []
+    for index in range(count):
+        if index < 10:
+            node = graph.create_node("image_input")
+        else:
+            node = graph.create_node(rng.choice(["blur", "blend", "threshold", "brightness_contrast"]))
+            for input_name in node.inputs:
+                source = rng.choice(sources[-30:])
+                graph.connect_nodes(source.id, "image", node.id, input_name)
+        column, row = divmod(index, 30)
+        node.set_position(column * 280 + rng.uniform(0, 40), row * 180 + rng.uniform(0, 40))
+        sources.append(node)
+
+    return graph, canvas
+
+
+def full_repaint(canvas, painter, rect):
+    #what every update used to cost: every path rebuilt, every node drawn
+    painter.setRenderHint(QPainter.Antialiasing)
+    painter.fillRect(rect, canvas.background_color)
+
+    for node in canvas.node_graph.nodes.values():
+        for input_name, connection in node.inputs.items():
+            if connection:
+                source_node, output_name = connection
+                path = canvas._connection_path(
+                    canvas._get_output_connector_pos(source_node, output_name),
+                    canvas._get_input_connector_pos(node, input_name)
+                )
+                painter.drawPath(path)
+
+    for node in canvas.node_graph.nodes.values():
+        canvas._draw_node(painter, node)
+
+
+def time_drag(canvas, node, frames, width, height, paint):
+    #moves the node one step per frame and repaints what the canvas asked for
+    dirty = []
+    canvas.update = lambda *args: dirty.append(QRect(args[0]) if args else QRect(0, 0, width, height))
+
+    image = QImage(width, height, QImage.Format_RGB32)
+    x, y = node.position
+    start = time.perf_counter()
+    for frame in range(frames):
+        node.set_position(x + (frame % 40) * 5, y + (frame % 40) * 3)
+        painter = QPainter(image)
+        paint(painter, dirty)
+        painter.end()
+        dirty.clear()
+    elapsed = (time.perf_counter() - start) / frames
+
+    del canvas.update
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cost of repainting the canvas while dragging a node")
+    parser.add_argument("--nodes", type=int, default=1000)
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    args = parser.parse_args()
+
+    app = QApplication.instance() or QApplication([])
+
+    graph, canvas = build_canvas(args.nodes)
+    view = QRect(0, 0, args.width, args.height)
+
+    #drag a connected node that is on screen
+    node = next(
+        node for node in graph.nodes.values()
+        if node.inputs and view.contains(int(node.position[0]) + 200, int(node.position[1]) + 200)
+    )
+
+    def retained(painter, dirty):
+        for rect in dirty:
+            rect = rect.intersected(view)
+            if not rect.isEmpty():
+                painter.save()
+                painter.setClipRect(rect)
+                canvas.paint(painter, QRectF(rect))
+                painter.restore()
+
+    def visible(painter, dirty):
+        canvas.paint(painter, QRectF(view))
+
+    def legacy(painter, dirty):
+        full_repaint(canvas, painter, view)
+
+    print(f"{'mode':>24} {'zoom':>5} {'ms/frame':>9} {'fps':>7}")
+    for name, zoom, paint in (
+        ("old full repaint", 1.0, legacy),
+        ("visible items", 1.0, visible),
+        ("dirty rectangles", 1.0, retained),
+        ("zoomed out, outlines", 0.2, visible),
+        ("zoomed out, dirty", 0.2, retained),
+    ):
+        canvas.set_zoom(zoom)
+        elapsed = time_drag(canvas, node, args.frames, args.width, args.height, paint)
+        print(f"{name:>24} {zoom:5.1f} {elapsed * 1000:9.2f} {1 / elapsed:7.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+import argparse
+import contextlib
+import glob
+import io
+import os
+import tempfile
+import time
+import cv2
+import numpy as np
+from src.image_writer import ENCODER_PRESETS, write_image
+from src.node_graph import NodeGraph
+
+FORMATS = ("png", "jpg", "webp")
+
+
+def make_photo(megapixels, seed=0):
+    #smooth gradients with some texture, closer to a photo than plain noise
+    rng = np.random.default_rng(seed)
+    width = int((megapixels * 1e6 * 1.5) ** 0.5)
+    height = int(width / 1.5)
+
+    small = rng.integers(0, 256, (height // 64 + 1, width // 64 + 1, 3), dtype=np.uint8)
+    image = cv2.resize(small, (width, height), interpolation=cv2.INTER_CUBIC)
+    noise = rng.normal(0, 6, (height, width, 1)).astype(np.int16)
+    return np.clip(image.astype(np.int16) + noise, 0, 255).astype(np.uint8)
+
+
+def load_corpus(input_dir, megapixels, count):
+    if input_dir:
+        paths = sorted(
+            path for pattern in ("*.png", "*.jpg", "*.jpeg", "*.bmp", "*.webp")
+            for path in glob.glob(os.path.join(input_dir, pattern))
+        )
+        images = []
+        for path in paths:
+            image = cv2.imread(path, cv2.IMREAD_COLOR)
+            if image is not None:
+                images.append(cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
+        return images
+
+    return [make_photo(megapixels, seed) for seed in range(count)]
+
+
+def time_preset(images, directory, format_name, preset):
+    #total encode-and-write time and bytes on disk over the corpus
+    elapsed = 0.0
+    size = 0
+    for index, image in enumerate(images):
+        path = os.path.join(directory, f"{index}.{format_name}")
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            write_image(path, image, format_name, preset)
+        elapsed += time.perf_counter() - start
+        size += os.path.getsize(path)
+    return elapsed, size
+
+
+def time_save_call(image, directory):
+    #time the calling thread spends in save_image versus save_image_async
+    graph = NodeGraph(cache_max_bytes=0)
+    output = graph.create_node("output")
+    output.parameters["preview"] = image
+    output.dirty = False
+    output.parameters["file_path_save"] = os.path.join(directory, "saved.png")
+
+    results = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        output.save_image()
+        results["save_image"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        future = output.save_image_async()
+        results["save_image_async"] = time.perf_counter() - start
+        future.result()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Encode time versus file size for each encoder preset")
+    parser.add_argument("--input-dir", default=None, help="corpus of images (default: synthetic photos)")
+    parser.add_argument("--megapixels", type=float, default=12)
+    parser.add_argument("--count", type=int, default=4)
+    args = parser.parse_args()
+
+    images = load_corpus(args.input_dir, args.megapixels, args.count)
+    if not images:
+        print(f"Error: No images found in {args.input_dir}")
+        return
+
+    pixels = sum(image.shape[0] * image.shape[1] for image in images)
+    raw_bytes = sum(image.nbytes for image in images)
+    print(f"{len(images)} images, {pixels / 1e6:.1f} MP, {raw_bytes / 1024**2:.0f} MB uncompressed")
+    print(f"{'format':>7} {'preset':>9} {'seconds':>8} {'MP/s':>7} {'size (MB)':>10} {'ratio':>6}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        for format_name in FORMATS:
+            #every WebP preset is the same lossless encoder
+            presets = ("balanced",) if format_name == "webp" else ENCODER_PRESETS
+            for preset in presets:
+                elapsed, size = time_preset(images, directory, format_name, preset)
+                print(f"{format_name:>7} {preset:>9} {elapsed:8.2f} {pixels / 1e6 / elapsed:7.1f} "
+                      f"{size / 1024**2:10.1f} {raw_bytes / size:6.2f}")
+
+        print()
+        for name, seconds in time_save_call(images[0], directory).items():
+            print(f"{name:>17}: {seconds * 1000:8.1f} ms on the calling thread")
+
+
+if __name__ == "__main__":
+    main()
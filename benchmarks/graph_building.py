@@ -0,0 +1,136 @@
+import argparse
+import random
+import time
+from src.node_graph import NodeGraph
+
+try:
+    import networkx as nx
+except ImportError:
+    nx = None
+
+
+def build_chain(graph, count):
+    previous = graph.create_node("image_input")
+    for _ in range(count - 1):
+        node = graph.create_node("brightness_contrast")
+        graph.connect_nodes(previous.id, "image", node.id, "image")
+        previous = node
+
+
+def build_random_dag(graph, count, seed=0):
+    #every blend reads two random earlier nodes
+    rng = random.Random(seed)
+    node_ids = [graph.create_node("image_input").id for _ in range(8)]
+    while len(node_ids) < count:
+        node = graph.create_node("blend")
+        graph.connect_nodes(rng.choice(node_ids), "image", node.id, "image1")
+        graph.connect_nodes(rng.choice(node_ids), "image", node.id, "image2")
+        node_ids.append(node.id)
+
+
+def build_shuffled_dag(graph, count, seed=0):
+    #nodes are created first and wired in random order, so edges often run against
+    #the current order and force it to be repaired
+    rng = random.Random(seed)
+    nodes = [graph.create_node("blend") for _ in range(count)]
+    ranking = list(nodes)
+    rng.shuffle(ranking)
+
+    edges = []
+    for position in range(1, count):
+        target = ranking[position]
+        for input_name in ("image1", "image2"):
+            source = ranking[rng.randrange(max(0, position - 50), position)]
+            edges.append((source, target, input_name))
+
+    rng.shuffle(edges)
+    for source, target, input_name in edges:
+        graph.connect_nodes(source.id, "image", target.id, input_name)
+
+
+def networkx_order(graph):
+    #what every edit used to cost: a fresh DiGraph and a full sort
+    dependencies = nx.DiGraph()
+    dependencies.add_nodes_from(graph.nodes)
+    for node_id, node in graph.nodes.items():
+        for connection in node.inputs.values():
+            if connection:
+                dependencies.add_edge(connection[0].id, node_id)
+    return list(nx.topological_sort(dependencies))
+
+
+def count_edits(graph):
+    return len(graph.nodes) + sum(
+        1 for node in graph.nodes.values() for connection in node.inputs.values() if connection
+    )
+
+
+def time_build(builder, count):
+    graph = NodeGraph(cache_max_bytes=0)
+
+    #time spent keeping the order up to date, separate from invalidation and node setup
+    order_time = [0.0]
+    add_edge = graph.dependencies.add_edge
+
+    def timed_add_edge(source, target):
+        start = time.perf_counter()
+        try:
+            add_edge(source, target)
+        finally:
+            order_time[0] += time.perf_counter() - start
+
+    graph.dependencies.add_edge = timed_add_edge
+
+    start = time.perf_counter()
+    builder(graph, count)
+    elapsed = time.perf_counter() - start
+
+    del graph.dependencies.add_edge
+    return elapsed, order_time[0], graph
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cost of building and loading large graphs")
+    parser.add_argument("--nodes", type=int, default=10000)
+    parser.add_argument("--baseline-nodes", type=int, default=1000,
+                        help="size used to estimate the old per-edit networkx sort (0 to skip)")
+    args = parser.parse_args()
+
+    builders = [
+        ("chain", build_chain),
+        ("random DAG", build_random_dag),
+        ("shuffled DAG", build_shuffled_dag),
+    ]
+
+    print(f"{'graph':>15} {'nodes':>7} {'build (s)':>10} {'order (s)':>10} {'load (s)':>9} {'us/edit':>8}")
+    for name, builder in builders:
+        elapsed, order_time, graph = time_build(builder, args.nodes)
+
+        data = graph.to_dict()
+        loaded = NodeGraph(cache_max_bytes=0)
+        start = time.perf_counter()
+        loaded.load_dict(data)
+        load_time = time.perf_counter() - start
+
+        print(f"{name:>15} {args.nodes:7d} {elapsed:10.2f} {order_time:10.2f} {load_time:9.2f} "
+              f"{elapsed / count_edits(graph) * 1e6:8.1f}")
+
+    if nx is None or args.baseline_nodes <= 0:
+        return
+
+    #the old behaviour is quadratic, so it is measured on a smaller graph and scaled up
+    print()
+    print(f"networkx re-sort after every edit, measured at {args.baseline_nodes} nodes:")
+    for name, builder in builders:
+        _, _, graph = time_build(builder, args.baseline_nodes)
+        start = time.perf_counter()
+        networkx_order(graph)
+        sort_time = time.perf_counter() - start
+
+        edits = count_edits(graph)
+        estimate = sort_time * edits / 2 * (args.nodes / args.baseline_nodes) ** 2
+        print(f"{name:>15} {sort_time * 1000:8.1f} ms per sort, about {estimate:.0f} s for {args.nodes} nodes")
+
+
+if __name__ == "__main__":
+    main()
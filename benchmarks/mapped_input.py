@@ -0,0 +1,75 @@
+import argparse
+import os
+import tempfile
+import time
+import cv2
+import numpy as np
+from src.node_graph import NodeGraph
+from src.decode_cache import decode_cache
+from src.raw_image import save_raw
+
+
+def make_frame(megapixels, seed=0):
+    rng = np.random.default_rng(seed)
+    width = int((megapixels * 1e6 * 1.5) ** 0.5)
+    height = int(width / 1.5)
+    small = rng.integers(0, 256, (height // 32 + 1, width // 32 + 1, 3), dtype=np.uint8)
+    return cv2.resize(small, (width, height), interpolation=cv2.INTER_LINEAR)
+
+
+def write_png(path, frame):
+    cv2.imwrite(path, cv2.cvtColor(frame, cv2.COLOR_RGB2BGR))
+
+
+def time_format(path, frame, writer, roi):
+    #hand-off cost of one frame: writing it, opening it in an input node, reading a region
+    start = time.perf_counter()
+    writer(path, frame)
+    write_time = time.perf_counter() - start
+
+    decode_cache.clear()
+    graph = NodeGraph(cache_max_bytes=0)
+    node = graph.create_node("image_input")
+    node.set_parameter("file_path", path)
+
+    start = time.perf_counter()
+    node.evaluate()
+    open_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    y0, x0, size = roi
+    region_sum = int(node.processed_data["image"][y0:y0 + size, x0:x0 + size].sum())
+    roi_time = time.perf_counter() - start
+
+    return write_time, open_time, roi_time, region_sum
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Handing large frames to an input node: PNG versus memory maps")
+    parser.add_argument("--megapixels", type=float, default=100)
+    parser.add_argument("--roi", type=int, default=1024)
+    args = parser.parse_args()
+
+    frame = make_frame(args.megapixels)
+    height, width = frame.shape[:2]
+    roi = (height // 2, width // 2, args.roi)
+
+    formats = [
+        ("png", ".png", write_png),
+        ("npy", ".npy", np.save),
+        ("raw", ".raw", save_raw),
+    ]
+
+    print(f"{width}x{height} RGB frame, {frame.nbytes / 1024**2:.0f} MB, {args.roi}px region")
+    print(f"{'format':>7} {'write (s)':>10} {'open (s)':>9} {'region (ms)':>12} {'size (MB)':>10}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        for name, extension, writer in formats:
+            path = os.path.join(directory, "frame" + extension)
+            write_time, open_time, roi_time, _ = time_format(path, frame, writer, roi)
+            size = os.path.getsize(path) / 1024**2
+            print(f"{name:>7} {write_time:10.2f} {open_time:9.3f} {roi_time * 1000:12.2f} {size:10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+import argparse
+import os
+import tempfile
+import time
+import cv2
+import numpy as np
+from src.node_graph import NodeGraph
+
+
+def write_synthetic_image(directory, megapixels):
+    side = int((megapixels * 1e6) ** 0.5)
+    image = np.random.default_rng(0).integers(0, 256, (side, side, 3), dtype=np.uint8)
+    image = cv2.GaussianBlur(image, (0, 0), 3)
+    path = os.path.join(directory, "synthetic.png")
+    cv2.imwrite(path, image)
+    return path
+
+
+def build_wide_graph(image_path, branches, max_workers):
+    #input -> N x (blur + edge detection -> blend -> output)
+    graph = NodeGraph(cache_max_bytes=0, max_workers=max_workers)
+
+    input_node = graph.create_node("image_input")
+    input_node.set_parameter("file_path", image_path)
+
+    for i in range(branches):
+        blur = graph.create_node("blur")
+        blur.set_parameter("radius", 8 + i % 10)
+
+        edges = graph.create_node("edge_detection")
+        edges.set_parameter("algorithm", "canny")
+        edges.set_parameter("threshold1", 50 + i)
+
+        blend = graph.create_node("blend")
+        blend.set_parameter("opacity", 0.5)
+
+        output = graph.create_node("output")
+
+        graph.connect_nodes(input_node.id, "image", blur.id, "image")
+        graph.connect_nodes(input_node.id, "image", edges.id, "image")
+        graph.connect_nodes(blur.id, "image", blend.id, "image1")
+        graph.connect_nodes(edges.id, "image", blend.id, "image2")
+        graph.connect_nodes(blend.id, "image", output.id, "image")
+
+    return graph
+
+
+def time_execution(image_path, branches, max_workers, repeats):
+    graph = build_wide_graph(image_path, branches, max_workers)
+    input_node = next(node for node in graph.nodes.values() if node.__class__.__name__ == "InputNode")
+
+    #decode once so only the processing nodes are measured
+    input_node.evaluate()
+
+    timings = []
+    for _ in range(repeats):
+        for node in graph.nodes.values():
+            if node is not input_node:
+                node.mark_stale()
+
+        start = time.perf_counter()
+        if not graph.execute():
+            raise RuntimeError("graph execution failed")
+        timings.append(time.perf_counter() - start)
+
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serial vs thread pool graph execution")
+    parser.add_argument("--megapixels", type=float, default=12)
+    parser.add_argument("--branches", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 4)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        image_path = write_synthetic_image(directory, args.megapixels)
+
+        serial = time_execution(image_path, args.branches, 1, args.repeats)
+        parallel = time_execution(image_path, args.branches, args.workers, args.repeats)
+
+    print(f"{args.branches} branches at {args.megapixels} MP")
+    print(f"serial:             {serial * 1000:8.1f} ms")
+    print(f"parallel ({args.workers:2d} workers): {parallel * 1000:8.1f} ms")
+    print(f"speedup:            {serial / parallel:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+import argparse
+import time
+import numpy as np
+from src.node_graph import NodeGraph
+
+
+def make_chain(length, size):
+    #many cheap nodes on a tiny image, so per-evaluation overhead dominates
+    graph = NodeGraph(cache_max_bytes=0)
+    graph.set_fusion_enabled(False)
+
+    source = graph.create_node("image_input")
+    source.set_frame(np.zeros((size, size, 3), dtype=np.uint8))
+
+    previous = source
+    for _ in range(length):
+        node = graph.create_node("brightness_contrast")
+        graph.connect_nodes(previous.id, "image", node.id, "image")
+        previous = node
+
+    return graph, source
+
+
+def time_runs(graph, source, runs):
+    best = None
+    for _ in range(runs):
+        source.invalidate()
+        start = time.perf_counter()
+        graph.execute()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def time_uninstrumented(graph, source, runs):
+    #the same work calling Node._evaluate directly, as evaluate() did before profiling existed
+    nodes = [graph.nodes[node_id] for node_id in graph.execution_order]
+    best = None
+    for _ in range(runs):
+        source.invalidate()
+        start = time.perf_counter()
+        for node in nodes:
+            if node.dirty:
+                node._evaluate()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cost of the profiler per node evaluation")
+    parser.add_argument("--nodes", type=int, default=100)
+    parser.add_argument("--size", type=int, default=16)
+    parser.add_argument("--runs", type=int, default=50)
+    args = parser.parse_args()
+
+    graph, source = make_chain(args.nodes, args.size)
+    evaluations = args.nodes + 1
+
+    #warm up buffers and code paths before timing anything
+    time_runs(graph, source, 2)
+
+    baseline = time_uninstrumented(graph, source, args.runs)
+    disabled = time_runs(graph, source, args.runs)
+    graph.set_profiling_enabled(True)
+    enabled = time_runs(graph, source, args.runs)
+    graph.set_profiling_enabled(False)
+
+    print(f"{evaluations} evaluations of {args.size}x{args.size} images, best of {args.runs} runs")
+    print(f"{'mode':>16} {'ms':>8} {'us / node':>10} {'overhead':>9}")
+    for name, seconds in (("uninstrumented", baseline), ("profiling off", disabled), ("profiling on", enabled)):
+        overhead = (seconds - baseline) / evaluations * 1e6
+        print(f"{name:>16} {seconds * 1000:8.2f} {seconds / evaluations * 1e6:10.2f} {overhead:8.2f}us")
+
+
+if __name__ == "__main__":
+    main()
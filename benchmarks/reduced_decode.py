@@ -0,0 +1,66 @@
+import argparse
+import os
+import tempfile
+import time
+import cv2
+import numpy as np
+from src.decode_cache import decode_cache, decode_image
+
+
+def make_photo(megapixels, seed=0):
+    #smooth gradients with some texture, closer to a photo than plain noise
+    rng = np.random.default_rng(seed)
+    width = int((megapixels * 1e6 * 1.5) ** 0.5)
+    height = int(width / 1.5)
+
+    small = rng.integers(0, 256, (height // 64 + 1, width // 64 + 1, 3), dtype=np.uint8)
+    image = cv2.resize(small, (width, height), interpolation=cv2.INTER_CUBIC)
+    noise = rng.normal(0, 6, (height, width, 1)).astype(np.int16)
+    return np.clip(image.astype(np.int16) + noise, 0, 255).astype(np.uint8)
+
+
+def time_decode(path, reduction, target_size, repeats):
+    #decode plus area resize to the proxy size, with the decode cache emptied every time
+    best = None
+    for _ in range(repeats):
+        decode_cache.clear()
+        start = time.perf_counter()
+        image = decode_image(path, cv2.IMREAD_COLOR, reduction)
+        image = cv2.resize(image, target_size, interpolation=cv2.INTER_AREA)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, image
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Full versus reduced JPEG decoding for proxies")
+    parser.add_argument("--megapixels", type=float, default=50)
+    parser.add_argument("--proxy-size", type=int, default=1024)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    photo = make_photo(args.megapixels)
+    height, width = photo.shape[:2]
+    scale = args.proxy_size / max(width, height)
+    target_size = (max(1, round(width * scale)), max(1, round(height * scale)))
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "photo.jpg")
+        cv2.imwrite(path, photo, [cv2.IMWRITE_JPEG_QUALITY, 92])
+        print(f"{width}x{height} JPEG, proxy {target_size[0]}x{target_size[1]}")
+        print(f"{'decode':>8} {'ms':>8} {'speedup':>8} {'mean abs diff':>14}")
+
+        reference = None
+        for reduction in (1, 2, 4, 8):
+            if 1 / reduction < scale:
+                break
+            elapsed, image = time_decode(path, reduction, target_size, args.repeats)
+            if reference is None:
+                reference = (elapsed, image)
+            diff = np.abs(image.astype(np.int16) - reference[1]).mean()
+            label = "full" if reduction == 1 else f"1/{reduction}"
+            print(f"{label:>8} {elapsed * 1000:8.1f} {reference[0] / elapsed:7.1f}x {diff:14.2f}")
+
+
+if __name__ == "__main__":
+    main()
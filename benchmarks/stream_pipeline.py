@@ -0,0 +1,73 @@
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import cv2
+import numpy as np
+from src.node_graph import NodeGraph
+from src.stream_runner import run_stream
+
+
+def make_video(path, frames, width, height, seed=0):
+    #a moving gradient with noise, so neither decoder nor encoder gets an easy ride
+    rng = np.random.default_rng(seed)
+    background = cv2.resize(
+        rng.integers(0, 256, (height // 32 + 1, width // 32 + 1, 3), dtype=np.uint8),
+        (width * 2, height), interpolation=cv2.INTER_CUBIC
+    )
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 30, (width, height))
+    for index in range(frames):
+        offset = index * 8 % width
+        writer.write(np.ascontiguousarray(background[:, offset:offset + width]))
+    writer.release()
+
+
+def make_graph(path):
+    graph = NodeGraph()
+    input_node = graph.create_node("image_input")
+    blur = graph.create_node("blur")
+    adjust = graph.create_node("brightness_contrast")
+    output = graph.create_node("output")
+    adjust.set_parameter("brightness", 20)
+
+    graph.connect_nodes(input_node.id, "image", blur.id, "image")
+    graph.connect_nodes(blur.id, "image", adjust.id, "image")
+    graph.connect_nodes(adjust.id, "image", output.id, "image")
+    graph.save(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pipelined decode, process and encode of a video")
+    parser.add_argument("--frames", type=int, default=150)
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        source = os.path.join(directory, "input.avi")
+        graph_path = os.path.join(directory, "graph.json")
+        make_video(source, args.frames, args.width, args.height)
+        make_graph(graph_path)
+
+        print(f"{args.frames} frames at {args.width}x{args.height}, blur and brightness/contrast")
+        print(f"{'destination':>12} {'queue':>6} {'fps':>7} {'vs serial':>10} "
+              f"{'decode':>7} {'process':>8} {'encode':>7}  bottleneck")
+
+        for destination in ("output.avi", "frames/%05d.jpg"):
+            for queue_size in (1, 4, 16):
+                with contextlib.redirect_stdout(io.StringIO()):
+                    report = run_stream(
+                        graph_path, source, os.path.join(directory, destination),
+                        queue_size=queue_size
+                    )
+                stages = report["stages"]
+                print(f"{os.path.splitext(destination)[1]:>12} {queue_size:6d} {report['fps']:7.1f} "
+                      f"{report['serial_seconds'] / report['elapsed']:9.2f}x "
+                      f"{stages['decode']['utilization'] * 100:6.0f}% "
+                      f"{stages['process']['utilization'] * 100:7.0f}% "
+                      f"{stages['encode']['utilization'] * 100:6.0f}%  {report['bottleneck']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,275 @@
+import argparse
+import contextlib
+import glob
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from src.node_graph import NodeGraph
+from src.image_writer import ENCODER_PRESETS
+
+CHECKPOINT_NAME = "batch_checkpoint.jsonl"
+
+IMAGE_PATTERNS = ("*.png", "*.jpg", "*.jpeg", "*.bmp", "*.tif", "*.tiff", "*.webp")
+
+#per-process state, filled in by the pool initializer
+_worker_graph = None
+_worker_input_node = None
+_worker_output_nodes = None
+
+
+def load_batch_graph(graph_path, input_node_id=None):
+    #results are never revisited in a batch, so the result cache is disabled
+    graph = NodeGraph(cache_max_bytes=0)
+    if not graph.load(graph_path):
+        raise ValueError(f"Failed to load graph: {graph_path}")
+
+    input_nodes = [node for node in graph.nodes.values() if node.__class__.__name__ == "InputNode"]
+    output_nodes = [node for node in graph.nodes.values() if node.__class__.__name__ == "OutputNode"]
+
+    if input_node_id:
+        input_nodes = [node for node in input_nodes if node.id == input_node_id]
+    if len(input_nodes) != 1:
+        raise ValueError("Graph must have exactly one Image Input node, or pass --input-node")
+    if not output_nodes:
+        raise ValueError("Graph has no Output node")
+
+    return graph, input_nodes[0], output_nodes
+
+
+def output_stems(input_files):
+    #output name stem per input file; files sharing a stem, e.g. a.jpg and a.png,
+    #keep their extension in it so neither overwrites the other
+    stems = [os.path.splitext(os.path.basename(path)) for path in input_files]
+    counts = {}
+    for stem, _ in stems:
+        counts[stem] = counts.get(stem, 0) + 1
+
+    names = {}
+    used = set()
+    for path, (stem, extension) in zip(input_files, stems):
+        if counts[stem] > 1:
+            stem = f"{stem}_{extension[1:]}" if extension else stem
+        #same name and extension in different directories
+        name = stem
+        suffix = 1
+        while name in used:
+            name = f"{stem}_{suffix}"
+            suffix += 1
+        used.add(name)
+        names[path] = name
+
+    return names
+
+
+def output_paths_for(file_path, output_dir, output_nodes, output_format=None, stem=None):
+    if stem is None:
+        stem = os.path.splitext(os.path.basename(file_path))[0]
+    paths = []
+
+    for index, node in enumerate(output_nodes):
+        extension = output_format or node.parameters["format"]
+        if len(output_nodes) == 1:
+            name = f"{stem}.{extension}"
+        else:
+            name = f"{stem}_{index}.{extension}"
+        paths.append(os.path.join(output_dir, name))
+
+    return paths
+
+
+def _init_worker(graph_path, input_node_id):
+    global _worker_graph, _worker_input_node, _worker_output_nodes
+    _worker_graph, _worker_input_node, _worker_output_nodes = load_batch_graph(graph_path, input_node_id)
+
+
+def _process_file(file_path, output_dir, output_format, preset=None, stem=None):
+    start = time.perf_counter()
+    log = io.StringIO()
+
+    #nodes report problems with print, the first one is the root cause
+    with contextlib.redirect_stdout(log):
+        success = _worker_input_node.set_file_path(file_path) and _worker_graph.execute()
+
+        if success:
+            paths = output_paths_for(file_path, output_dir, _worker_output_nodes, output_format, stem)
+            #outputs are encoded concurrently, and all written before the next file
+            futures = []
+            for node, path in zip(_worker_output_nodes, paths):
+                node.parameters["file_path_save"] = path
+                if output_format:
+                    node.parameters["format"] = output_format
+                if preset:
+                    node.parameters["preset"] = preset
+                futures.append(node.save_image_async())
+            if not all([future.result() for future in futures]):
+                success = False
+
+    error = None
+    if not success:
+        errors = [line for line in log.getvalue().splitlines() if line.startswith(("Error", "Warning"))]
+        error = errors[0] if errors else "Processing failed"
+
+    return file_path, success, error, time.perf_counter() - start
+
+
+def collect_input_files(input_dir, patterns=IMAGE_PATTERNS):
+    files = set()
+    for pattern in patterns:
+        files.update(glob.glob(os.path.join(input_dir, pattern)))
+    return sorted(files)
+
+
+def read_checkpoint(checkpoint_path):
+    done = set()
+    if not os.path.exists(checkpoint_path):
+        return done
+
+    with open(checkpoint_path) as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                #a line cut short by an interrupted run
+                continue
+            if entry.get("success"):
+                done.add(entry["file"])
+
+    return done
+
+
+def run_batch(graph_path, input_files, output_dir, workers=None, output_format=None,
+              input_node_id=None, resume=False, progress=None, preset=None):
+
+    #fail early in the parent rather than once per worker
+    load_batch_graph(graph_path, input_node_id)
+
+    os.makedirs(output_dir, exist_ok=True)
+    checkpoint_path = os.path.join(output_dir, CHECKPOINT_NAME)
+
+    #names depend on the whole input list, so a resumed run picks the same ones
+    stems = output_stems(input_files)
+
+    skipped = 0
+    if resume:
+        done = read_checkpoint(checkpoint_path)
+        pending = [path for path in input_files if os.path.abspath(path) not in done]
+        skipped = len(input_files) - len(pending)
+    else:
+        pending = list(input_files)
+        if os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+
+    report = {
+        "total": len(input_files),
+        "skipped": skipped,
+        "succeeded": 0,
+        "failed": [],
+        "elapsed": 0.0,
+        "images_per_second": 0.0,
+        "mean_file_seconds": 0.0,
+    }
+
+    start = time.perf_counter()
+    file_seconds = 0.0
+
+    with open(checkpoint_path, "a") as checkpoint, ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(graph_path, input_node_id)
+    ) as pool:
+        futures = {
+            pool.submit(_process_file, path, output_dir, output_format, preset, stems[path]): path
+            for path in pending
+        }
+
+        for completed, future in enumerate(as_completed(futures), 1):
+            try:
+                file_path, success, error, seconds = future.result()
+            except Exception as e:
+                #the worker itself died; the file is still recorded so a resumed run retries it
+                file_path, success, error, seconds = futures[future], False, str(e), 0.0
+
+            file_seconds += seconds
+            if success:
+                report["succeeded"] += 1
+            else:
+                report["failed"].append({"file": file_path, "error": error})
+
+            checkpoint.write(json.dumps({
+                "file": os.path.abspath(file_path),
+                "success": success,
+                "error": error,
+                "seconds": round(seconds, 4),
+            }) + "\n")
+            checkpoint.flush()
+
+            if progress:
+                progress(completed, len(pending), file_path, success)
+
+    elapsed = time.perf_counter() - start
+    processed = report["succeeded"] + len(report["failed"])
+    report["elapsed"] = elapsed
+    report["images_per_second"] = processed / elapsed if elapsed > 0 else 0.0
+    report["mean_file_seconds"] = file_seconds / processed if processed else 0.0
+
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Apply a saved node graph to a directory of images")
+    parser.add_argument("graph", help="graph file saved from the editor (File > Save Graph)")
+    parser.add_argument("input_dir")
+    parser.add_argument("output_dir")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--format", choices=["png", "jpg", "webp", "bmp"], default=None,
+                        help="override the format set on the Output nodes")
+    parser.add_argument("--preset", choices=ENCODER_PRESETS, default=None,
+                        help="override the encoder preset set on the Output nodes")
+    parser.add_argument("--pattern", action="append", default=None,
+                        help="glob for input files, can be repeated (default: common image types)")
+    parser.add_argument("--input-node", default=None, help="id of the Image Input node fed with each file")
+    parser.add_argument("--resume", action="store_true", help="skip files already completed in output_dir")
+    args = parser.parse_args(argv)
+
+    input_files = collect_input_files(args.input_dir, args.pattern or IMAGE_PATTERNS)
+    if not input_files:
+        print(f"Error: No input images found in {args.input_dir}")
+        return 1
+
+    def progress(completed, total, file_path, success):
+        status = "ok" if success else "FAILED"
+        print(f"[{completed}/{total}] {status} {os.path.basename(file_path)}", flush=True)
+
+    try:
+        report = run_batch(
+            args.graph, input_files, args.output_dir,
+            workers=args.workers,
+            output_format=args.format,
+            preset=args.preset,
+            input_node_id=args.input_node,
+            resume=args.resume,
+            progress=progress
+        )
+    except ValueError as e:
+        print(f"Error: {str(e)}")
+        return 1
+
+    print(f"Processed {report['succeeded'] + len(report['failed'])} of {report['total']} images "
+          f"({report['skipped']} skipped from checkpoint) in {report['elapsed']:.1f} s")
+    print(f"Throughput: {report['images_per_second']:.2f} images/s, "
+          f"{report['mean_file_seconds'] * 1000:.0f} ms per image per worker")
+
+    if report["failed"]:
+        print(f"Failed: {len(report['failed'])}")
+        for failure in report["failed"]:
+            print(f"  {failure['file']}: {failure['error']}")
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
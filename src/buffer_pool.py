@@ -0,0 +1,88 @@
+import sys
+import threading
+import numpy as np
+
+
+class BufferPool:
+    #arrays handed out by request() stay listed here; one is reused as soon as the
+    #pool holds the only reference to it, i.e. no node, consumer, cache entry or
+    #preview still uses it
+
+    def __init__(self, max_bytes=512 * 1024**2):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.peak_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._buffers = {}
+        self._lock = threading.Lock()
+
+    def request(self, shape, dtype=np.uint8):
+        key = (tuple(shape), np.dtype(dtype).str)
+
+        with self._lock:
+            buffers = self._buffers.setdefault(key, [])
+            for buffer in buffers:
+                #references: the list, the loop variable and getrefcount's argument
+                if sys.getrefcount(buffer) <= 3:
+                    self.hits += 1
+                    return buffer
+
+            self.misses += 1
+            buffer = np.empty(shape, dtype)
+            buffers.append(buffer)
+            self.current_bytes += buffer.nbytes
+            self.peak_bytes = max(self.peak_bytes, self.current_bytes)
+
+            if self.current_bytes > self.max_bytes:
+                self._trim(buffer)
+
+            return buffer
+
+    def _trim(self, keep):
+        #idle buffers go first; buffers still in use are then simply forgotten and
+        #freed by numpy once their last user lets go
+        for idle_only in (True, False):
+            for key in list(self._buffers):
+                kept = []
+                for buffer in self._buffers[key]:
+                    #references: the list, the loop variable and getrefcount's argument
+                    if (self.current_bytes <= self.max_bytes or buffer is keep
+                            or (idle_only and sys.getrefcount(buffer) > 3)):
+                        kept.append(buffer)
+                    else:
+                        self.current_bytes -= buffer.nbytes
+
+                if kept:
+                    self._buffers[key] = kept
+                else:
+                    del self._buffers[key]
+
+    def set_max_bytes(self, max_bytes):
+        with self._lock:
+            self.max_bytes = max_bytes
+            self._trim(None)
+
+    def clear(self):
+        with self._lock:
+            self._buffers.clear()
+            self.current_bytes = 0
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+        self.peak_bytes = self.current_bytes
+
+    def stats(self):
+        requests = self.hits + self.misses
+        with self._lock:
+            buffers = sum(len(buffers) for buffers in self._buffers.values())
+        return {
+            "buffers": buffers,
+            "bytes": self.current_bytes,
+            "peak_bytes": self.peak_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / requests if requests else 0.0,
+        }
@@ -0,0 +1,187 @@
+import math
+import os
+import struct
+import threading
+import cv2
+from src.result_cache import ResultCache
+
+#memory budget for decoded source images, shared by every graph in the process
+DEFAULT_DECODE_CACHE_BYTES = 512 * 1024**2
+
+decode_cache = ResultCache(DEFAULT_DECODE_CACHE_BYTES)
+
+#one lock per file being decoded, so nodes reading the same file in parallel decode it once
+_decode_locks = {}
+_decode_locks_lock = threading.Lock()
+
+
+def file_signature(file_path):
+    #changes whenever the file is replaced or edited on disk
+    stat = os.stat(file_path)
+    return (os.path.realpath(file_path), stat.st_mtime_ns, stat.st_size)
+
+
+#reductions libjpeg can decode directly, in color and in grayscale
+REDUCED_DECODE_FLAGS = {
+    (2, False): cv2.IMREAD_REDUCED_COLOR_2,
+    (4, False): cv2.IMREAD_REDUCED_COLOR_4,
+    (8, False): cv2.IMREAD_REDUCED_COLOR_8,
+    (2, True): cv2.IMREAD_REDUCED_GRAYSCALE_2,
+    (4, True): cv2.IMREAD_REDUCED_GRAYSCALE_4,
+    (8, True): cv2.IMREAD_REDUCED_GRAYSCALE_8,
+}
+
+
+def read_jpeg_header(file_path):
+    #(width, height, components) from the frame header, or None for anything but a JPEG
+    try:
+        with open(file_path, "rb") as f:
+            if f.read(2) != b"\xff\xd8":
+                return None
+
+            while True:
+                marker = f.read(2)
+                if len(marker) < 2 or marker[0] != 0xFF:
+                    return None
+
+                #fill bytes before a marker
+                while marker[1] == 0xFF:
+                    marker = marker[1:] + f.read(1)
+                    if len(marker) < 2:
+                        return None
+
+                code = marker[1]
+                if code in (0x01, 0xD8) or 0xD0 <= code <= 0xD7:
+                    continue
+
+                length_bytes = f.read(2)
+                if len(length_bytes) < 2:
+                    return None
+                length = struct.unpack(">H", length_bytes)[0]
+
+                #start of frame, every SOFn except DHT, JPG and DAC
+                if 0xC0 <= code <= 0xCF and code not in (0xC4, 0xC8, 0xCC):
+                    frame = f.read(6)
+                    if len(frame) < 6:
+                        return None
+                    _, height, width, components = struct.unpack(">BHHB", frame)
+                    return (width, height, components)
+
+                if code == 0xDA:
+                    return None
+                f.seek(length - 2, os.SEEK_CUR)
+    except OSError:
+        return None
+
+
+def reduced_size(width, height, reduction):
+    #size libjpeg produces for a 1/reduction decode, used for the resized fallback too
+    return (math.ceil(width / reduction), math.ceil(height / reduction))
+
+
+def native_reduced_flags(file_path, flags, reduction):
+    #imread flags that decode at 1/reduction directly, None where the format cannot
+    header = read_jpeg_header(file_path)
+    if header is None:
+        return None
+
+    #IMREAD_UNCHANGED keeps grayscale JPEGs single channel and ignores EXIF orientation
+    if flags == cv2.IMREAD_UNCHANGED:
+        return REDUCED_DECODE_FLAGS[(reduction, header[2] == 1)] | cv2.IMREAD_IGNORE_ORIENTATION
+    return REDUCED_DECODE_FLAGS[(reduction, False)]
+
+
+def decode_image(file_path, flags=cv2.IMREAD_COLOR, reduction=1):
+    #decoded RGB(A) image, shared between callers and therefore read-only;
+    #entries of older file versions are never hit again and age out of the cache.
+    #reduction 2, 4 or 8 decodes JPEGs at that fraction of their size, other formats
+    #are decoded in full and area-averaged down to the same size
+    if reduction != 1:
+        return _decode_reduced(file_path, flags, reduction)
+
+    try:
+        key = file_signature(file_path) + (flags,)
+    except OSError:
+        print(f"Error: File not found: {file_path}")
+        return None
+
+    image = decode_cache.get(key)
+    if image is not None:
+        return image
+
+    with _decode_locks_lock:
+        lock = _decode_locks.setdefault(key, threading.Lock())
+
+    try:
+        with lock:
+            #another thread may have finished the same file while we waited
+            image = decode_cache.get(key)
+            if image is not None:
+                return image
+
+            image = cv2.imread(file_path, flags)
+            if image is None:
+                print(f"Error: Failed to load image: {file_path}")
+                return None
+
+            #convert BGR to RGB, in place since the decoded array is ours
+            if len(image.shape) == 3 and image.shape[2] == 3:
+                image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB, dst=image)
+            elif len(image.shape) == 3 and image.shape[2] == 4:
+                image = cv2.cvtColor(image, cv2.COLOR_BGRA2RGBA, dst=image)
+
+            image.flags.writeable = False
+            decode_cache.put(key, image, size=image.nbytes)
+            return image
+    finally:
+        with _decode_locks_lock:
+            if _decode_locks.get(key) is lock:
+                del _decode_locks[key]
+
+
+def _decode_reduced(file_path, flags, reduction):
+    native_flags = native_reduced_flags(file_path, flags, reduction)
+    if native_flags is not None:
+        return decode_image(file_path, native_flags)
+
+    try:
+        key = file_signature(file_path) + (flags, reduction)
+    except OSError:
+        print(f"Error: File not found: {file_path}")
+        return None
+
+    entry = decode_cache.get(key)
+    if entry is not None:
+        return entry[0]
+
+    full_image = decode_image(file_path, flags)
+    if full_image is None:
+        return None
+
+    height, width = full_image.shape[:2]
+    image = cv2.resize(full_image, reduced_size(width, height, reduction), interpolation=cv2.INTER_AREA)
+    image.flags.writeable = False
+    #the size of the file is kept with the resized image, see reduced_source_size
+    decode_cache.put(key, (image, (width, height)), size=image.nbytes)
+    return image
+
+
+def reduced_source_size(file_path, flags, reduction):
+    #(width, height) of the file behind a resized reduced decode, None once it left the cache
+    try:
+        key = file_signature(file_path) + (flags, reduction)
+    except OSError:
+        return None
+
+    entry = decode_cache.get(key)
+    if entry is None:
+        return None
+    return entry[1]
+
+
+def set_decode_cache_budget(max_bytes):
+    decode_cache.set_max_bytes(max_bytes)
+
+
+def decode_cache_stats():
+    return decode_cache.stats()
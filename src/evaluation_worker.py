@@ -0,0 +1,156 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from PyQt5.QtCore import QObject, pyqtSignal
+
+
+class EvaluationWorker(QObject):
+    #runs the graph on a background thread for the properties panel
+
+    #a dict with node_id, image, success and event_time
+    result_ready = pyqtSignal(object)
+    
+    #members of fused chains got their own results after a run
+    intermediates_ready = pyqtSignal()
+
+    def __init__(self, node_graph, parent=None):
+        super().__init__(parent)
+
+        self.node_graph = node_graph
+
+        #a single thread, so graph evaluations never overlap
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="evaluation")
+        self._lock = threading.Lock()
+        self._idle = threading.Event()
+        self._idle.set()
+        self._running = False
+
+        #state of the next run; later requests overwrite earlier ones
+        self._generation = 0
+        self._changes = {}
+        self._interactive = None
+        self._node = None
+        self._event_time = None
+
+        #seconds from input event to preview update
+        self.latencies = deque(maxlen=200)
+
+    def request(self, node, changes=None, interactive=None):
+        #called on the UI thread for every widget event; bursts collapse into one run
+        with self._lock:
+            self._generation += 1
+            self._node = node
+            if changes:
+                for param_name, value in changes.items():
+                    self._changes[(node, param_name)] = value
+            if interactive is not None:
+                self._interactive = interactive
+            if self._event_time is None:
+                self._event_time = time.perf_counter()
+
+            if not self._running:
+                self._running = True
+                self._idle.clear()
+                self._executor.submit(self._run)
+
+    def is_current(self, generation):
+        return self._generation == generation
+
+    def cancel(self):
+        #drops the queued evaluation and stops the current one at the next node boundary;
+        #parameter changes already requested are still applied
+        with self._lock:
+            self._generation += 1
+            self._node = None
+            self._event_time = None
+
+    def wait(self, timeout=None):
+        #structural edits and saving must not overlap a background run
+        self.cancel()
+        return self._idle.wait(timeout)
+
+    def _run(self):
+        while True:
+            with self._lock:
+                node = self._node
+                changes = self._changes
+                interactive = self._interactive
+                event_time = self._event_time
+                generation = self._generation
+                self._changes = {}
+                self._interactive = None
+                self._node = None
+                self._event_time = None
+
+                if node is None and not changes and interactive is None:
+                    self._running = False
+                    self._idle.set()
+                    return
+
+            try:
+                self._evaluate(node, changes, interactive, event_time, generation)
+            except Exception as e:
+                print(f"Error in background evaluation: {str(e)}")
+
+    def _evaluate(self, node, changes, interactive, event_time, generation):
+        #parameter changes are applied here so they never race a running evaluation
+        for (changed_node, param_name), value in changes.items():
+            changed_node.set_parameter(param_name, value)
+
+        if interactive is True:
+            self.node_graph.begin_interactive()
+        elif interactive is False:
+            self.node_graph.end_interactive()
+
+        if node is None or node.id not in self.node_graph.nodes:
+            return
+
+        success = self.node_graph.execute(node.id, should_cancel=lambda: not self.is_current(generation))
+
+        #a newer request has superseded this one; its latency counts from our event
+        if not self.is_current(generation):
+            with self._lock:
+                if self._node is not None and event_time is not None:
+                    self._event_time = min(event_time, self._event_time or event_time)
+            return
+
+        if "preview" in node.parameters:
+            image = node.parameters["preview"]
+        else:
+            image = node.get_output_data("image") if success else None
+
+        self.result_ready.emit({
+            "node_id": node.id,
+            "image": image,
+            "success": success,
+            "event_time": event_time,
+        })
+        
+        #thumbnails of fused chain members are filled in once no drag is in progress
+        if self.node_graph.proxy_scale >= 1.0 and self.node_graph.fill_fused_intermediates(
+            should_cancel=lambda: not self.is_current(generation)
+        ):
+            self.intermediates_ready.emit()
+
+    def record_latency(self, result):
+        #called by the receiver once the preview is on screen
+        if result.get("event_time") is not None:
+            self.latencies.append(time.perf_counter() - result["event_time"])
+
+    def latency_stats(self):
+        if not self.latencies:
+            return {"count": 0, "last": 0.0, "median": 0.0, "max": 0.0}
+
+        latencies = list(self.latencies)
+        return {
+            "count": len(latencies),
+            "last": latencies[-1],
+            "median": float(np.median(latencies)),
+            "max": max(latencies),
+        }
+
+    def shutdown(self):
+        self.cancel()
+        self._executor.shutdown(wait=True)
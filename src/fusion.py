@@ -0,0 +1,211 @@
+import cv2
+import numpy as np
+
+
+def simplify_stages(stages):
+    #compose neighbouring tables and drop gray -> rgb -> gray round trips
+    simplified = []
+
+    def push(stage):
+        top = simplified[-1] if simplified else None
+
+        if stage[0] == "lut" and top is not None and top[0] == "lut":
+            simplified[-1] = ("lut", stage[1][top[1]])
+        elif stage[0] == "lut" and top is not None and top[0] == "to_rgb":
+            #a per-channel table commutes with replicating a gray channel
+            simplified.pop()
+            push(stage)
+            simplified.append(top)
+        elif stage[0] == "gray" and top is not None and top[0] == "to_rgb":
+            #the RGB2GRAY weights sum to one in fixed point, so this is exact
+            simplified.pop()
+        else:
+            simplified.append(stage)
+
+    for stage in stages:
+        push(stage)
+
+    return simplified
+
+
+def stage_output_shape(stage, shape):
+    if stage[0] == "gray":
+        return shape[:2]
+    if stage[0] == "to_rgb":
+        return shape[:2] + (3,)
+    return shape
+
+
+def apply_stage(stage, image, dst):
+    if stage[0] == "lut":
+        return cv2.LUT(image, stage[1], dst=dst)
+    if stage[0] == "gray":
+        return cv2.cvtColor(image, cv2.COLOR_RGB2GRAY, dst=dst)
+    if stage[0] == "to_rgb":
+        return cv2.cvtColor(image, cv2.COLOR_GRAY2RGB, dst=dst)
+    raise ValueError(f"Unknown fused stage: {stage[0]}")
+
+
+def consumer_edges(graph, node):
+    edges = []
+    for consumer_id in graph.downstream.get(node.id, ()):
+        consumer = graph.nodes[consumer_id]
+        for input_name, connection in consumer.inputs.items():
+            if connection and connection[0] is node:
+                edges.append((consumer, input_name, connection[1]))
+    return edges
+
+
+class FusedChain:
+
+    def __init__(self, graph, nodes, blend_node=None, blend_input=None):
+        self.graph = graph
+        self.nodes = nodes
+        self.blend_node = blend_node
+        self.blend_input = blend_input
+
+        #intermediate stage buffers stay private to the chain and are reused
+        self._scratch = {}
+
+    @property
+    def output_node(self):
+        return self.blend_node if self.blend_node is not None else self.nodes[-1]
+
+    @property
+    def node_ids(self):
+        node_ids = [node.id for node in self.nodes]
+        if self.blend_node is not None:
+            node_ids.append(self.blend_node.id)
+        return node_ids
+
+    def compile(self, image):
+        channels = image.shape[2] if image.ndim == 3 else None
+        stages = []
+
+        for node in self.nodes:
+            compiled = node.pointwise_stages(channels, image.dtype)
+            if compiled is None:
+                return None
+            node_stages, channels = compiled
+            stages.extend(node_stages)
+
+        return simplify_stages(stages)
+
+    def apply(self, image, stages):
+        if not stages:
+            return image.copy()
+
+        current = image
+        for index, stage in enumerate(stages):
+            shape = stage_output_shape(stage, current.shape)
+
+            if index == len(stages) - 1:
+                dst = self.output_node.request_buffer(shape)
+            else:
+                dst = self._scratch.get(index)
+                if dst is None or dst.shape != shape:
+                    dst = np.empty(shape, dtype=np.uint8)
+                    self._scratch[index] = dst
+
+            current = apply_stage(stage, current, dst)
+
+        return current
+
+    def run(self):
+        profiler = self.graph.profiler
+        if profiler is None:
+            return self._run()[0]
+
+        start = profiler.start()
+        success, cache_hit = self._run()
+        profiler.record_fused(self, start, success, cache_hit)
+        return success
+
+    def _run(self):
+        #(success, whether the result came from the cache)
+        output_node = self.output_node
+
+        cache = self.graph.result_cache
+        key = output_node.cache_key()
+        if key is not None:
+            cached = cache.get(key)
+            if cached is not None:
+                output_node.restore_cache_entry(cached)
+                return True, True
+
+        image = self.nodes[0].get_input_data("image")
+        stages = self.compile(image) if image is not None else None
+
+        #anything the fused kernel cannot express runs node by node
+        if stages is None:
+            return output_node.evaluate(), False
+
+        try:
+            result = self.apply(image, stages)
+            if self.blend_node is not None:
+                result = self.blend_node.fused_result(self.blend_input, result)
+        except Exception as e:
+            print(f"Warning: Fused execution failed, running nodes separately: {str(e)}")
+            result = None
+
+        if result is None:
+            return output_node.evaluate(), False
+
+        output_node.processed_data = {"image": result}
+        output_node.output_state = {}
+        output_node.dirty = False
+        output_node.result_version += 1
+
+        #without output_state the other outputs could not be produced on a cache hit
+        if key is not None and set(output_node.outputs) == {"image"}:
+            output_node.store_cache_entry(cache, key)
+
+        return True, False
+
+
+def find_fused_chains(graph):
+    #maps every node id inside a chain to its FusedChain
+    chains = {}
+
+    for node_id in graph.execution_order:
+        node = graph.nodes[node_id]
+        if not node.pointwise or node_id in chains:
+            continue
+
+        members = [node]
+        blend_node = None
+        blend_input = None
+
+        while True:
+            edges = consumer_edges(graph, members[-1])
+            if len(edges) != 1:
+                break
+
+            consumer, input_name, output_name = edges[0]
+            if output_name != "image" or consumer.id in chains:
+                break
+
+            if consumer.pointwise:
+                members.append(consumer)
+                continue
+
+            if hasattr(consumer, "fused_result"):
+                blend_node = consumer
+                blend_input = input_name
+            break
+
+        if len(members) + (blend_node is not None) < 2:
+            continue
+
+        #the fused result only carries the image, nothing may read other outputs
+        if blend_node is None:
+            if any(output_name != "image" for _, _, output_name in consumer_edges(graph, members[-1])):
+                members.pop()
+                if len(members) < 2:
+                    continue
+
+        chain = FusedChain(graph, members, blend_node, blend_input)
+        for member_id in chain.node_ids:
+            chains[member_id] = chain
+
+    return chains
@@ -0,0 +1,143 @@
+class CycleError(ValueError):
+    pass
+
+
+class DependencyGraph:
+    #adjacency lists plus a topological order that is repaired locally on every edge
+    #insertion (Pearce & Kelly), instead of being re-sorted from scratch
+
+    def __init__(self):
+        #node id -> {neighbour id: number of connections}, several inputs may share a source
+        self.successors = {}
+        self.predecessors = {}
+        self.order = []
+        self.index = {}
+
+    def __contains__(self, node_id):
+        return node_id in self.index
+
+    def __len__(self):
+        return len(self.order)
+
+    def add_node(self, node_id):
+        if node_id in self.index:
+            return
+        self.successors[node_id] = {}
+        self.predecessors[node_id] = {}
+        self.index[node_id] = len(self.order)
+        self.order.append(node_id)
+
+    def remove_node(self, node_id):
+        if node_id not in self.index:
+            return
+
+        for target in self.successors.pop(node_id):
+            del self.predecessors[target][node_id]
+        for source in self.predecessors.pop(node_id):
+            del self.successors[source][node_id]
+
+        position = self.index.pop(node_id)
+        del self.order[position]
+        for i in range(position, len(self.order)):
+            self.index[self.order[i]] = i
+
+    def add_edge(self, source, target):
+        targets = self.successors[source]
+        if target in targets:
+            targets[target] += 1
+            self.predecessors[target][source] += 1
+            return
+
+        if source == target:
+            raise CycleError(f"{source} cannot feed itself")
+
+        if self.index[source] > self.index[target]:
+            self._reorder(source, target)
+
+        targets[target] = 1
+        self.predecessors[target][source] = 1
+
+    def remove_edge(self, source, target):
+        #removing an edge never invalidates the order
+        targets = self.successors.get(source)
+        if not targets or target not in targets:
+            return
+
+        targets[target] -= 1
+        self.predecessors[target][source] -= 1
+        if targets[target] == 0:
+            del targets[target]
+            del self.predecessors[target][source]
+
+    def _reorder(self, source, target):
+        lower = self.index[target]
+        upper = self.index[source]
+
+        #everything reachable from target that currently sits before source
+        forward = []
+        visited = {target}
+        pending = [target]
+        while pending:
+            node_id = pending.pop()
+            forward.append(node_id)
+            for next_id in self.successors[node_id]:
+                if next_id == source:
+                    raise CycleError(f"{source} already depends on {target}")
+                if next_id not in visited and self.index[next_id] < upper:
+                    visited.add(next_id)
+                    pending.append(next_id)
+
+        #everything source depends on that currently sits after target
+        backward = []
+        visited = {source}
+        pending = [source]
+        while pending:
+            node_id = pending.pop()
+            backward.append(node_id)
+            for previous_id in self.predecessors[node_id]:
+                if previous_id not in visited and self.index[previous_id] > lower:
+                    visited.add(previous_id)
+                    pending.append(previous_id)
+
+        #only the affected nodes move, and only within the slots they already held
+        forward.sort(key=self.index.__getitem__)
+        backward.sort(key=self.index.__getitem__)
+        moved = backward + forward
+        slots = sorted(self.index[node_id] for node_id in moved)
+
+        for slot, node_id in zip(slots, moved):
+            self.order[slot] = node_id
+            self.index[node_id] = slot
+
+    def rebuild(self, edges):
+        #full Kahn sort, for callers that changed many edges at once
+        node_ids = list(self.order)
+        successors = {node_id: {} for node_id in node_ids}
+        predecessors = {node_id: {} for node_id in node_ids}
+
+        for source, target in edges:
+            successors[source][target] = successors[source].get(target, 0) + 1
+            predecessors[target][source] = predecessors[target].get(source, 0) + 1
+
+        remaining = {node_id: len(predecessors[node_id]) for node_id in node_ids}
+        order = [node_id for node_id in node_ids if remaining[node_id] == 0]
+        for node_id in order:
+            for next_id in successors[node_id]:
+                remaining[next_id] -= 1
+                if remaining[next_id] == 0:
+                    order.append(next_id)
+
+        #the current state is kept if the new edges do not form a DAG
+        if len(order) != len(node_ids):
+            raise CycleError("Graph contains a cycle")
+
+        self.successors = successors
+        self.predecessors = predecessors
+        self.order = order
+        self.index = {node_id: i for i, node_id in enumerate(order)}
+
+    def clear(self):
+        self.successors = {}
+        self.predecessors = {}
+        self.order = []
+        self.index = {}
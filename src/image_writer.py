@@ -0,0 +1,115 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import cv2
+
+#encoders run outside the GIL, a few writers keep several outputs encoding at once
+DEFAULT_WRITER_THREADS = 2
+
+ENCODER_PRESETS = ("fast", "balanced", "smallest")
+
+FORMAT_EXTENSIONS = {
+    "png": "png",
+    "jpg": "jpg",
+    "jpeg": "jpg",
+    "bmp": "bmp",
+    "webp": "webp",
+}
+
+
+def encode_params(format_name, preset="balanced", quality=95):
+    #imwrite parameters for a format and preset; None for an unknown format
+    format_name = FORMAT_EXTENSIONS.get(format_name.lower())
+    if preset not in ENCODER_PRESETS:
+        preset = "balanced"
+
+    if format_name == "png":
+        #zlib level 1 is several times faster than 9 for a few percent larger files
+        level = {"fast": 1, "balanced": 4, "smallest": 9}[preset]
+        return [cv2.IMWRITE_PNG_COMPRESSION, level]
+
+    if format_name == "jpg":
+        params = [cv2.IMWRITE_JPEG_QUALITY, int(quality)]
+        #optimized Huffman tables shrink the file without changing a pixel
+        if preset != "fast":
+            params += [cv2.IMWRITE_JPEG_OPTIMIZE, 1]
+        if preset == "smallest":
+            params += [cv2.IMWRITE_JPEG_PROGRESSIVE, 1]
+        return params
+
+    if format_name == "webp":
+        #a quality above 100 makes the WebP encoder lossless
+        return [cv2.IMWRITE_WEBP_QUALITY, 101]
+
+    if format_name == "bmp":
+        return []
+
+    return None
+
+
+def ensure_directory(file_path):
+    directory = os.path.dirname(file_path)
+    if directory and not os.path.exists(directory):
+        try:
+            os.makedirs(directory, exist_ok=True)
+        except Exception as e:
+            print(f"Error creating directory: {str(e)}")
+            return False
+    return True
+
+
+def write_image(file_path, image, format_name="png", preset="balanced", quality=95, verbose=True):
+    #encodes an RGB(A) or grayscale image and writes it, returns True on success
+    params = encode_params(format_name, preset, quality)
+    if params is None:
+        print(f"Error: Unsupported format: {format_name}")
+        return False
+
+    try:
+        #OpenCV encoders expect BGR(A); the converted copy only exists on the writer thread
+        if len(image.shape) == 3 and image.shape[2] == 3:
+            image = cv2.cvtColor(image, cv2.COLOR_RGB2BGR)
+        elif len(image.shape) == 3 and image.shape[2] == 4:
+            image = cv2.cvtColor(image, cv2.COLOR_RGBA2BGRA)
+
+        if not cv2.imwrite(file_path, image, params):
+            print(f"Error: Failed to write image: {file_path}")
+            return False
+
+        if verbose:
+            print(f"Image saved successfully to: {file_path}")
+        return True
+
+    except Exception as e:
+        print(f"Error saving image: {str(e)}")
+        return False
+
+
+class ImageWriter:
+    #background queue for encoding and writing images; submit() returns a future
+    #that resolves to True or False once the file is on disk
+
+    def __init__(self, max_workers=DEFAULT_WRITER_THREADS):
+        self.max_workers = max_workers
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="image-writer")
+            return self._executor
+
+    def submit(self, file_path, image, format_name="png", preset="balanced", quality=95):
+        #the future holds a reference to image, so a pooled buffer is not reused until it is written
+        return self._get_executor().submit(write_image, file_path, image, format_name, preset, quality)
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+
+#shared by every output node in the process
+image_writer = ImageWriter()
@@ -1,8 +1,9 @@
+import os
 import sys
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                             QHBoxLayout, QSplitter, QAction, QFileDialog, 
                             QDockWidget, QScrollArea, QLabel, QMessageBox)
-from PyQt5.QtCore import Qt, QPointF, QRectF
+from PyQt5.QtCore import Qt, QPointF, QRectF, pyqtSignal
 from PyQt5.QtGui import QPainter, QPen, QBrush, QColor
 
 from src.node_graph import NodeGraph
@@ -12,10 +13,20 @@ from src.properties_panel import PropertiesPanel
 
 class MainWindow(QMainWindow):
     
+    #emitted from the image writer thread with file_path and success
+    save_finished = pyqtSignal(object)
+    
+    #emitted from the writer threads of save_all_outputs
+    save_all_progress = pyqtSignal(object)
+    save_all_finished = pyqtSignal(object)
+    
     def __init__(self):
         super().__init__()
         
         self.node_graph = NodeGraph()
+        self.save_finished.connect(self.on_save_finished)
+        self.save_all_progress.connect(self.on_save_all_progress)
+        self.save_all_finished.connect(self.on_save_all_finished)
         self.init_ui()
     
     def init_ui(self):
@@ -51,6 +62,10 @@ class MainWindow(QMainWindow):
 
         #connect signals
         self.canvas.node_selected.connect(self.properties_panel.set_selected_node)
+        #every structural graph edit waits for the background evaluation first
+        self.node_graph.set_edit_guard(self.properties_panel.evaluation_worker.wait)
+        self.properties_panel.evaluation_worker.result_ready.connect(self.canvas.refresh_thumbnails)
+        self.properties_panel.evaluation_worker.intermediates_ready.connect(self.canvas.refresh_thumbnails)
 
         self.show()
 
@@ -76,6 +91,23 @@ class MainWindow(QMainWindow):
         save_action.triggered.connect(self.save_result)
         file_menu.addAction(save_action)
         
+        #save all action
+        save_all_action = QAction("Save All Outputs", self)
+        save_all_action.setShortcut("Ctrl+Shift+S")
+        save_all_action.triggered.connect(self.save_all_outputs)
+        file_menu.addAction(save_all_action)
+        
+        file_menu.addSeparator()
+        
+        #graph actions, saved graphs can also be run headless by src.batch_runner
+        open_graph_action = QAction("Open Graph", self)
+        open_graph_action.triggered.connect(self.open_graph)
+        file_menu.addAction(open_graph_action)
+        
+        save_graph_action = QAction("Save Graph", self)
+        save_graph_action.triggered.connect(self.save_graph)
+        file_menu.addAction(save_graph_action)
+        
         file_menu.addSeparator()
         
         #exit action
@@ -161,7 +193,7 @@ class MainWindow(QMainWindow):
             
             if reply == QMessageBox.No:
                 return
-            
+        
         self.node_graph.clear()
         self.canvas.update()
         self.properties_panel.set_selected_node(None)
@@ -169,7 +201,7 @@ class MainWindow(QMainWindow):
     
     def open_image(self):
         file_path, _ = QFileDialog.getOpenFileName(
-            self, "Open Image", "", "Image Files (*.png *.jpg *.jpeg *.bmp)"
+            self, "Open Image", "", "Image Files (*.png *.jpg *.jpeg *.bmp *.webp *.npy *.raw)"
         )
         
         if file_path:
@@ -195,10 +227,13 @@ class MainWindow(QMainWindow):
         output_node = output_nodes[0]
         
         file_path_save, _ = QFileDialog.getSaveFileName(
-            self, "Save Result", "", "PNG Files (*.png);;JPEG Files (*.jpg);;BMP Files (*.bmp)"
+            self, "Save Result", "", "PNG Files (*.png);;JPEG Files (*.jpg);;WebP Files (*.webp);;BMP Files (*.bmp)"
         )
         
         if file_path_save:
+            #the worker may be evaluating this node, the edits below must not overlap it
+            self.properties_panel.evaluation_worker.wait()
+            
             output_node.set_parameter("file_path_save", file_path_save)
             
             ext = file_path_save.split(".")[-1].lower()
@@ -206,22 +241,125 @@ class MainWindow(QMainWindow):
                 output_node.set_parameter("format", "jpg")
             elif ext == "png":
                 output_node.set_parameter("format", "png")
+            elif ext == "webp":
+                output_node.set_parameter("format", "webp")
             elif ext == "bmp":
                 output_node.set_parameter("format", "bmp")
             
+            #saving always runs at full resolution, on this thread
+            self.node_graph.end_interactive()
+            
             output_node.process()
-            success = output_node.save_image()
+            future = output_node.save_image_async()
+            self.canvas.refresh_thumbnails()
             
-            if success:
-                msg = QMessageBox()
-                msg.setText(f"Saved result to: {file_path_save_save}")
-                msg.setStandardButtons(QMessageBox.StandardButton.Ok)
-                msg.exec()
+            #encoding and writing happen on the image writer thread
+            self.statusBar().showMessage(f"Saving {file_path_save}...")
+            future.add_done_callback(
+                lambda done, path=file_path_save: self.save_finished.emit({
+                    "file_path": path,
+                    "success": done.result(),
+                })
+            )
+    
+    def on_save_finished(self, result):
+        if result["success"]:
+            self.statusBar().showMessage(f"Saved result to: {result['file_path']}")
+            msg = QMessageBox()
+            msg.setText(f"Saved result to: {result['file_path']}")
+            msg.setStandardButtons(QMessageBox.StandardButton.Ok)
+            msg.exec()
+        else:
+            self.statusBar().showMessage("Save failed")
+            QMessageBox.warning(
+                self, "Save Failed", 
+                "Failed to save the result. Please check the connections and try again."
+            )
+    
+    def save_all_outputs(self):
+        output_nodes = [node for node in self.node_graph.nodes.values() 
+                        if node.__class__.__name__ == "OutputNode"]
+        
+        if not output_nodes:
+            QMessageBox.warning(
+                self, "No Output Node", 
+                "Please add an Output Node to save results."
+            )
+            return
+        
+        #outputs without a file path are saved into one directory
+        output_dir = None
+        if any(not node.parameters["file_path_save"] for node in output_nodes):
+            output_dir = QFileDialog.getExistingDirectory(self, "Save All Outputs")
+            if not output_dir:
+                return
+        
+        #the graph runs once on this thread, the files are written in the background
+        self.properties_panel.evaluation_worker.wait()
+        self.statusBar().showMessage(f"Saving {len(output_nodes)} outputs...")
+        
+        future = self.node_graph.save_all_outputs(
+            output_dir,
+            progress=lambda completed, total, entry: self.save_all_progress.emit({
+                "completed": completed,
+                "total": total,
+                "entry": entry,
+            }),
+            blocking=False
+        )
+        self.canvas.refresh_thumbnails()
+        future.add_done_callback(lambda done: self.save_all_finished.emit(done.result()))
+    
+    def on_save_all_progress(self, progress):
+        entry = progress["entry"]
+        status = "saved" if entry["success"] else "failed"
+        self.statusBar().showMessage(
+            f"[{progress['completed']}/{progress['total']}] {status} {os.path.basename(entry['file'] or entry['name'])}"
+        )
+    
+    def on_save_all_finished(self, report):
+        lines = []
+        for entry in report["files"]:
+            if entry["success"]:
+                lines.append(f"{entry['file']} ({entry['seconds'] * 1000:.0f} ms)")
+            else:
+                lines.append(f"{entry['name']}: {entry['error']}")
+        
+        summary = (f"Saved {report['succeeded']} of {report['total']} outputs in {report['elapsed']:.2f} s "
+                   f"(graph {report['execute_seconds']:.2f} s)")
+        self.statusBar().showMessage(summary)
+        
+        msg = QMessageBox()
+        if report["failed"]:
+            msg.setIcon(QMessageBox.Warning)
+        msg.setText(summary)
+        msg.setDetailedText("\n".join(lines))
+        msg.setStandardButtons(QMessageBox.StandardButton.Ok)
+        msg.exec()
+    
+    def open_graph(self):
+        file_path, _ = QFileDialog.getOpenFileName(
+            self, "Open Graph", "", "Graph Files (*.json)"
+        )
+        
+        if file_path:
+            self.properties_panel.set_selected_node(None)
+            if self.node_graph.load(file_path):
+                self.statusBar().showMessage(f"Opened graph: {file_path}")
+            else:
+                QMessageBox.warning(self, "Open Failed", "Failed to load the graph file.")
+            self.canvas.update()
+    
+    def save_graph(self):
+        file_path, _ = QFileDialog.getSaveFileName(
+            self, "Save Graph", "", "Graph Files (*.json)"
+        )
+        
+        if file_path:
+            if self.node_graph.save(file_path):
+                self.statusBar().showMessage(f"Saved graph: {file_path}")
             else:
-                QMessageBox.warning(
-                    self, "Save Failed", 
-                    "Failed to save the result. Please check the connections and try again."
-                )
+                QMessageBox.warning(self, "Save Failed", "Failed to save the graph file.")
     
     def add_node(self, node_type):
         #create the node
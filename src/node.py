@@ -1,7 +1,17 @@
 import uuid
 import numpy as np
+from src.result_cache import make_cache_key, estimate_size
 
 class Node:
+
+    #nodes with side effects or unhashable state opt out of the result cache
+    cacheable = True
+
+    #outputs that are not images of the input's size (histograms, kernels)
+    non_spatial_outputs = ()
+
+    #single-input per-pixel nodes that the graph may fuse into one kernel
+    pointwise = False
     
     def __init__(self, name, id=None):
 
@@ -13,12 +23,121 @@ class Node:
         self.position = (0, 0)  
         self.processed_data = {}  
         self.dirty = True  
+        
+        #outputs computed only when asked for by name, from what process() kept
+        self.lazy_outputs = {}
+        self.output_state = {}
+        self.graph = None
+        self._cache_key = None
+        self._stale_epoch = None
+        
+        #bumped whenever processed_data holds a new result, e.g. for canvas thumbnails
+        self.result_version = 0
+        self._tile_inputs = None
     
     def process(self):
         raise NotImplementedError(
             f"Node class {self.__class__.__name__} must implement process() method"
         )
     
+    def tile_halo(self):
+        #pixels of context needed around a tile, or None if the node cannot be tiled
+        return None
+    
+    def pointwise_stages(self, channels, dtype):
+        #(stages, output channels) describing the per-pixel work, or None
+        return None
+    
+    def cache_key(self):
+        #identifies a result by node type, parameters and everything upstream
+        if not self.cacheable:
+            return None
+
+        #memoized until this node or anything upstream is invalidated
+        if self._cache_key is not None:
+            return self._cache_key
+
+        upstream = []
+        for input_name in sorted(self.inputs):
+            connection = self.inputs[input_name]
+            if connection is None:
+                upstream.append((input_name, None, None))
+                continue
+
+            source_node, output_name = connection
+            source_key = source_node.cache_key()
+            if source_key is None:
+                return None
+            upstream.append((input_name, source_key, output_name))
+
+        self._cache_key = make_cache_key(
+            self.__class__.__name__,
+            self.parameters,
+            self.cache_key_extra(),
+            upstream
+        )
+        return self._cache_key
+
+    def cache_key_extra(self):
+        return None
+
+    def evaluate(self, force=False):
+        #bring processed_data up to date, reusing cached results when possible
+        if not self.dirty and not force:
+            return True
+
+        profiler = self.graph.profiler if self.graph is not None else None
+        if profiler is None:
+            return self._evaluate()[0]
+
+        start = profiler.start()
+        success, cache_hit = self._evaluate()
+        profiler.record_node(self, start, success, cache_hit)
+        return success
+
+    def _evaluate(self):
+        #(success, whether the result came from the cache)
+        if self.graph is not None:
+            self.graph.evaluation_epoch += 1
+        cache = self.graph.result_cache if self.graph is not None else None
+        key = self.cache_key() if cache is not None else None
+
+        if key is not None:
+            cached = cache.get(key)
+            if cached is not None:
+                self.restore_cache_entry(cached)
+                self.result_version += 1
+                return True, True
+
+        #lazily produced outputs belong to the previous run
+        for output_name in self.lazy_outputs:
+            self.processed_data.pop(output_name, None)
+
+        success = self.process()
+        self.result_version += 1
+
+        if success and key is not None:
+            self.store_cache_entry(cache, key)
+
+        return success, False
+
+    def store_cache_entry(self, cache, key):
+        #arrays kept in output_state for lazy outputs, such as the threshold node's
+        #input, stay alive as long as the entry does and count against the budget
+        outputs = {id(value) for value in self.processed_data.values()}
+        retained = [value for value in self.output_state.values() if id(value) not in outputs]
+        cache.put(
+            key,
+            (dict(self.processed_data), dict(self.output_state)),
+            size=estimate_size(self.processed_data) + estimate_size(retained)
+        )
+
+    def restore_cache_entry(self, entry):
+        processed_data, output_state = entry
+        self.processed_data = dict(processed_data)
+        self.output_state = dict(output_state)
+        self.dirty = False
+
     def connect_input(self, input_name, source_node, output_name):
         
         if input_name not in self.inputs:
@@ -30,52 +149,101 @@ class Node:
             return False
             
             
-        self.inputs[input_name] = (source_node, output_name)
-        self.dirty = True
-        return True
+        return self.set_input(input_name, (source_node, output_name))
         
     
     def disconnect_input(self, input_name):
 
         if input_name in self.inputs:
-            self.inputs[input_name] = None
-            self.dirty = True
-            return True
+            return self.set_input(input_name, None)
         return False
     
     def get_input_data(self, input_name):
         
+        if self._tile_inputs is not None:
+            return self._tile_inputs.get(input_name)
+        
         if input_name not in self.inputs or self.inputs[input_name] is None:
             return None
             
         source_node, output_name = self.inputs[input_name]
         
-        if source_node.dirty:
-            success = source_node.process()
-            if not success:
-                return None
-        
-        if output_name in source_node.processed_data:
-            return source_node.processed_data[output_name]
-        return None
+        return source_node.get_output_data(output_name)
     
-    def get_output(self, output_name):
+    def get_output_data(self, output_name):
         
-        if self.dirty:
-            self.process(self)
+        if not self.evaluate():
+            return None
             
         if output_name in self.processed_data:
             return self.processed_data[output_name]
+        
+        if output_name in self.lazy_outputs:
+            value = self.lazy_outputs[output_name]()
+            self.processed_data[output_name] = value
+            return value
         return None
     
+    def get_output(self, output_name):
+        
+        return self.get_output_data(output_name)
+    
     def set_parameter(self, param_name, value):
         
         if param_name in self.parameters:
             self.parameters[param_name] = value
-            self.dirty = True
+            self.invalidate()
             return True
         return False
     
+    def invalidate(self):
+        #mark this node and everything that consumes it as stale
+        if self.graph is not None:
+            self.graph.invalidate_downstream(self.id)
+        else:
+            self.mark_stale()
+    
+    def proxy_scale(self):
+        #below 1.0 the graph is running on downscaled inputs for interactive feedback
+        if self.graph is not None:
+            return self.graph.proxy_scale
+        return 1.0
+    
+    def source_scale(self):
+        #scale of the images a source node produces relative to full resolution,
+        #None for nodes that process images from their inputs
+        return None
+    
+    def working_scale(self):
+        #scale of the images this node processes, taken from the source node it is
+        #fed by; pixel sized parameters are multiplied by it
+        node = self
+        while node is not None:
+            scale = node.source_scale()
+            if scale is not None:
+                return scale
+            node = next((connection[0] for connection in node.inputs.values() if connection), None)
+        return self.proxy_scale()
+    
+    def request_buffer(self, shape, dtype=np.uint8):
+        #output buffers come from the graph's pool so re-executions reuse memory
+        if self.graph is not None:
+            return self.graph.buffer_pool.request(shape, dtype)
+        return np.empty(shape, dtype)
+    
+    def mark_stale(self):
+        self.dirty = True
+        self._cache_key = None
+    
+    def set_input(self, input_name, connection):
+        #connections made directly on the node still have to reach the graph
+        if self.graph is not None:
+            return self.graph.on_input_changed(self, input_name, connection)
+        
+        self.inputs[input_name] = connection
+        self.mark_stale()
+        return True
+    
     def get_parameter(self, param_name):
         
         return self.parameters.get(param_name, None)
@@ -83,8 +251,12 @@ class Node:
     def set_position(self, x, y):
         
         self.position = (x, y)
+        if self.graph is not None:
+            self.graph.notify_listeners("node_moved", self)
     
     def clear_cache(self):
         self.processed_data = {}
-        self.dirty = True
+        self.output_state = {}
+        self.result_version += 1
+        self.invalidate()
 
@@ -1,7 +1,10 @@
 import sys
 from PyQt5.QtWidgets import QWidget, QGraphicsView, QGraphicsScene
 from PyQt5.QtCore import Qt, QPointF, QRectF, pyqtSignal
-from PyQt5.QtGui import QPainter, QPen, QBrush, QColor, QPainterPath
+import numpy as np
+from PyQt5.QtGui import QPainter, QPen, QBrush, QColor, QPainterPath, QPicture, QPixmap
+from src.spatial_index import SpatialIndex
+from src.thumbnails import ThumbnailGenerator
 
 class NodeCanvas(QWidget):
 
@@ -37,6 +40,15 @@ class NodeCanvas(QWidget):
         self.node_title_font_size = 10
         self.connector_radius = 8
         self.connector_spacing = 20
+        self.thumbnail_width = self.node_width - 20
+        self.thumbnail_height = 90
+        
+        #zoom, ctrl + mouse wheel; below detail_zoom nodes are drawn as plain boxes
+        #and connections as straight lines
+        self.zoom = 1.0
+        self.min_zoom = 0.1
+        self.max_zoom = 2.0
+        self.detail_zoom = 0.5
         
         #colors
         self.background_color = QColor(29, 29, 29)
@@ -48,84 +60,446 @@ class NodeCanvas(QWidget):
         self.connector_color = QColor(180, 180, 180)
         self.connector_hover_color = QColor(220, 220, 220)
         self.connection_color = QColor(200, 200, 200)
+        self.thumbnail_background_color = QColor(60, 60, 60)
         
         #initialize hover state
         self.hover_node_id = None
         self.hover_connector = None  
-
+        
+        #grids of node rectangles and connector points, kept in step with the graph
+        #so hit tests on every mouse move only look at the cell under the cursor
+        self.node_index = SpatialIndex()
+        self.connector_index = SpatialIndex()
+        self._node_order = {}
+        self._next_order = 0
+        self._connector_keys = {}
+        
+        #retained drawing: node bounds and connection paths live in a grid so a repaint
+        #only visits what intersects the dirty rectangle; node pictures are recorded once
+        #and replayed until the node's look changes, paths are rebuilt when an end moves
+        self.paint_index = SpatialIndex()
+        self._node_bounds = {}
+        self._node_pictures = {}
+        self._connection_paths = {}
+        self._temp_bounds = QRectF()
+        
+        #node id -> (result_version, QPixmap) of the node's primary output, made in the
+        #background from results that already exist; painting never waits for them
+        self.thumbnail_generator = ThumbnailGenerator(self.thumbnail_width, self.thumbnail_height, self)
+        self.thumbnail_generator.thumbnail_ready.connect(self.on_thumbnail_ready)
+        self._thumbnails = {}
+        self._thumbnail_requested = {}
+        
+        self.rebuild_index()
+        self.node_graph.add_listener(self.on_graph_changed)
+    
+    def rebuild_index(self):
+        self.node_index.clear()
+        self.connector_index.clear()
+        self.paint_index.clear()
+        self._node_order = {}
+        self._connector_keys = {}
+        self._node_bounds = {}
+        self._node_pictures = {}
+        self._connection_paths = {}
+        self._thumbnails = {}
+        self._thumbnail_requested = {}
+        
+        for node in self.node_graph.nodes.values():
+            self._index_node(node)
+    
+    def on_graph_changed(self, event, node):
+        if event == "cleared":
+            self.rebuild_index()
+            self.update()
+            return
+        
+        if event == "node_removed":
+            dirty = self._unindex_node(node.id)
+        elif node is not None and node.id in self.node_graph.nodes:
+            dirty = self._index_node(node)
+        else:
+            return
+        
+        self.update_scene_rect(dirty)
+    
+    def _index_node(self, node):
+        #returns the scene area whose drawing changed
+        
+        #hits are reported in the order nodes were added, as the old linear scan did
+        order = self._node_order.get(node.id)
+        if order is None:
+            order = self._next_order
+            self._next_order += 1
+            self._node_order[node.id] = order
+        x, y = node.position
+        
+        #the whole drawn node, thumbnail area included
+        self.node_index.insert(
+            node.id, x, y,
+            x + self.node_width,
+            y + self._get_node_height(node),
+            order
+        )
+        
+        for key in self._connector_keys.pop(node.id, ()):
+            self.connector_index.remove(key)
+        
+        #inputs are checked before outputs of the same node
+        keys = []
+        r = self.connector_radius
+        for index, input_name in enumerate(node.inputs.keys()):
+            key = (node.id, input_name, True)
+            pos = self._get_input_connector_pos(node, input_name)
+            self.connector_index.insert(key, pos.x() - r, pos.y() - r, pos.x() + r, pos.y() + r, (order, 0, index))
+            keys.append(key)
+        
+        for index, output_name in enumerate(node.outputs.keys()):
+            key = (node.id, output_name, False)
+            pos = self._get_output_connector_pos(node, output_name)
+            self.connector_index.insert(key, pos.x() - r, pos.y() - r, pos.x() + r, pos.y() + r, (order, 1, index))
+            keys.append(key)
+        
+        self._connector_keys[node.id] = keys
+        
+        #nodes are drawn after every connection, in the order they were added
+        dirty = self._node_bounds.get(node.id, QRectF())
+        bounds = self._get_node_bounds(node)
+        self._node_bounds[node.id] = bounds
+        self.paint_index.insert(
+            ("node", node.id),
+            bounds.left(), bounds.top(), bounds.right(), bounds.bottom(),
+            (1, order)
+        )
+        dirty = dirty.united(bounds)
+        
+        #connections into this node and out of it to its consumers
+        for input_name in node.inputs.keys():
+            dirty = dirty.united(self._update_connection(node, input_name))
+        
+        for consumer_id in self.node_graph.downstream.get(node.id, ()):
+            consumer = self.node_graph.nodes.get(consumer_id)
+            if consumer is None:
+                continue
+            for input_name, connection in consumer.inputs.items():
+                if connection and connection[0] is node:
+                    dirty = dirty.united(self._update_connection(consumer, input_name))
+        
+        return dirty
+    
+    def _unindex_node(self, node_id):
+        self.node_index.remove(node_id)
+        for key in self._connector_keys.pop(node_id, ()):
+            self.connector_index.remove(key)
+        self._node_order.pop(node_id, None)
+        
+        self.paint_index.remove(("node", node_id))
+        self._node_pictures.pop(node_id, None)
+        self._thumbnails.pop(node_id, None)
+        self._thumbnail_requested.pop(node_id, None)
+        self.thumbnail_generator.discard(node_id)
+        dirty = self._node_bounds.pop(node_id, QRectF())
+        
+        #consumers report their own connection changes, only inputs are dropped here
+        for key in [key for key in self._connection_paths if key[0] == node_id]:
+            dirty = dirty.united(self._remove_connection(key))
+        
+        return dirty
+    
+    def _update_connection(self, node, input_name):
+        key = (node.id, input_name)
+        connection = node.inputs.get(input_name)
+        
+        if not connection or connection[0].id not in self.node_graph.nodes:
+            return self._remove_connection(key)
+        
+        source_node, output_name = connection
+        start_pos = self._get_output_connector_pos(source_node, output_name)
+        end_pos = self._get_input_connector_pos(node, input_name)
+        
+        entry = self._connection_paths.get(key)
+        if entry is not None and entry[0] == start_pos and entry[1] == end_pos:
+            return QRectF()
+        
+        dirty = entry[3] if entry is not None else QRectF()
+        path = self._connection_path(start_pos, end_pos)
+        bounds = path.controlPointRect().adjusted(-2, -2, 2, 2)
+        self._connection_paths[key] = (start_pos, end_pos, path, bounds)
+        
+        index = list(node.inputs.keys()).index(input_name)
+        self.paint_index.insert(
+            ("connection",) + key,
+            bounds.left(), bounds.top(), bounds.right(), bounds.bottom(),
+            (0, self._node_order.get(node.id, 0), index)
+        )
+        return dirty.united(bounds)
+    
+    def _remove_connection(self, key):
+        entry = self._connection_paths.pop(key, None)
+        if entry is None:
+            return QRectF()
+        
+        self.paint_index.remove(("connection",) + key)
+        return entry[3]
+    
+    def _get_node_height(self, node):
+        #connector rows, then the thumbnail
+        return (
+            self.node_header_height + 20 + (max(len(node.outputs), len(node.inputs))) * 25
+            + self.thumbnail_height + 10
+        )
+    
+    def _get_thumbnail_rect(self, node):
+        x, y = node.position
+        top = y + self._get_node_height(node) - self.thumbnail_height - 10
+        return QRectF(x + 10, top, self.thumbnail_width, self.thumbnail_height)
+    
+    def _get_node_bounds(self, node):
+        #everything _draw_node paints, connectors included
+        height = self._get_node_height(node)
+        r = self.connector_radius
+        return QRectF(node.position[0] - r, node.position[1] - r, self.node_width + 2 * r, height + 2 * r)
+    
+    def to_scene(self, pos):
+        return QPointF(pos.x() / self.zoom, pos.y() / self.zoom)
+    
+    def update_scene_rect(self, rect):
+        #schedules a repaint of a scene area, nothing is drawn for an empty one
+        if rect.isEmpty():
+            return
+        
+        view_rect = QRectF(
+            rect.x() * self.zoom,
+            rect.y() * self.zoom,
+            rect.width() * self.zoom,
+            rect.height() * self.zoom
+        )
+        self.update(view_rect.toAlignedRect().adjusted(-2, -2, 2, 2))
+    
+    def update_node(self, node_id):
+        if node_id in self._node_bounds:
+            self.update_scene_rect(self._node_bounds[node_id])
+    
+    def set_zoom(self, zoom):
+        zoom = min(max(zoom, self.min_zoom), self.max_zoom)
+        if zoom != self.zoom:
+            self.zoom = zoom
+            self.update()
+    
+    def wheelEvent(self, event):
+        #plain scrolling is left to the scroll area
+        if not event.modifiers() & Qt.ControlModifier:
+            event.ignore()
+            return
+        
+        if event.angleDelta().y() > 0:
+            self.set_zoom(self.zoom * 1.25)
+        elif event.angleDelta().y() < 0:
+            self.set_zoom(self.zoom / 1.25)
 
     def paintEvent(self, event):
 
         painter = QPainter(self)
-        painter.setRenderHint(QPainter.Antialiasing)
+        self.paint(painter, QRectF(event.rect()))
+    
+    def paint(self, painter, rect):
+        #rect is in widget coordinates, only items that intersect it are drawn
+        painter.fillRect(rect, self.background_color)
+        
+        detailed = self.zoom >= self.detail_zoom
+        if detailed:
+            painter.setRenderHint(QPainter.Antialiasing)
+        
+        painter.scale(self.zoom, self.zoom)
+        scene_rect = QRectF(
+            rect.x() / self.zoom,
+            rect.y() / self.zoom,
+            rect.width() / self.zoom,
+            rect.height() / self.zoom
+        )
         
-        painter.fillRect(self.rect(), self.background_color)
+        items = self.paint_index.query_rect(
+            scene_rect.left(), scene_rect.top(), scene_rect.right(), scene_rect.bottom()
+        )
         
-        self._draw_connections(painter)
+        #connections sort before nodes
+        painter.setPen(QPen(self.connection_color, 2))
+        painter.setBrush(Qt.NoBrush)
+        nodes_started = False
+        for item in items:
+            if item[0] == "connection":
+                start_pos, end_pos, path, _ = self._connection_paths[item[1:]]
+                if detailed:
+                    painter.drawPath(path)
+                else:
+                    painter.drawLine(start_pos, end_pos)
+                continue
+            
+            #temporary connection if creating one
+            if not nodes_started:
+                nodes_started = True
+                self._draw_temp_connection_if_active(painter)
+            
+            node = self.node_graph.nodes.get(item[1])
+            if node is None:
+                continue
+            if detailed:
+                painter.drawPicture(QPointF(*node.position), self._get_node_picture(node))
+                self._draw_thumbnail(painter, node)
+            else:
+                self._draw_node_outline(painter, node)
         
-        #temporary connection if creating one
+        if not nodes_started:
+            self._draw_temp_connection_if_active(painter)
+    
+    def _draw_temp_connection_if_active(self, painter):
         if self.creating_connection and self.connection_start_node and self.connection_end_pos:
             self._draw_temp_connection(painter)
-        
-        for node_id, node in self.node_graph.nodes.items():
-            self._draw_node(painter, node)
     
+    def _get_node_picture(self, node):
+        #recorded relative to the node's position, so moving a node keeps its picture
+        hover = None
+        if self.hover_connector and self.hover_connector[0] == node.id:
+            hover = self.hover_connector
+        signature = (
+            node.name,
+            node.id == self.selected_node_id,
+            hover,
+            tuple(node.inputs.keys()),
+            tuple(node.outputs.keys()),
+        )
+        
+        cached = self._node_pictures.get(node.id)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+        
+        #the height follows the connector rows, the indexed rectangle has to follow it
+        if node.id in self._node_bounds and self._node_bounds[node.id] != self._get_node_bounds(node):
+            self.update_scene_rect(self._index_node(node))
+        
+        picture = QPicture()
+        picture_painter = QPainter(picture)
+        picture_painter.setRenderHint(QPainter.Antialiasing)
+        picture_painter.translate(-node.position[0], -node.position[1])
+        self._draw_node(picture_painter, node)
+        picture_painter.end()
+        
+        self._node_pictures[node.id] = (signature, picture)
+        return picture
     
-    def _draw_connections(self, painter):
-        painter.setPen(QPen(self.connection_color, 2))
+    def _get_thumbnail_source(self, node):
+        #only results that already exist, nothing is processed or computed lazily for this
+        image = node.processed_data.get("image")
         
+        if image is None and isinstance(node.parameters.get("preview"), np.ndarray):
+            image = node.parameters["preview"]
+        
+        if image is None:
+            for output_name in node.outputs:
+                if isinstance(node.processed_data.get(output_name), np.ndarray):
+                    image = node.processed_data[output_name]
+                    break
+        
+        if isinstance(image, np.ndarray) and image.ndim in (2, 3) and image.size:
+            return image
+        return None
+    
+    def _draw_thumbnail(self, painter, node):
+        #a result newer than the pixmap is queued, the old pixmap is shown until it is done
+        version = node.result_version
+        cached = self._thumbnails.get(node.id)
+        
+        if (cached is None or cached[0] != version) and self._thumbnail_requested.get(node.id) != version:
+            self._thumbnail_requested[node.id] = version
+            image = self._get_thumbnail_source(node)
+            if image is not None:
+                self.thumbnail_generator.request(node.id, version, image)
+        
+        if cached is None:
+            return
+        
+        pixmap = cached[1]
+        rect = self._get_thumbnail_rect(node)
+        painter.drawPixmap(
+            QPointF(
+                rect.x() + (rect.width() - pixmap.width()) / 2,
+                rect.y() + (rect.height() - pixmap.height()) / 2
+            ),
+            pixmap
+        )
+    
+    def on_thumbnail_ready(self, result):
+        node_id = result["node_id"]
+        if node_id not in self.node_graph.nodes:
+            return
+        
+        #results can arrive out of order, an older one never replaces a newer one
+        cached = self._thumbnails.get(node_id)
+        if cached is not None and cached[0] > result["version"]:
+            return
+        
+        self._thumbnails[node_id] = (result["version"], QPixmap.fromImage(result["image"]))
+        self.update_node(node_id)
+    
+    def refresh_thumbnails(self, *args):
+        #repaints nodes whose result changed, which queues their thumbnails
         for node_id, node in self.node_graph.nodes.items():
-            for input_name, connection in node.inputs.items():
-                if connection:
-                    source_node, output_name = connection
-                    
-                    #connector positions
-                    start_pos = self._get_output_connector_pos(source_node, output_name)
-                    end_pos = self._get_input_connector_pos(node, input_name)
-                    
-                    #draw bezier curve
-                    path = QPainterPath()
-                    path.moveTo(start_pos)
-                    
-                    ctrl1_x = start_pos.x() + 100
-                    ctrl1_y = start_pos.y()
-                    ctrl2_x = end_pos.x() - 100
-                    ctrl2_y = end_pos.y()
-                    
-                    path.cubicTo(
-                        QPointF(ctrl1_x, ctrl1_y),
-                        QPointF(ctrl2_x, ctrl2_y),
-                        end_pos
-                    )
-                    
-                    painter.drawPath(path)
+            if self._thumbnail_requested.get(node_id) != node.result_version:
+                self.update_node(node_id)
     
-    def _draw_temp_connection(self, painter):
-        #set pen for temporary connection
-        painter.setPen(QPen(self.connection_color, 2, Qt.DashLine))
+    def _draw_node_outline(self, painter, node):
+        #level of detail for zoomed out views, no text or connectors
+        x, y = node.position
+        height = self._get_node_height(node)
         
-        #get start position
-        start_pos = self._get_output_connector_pos(
-            self.node_graph.nodes[self.connection_start_node],
-            self.connection_start_output
-        )
+        if node.id == self.selected_node_id:
+            node_color = self.node_selected_color
+        else:
+            node_color = self.node_color
         
-        #draw bezier curve
+        painter.fillRect(QRectF(x, y, self.node_width, height), node_color)
+        painter.fillRect(QRectF(x, y, self.node_width, self.node_header_height), self.node_header_color)
+    
+    def _connection_path(self, start_pos, end_pos):
+        #bezier curve between two connectors
         path = QPainterPath()
         path.moveTo(start_pos)
         
         ctrl1_x = start_pos.x() + 100
         ctrl1_y = start_pos.y()
-        ctrl2_x = self.connection_end_pos.x() - 100
-        ctrl2_y = self.connection_end_pos.y()
+        ctrl2_x = end_pos.x() - 100
+        ctrl2_y = end_pos.y()
         
         path.cubicTo(
             QPointF(ctrl1_x, ctrl1_y),
             QPointF(ctrl2_x, ctrl2_y),
-            self.connection_end_pos
+            end_pos
+        )
+        
+        return path
+    
+    def _temp_connection_path(self):
+        start_pos = self._get_output_connector_pos(
+            self.node_graph.nodes[self.connection_start_node],
+            self.connection_start_output
         )
+        return self._connection_path(start_pos, self.connection_end_pos)
+    
+    def _draw_temp_connection(self, painter):
+        #set pen for temporary connection
+        painter.setPen(QPen(self.connection_color, 2, Qt.DashLine))
+        painter.setBrush(Qt.NoBrush)
         
-        painter.drawPath(path)
+        painter.drawPath(self._temp_connection_path())
+    
+    def _update_temp_connection(self):
+        #repaints where the dashed curve was and where it is now
+        dirty = self._temp_bounds
+        if self.creating_connection and self.connection_start_node in self.node_graph.nodes and self.connection_end_pos:
+            self._temp_bounds = self._temp_connection_path().controlPointRect().adjusted(-2, -2, 2, 2)
+        else:
+            self._temp_bounds = QRectF()
+        self.update_scene_rect(dirty.united(self._temp_bounds))
     
     def _draw_node(self, painter, node):
         x, y = node.position
@@ -142,7 +516,7 @@ class NodeCanvas(QWidget):
         node_rect = QRectF(
             x, y, 
             self.node_width, 
-            self.node_header_height + 20 + (max(len(node.outputs), len(node.inputs))) * 25
+            self._get_node_height(node)
         )
         
         painter.setPen(Qt.NoPen)
@@ -261,6 +635,11 @@ class NodeCanvas(QWidget):
             )
             
             y_offset += self.connector_spacing
+        
+        #thumbnail area, the pixmap is drawn over it once it exists
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(QBrush(self.thumbnail_background_color))
+        painter.drawRect(self._get_thumbnail_rect(node))
     
     def _get_input_connector_pos(self, node, input_name):
         x, y = node.position
@@ -287,41 +666,32 @@ class NodeCanvas(QWidget):
         return QPointF(x + self.node_width, y)
     
     def _get_node_at_pos(self, pos):
-        for node_id, node in self.node_graph.nodes.items():
-            x, y = node.position
-            node_rect = QRectF(
-                x, y, 
-                self.node_width, 
-                self.node_header_height + self.node_content_height
-            )
-            
-            if node_rect.contains(pos):
+        for node_id in self.node_index.query_point(pos.x(), pos.y()):
+            if node_id in self.node_graph.nodes:
                 return node_id
         
         return None
     
     def _get_connector_at_pos(self, pos):
-        for node_id, node in self.node_graph.nodes.items():
-            for input_name in node.inputs.keys():
-                connector_pos = self._get_input_connector_pos(node, input_name)
-                
-                #check if position is within connector radius
-                if (pos - connector_pos).manhattanLength() <= self.connector_radius:
-                    return (node_id, input_name, True)  
+        #the grid returns connectors whose bounding box holds pos, within radius is checked here
+        for node_id, connector_name, is_input in self.connector_index.query_point(pos.x(), pos.y()):
+            node = self.node_graph.nodes.get(node_id)
+            if node is None:
+                continue
             
-            #check output connectors
-            for output_name in node.outputs.keys():
-                connector_pos = self._get_output_connector_pos(node, output_name)
-                
-                #check if position is within connector radius
-                if (pos - connector_pos).manhattanLength() <= self.connector_radius:
-                    return (node_id, output_name, False)  # False for output
+            if is_input:
+                connector_pos = self._get_input_connector_pos(node, connector_name)
+            else:
+                connector_pos = self._get_output_connector_pos(node, connector_name)
+            
+            if (pos - connector_pos).manhattanLength() <= self.connector_radius:
+                return (node_id, connector_name, is_input)
         
         return None
     
     def mousePressEvent(self, event):
         if event.button() == Qt.LeftButton:
-            pos = event.pos()
+            pos = self.to_scene(event.pos())
             
             #check if clicked on a connector
             connector = self._get_connector_at_pos(pos)
@@ -331,8 +701,7 @@ class NodeCanvas(QWidget):
                 if is_input:
                     #clicked on an input connector
                     #disconnect the input
-                    node = self.node_graph.nodes[node_id]
-                    node.disconnect_input(connector_name)
+                    self.node_graph.disconnect_nodes(node_id, connector_name)
                     self.update()
                 else:
                     #clicked on an output connector
@@ -341,7 +710,7 @@ class NodeCanvas(QWidget):
                     self.connection_start_node = node_id
                     self.connection_start_output = connector_name
                     self.connection_end_pos = pos
-                    self.update()
+                    self._update_temp_connection()
             else:
                 node_id = self._get_node_at_pos(pos)
                 if node_id:
@@ -356,10 +725,15 @@ class NodeCanvas(QWidget):
                     self.select_node(None)
     
     def mouseMoveEvent(self, event):
-        pos = event.pos()
+        pos = self.to_scene(event.pos())
         
-        #update hover state
-        self.hover_connector = self._get_connector_at_pos(pos)
+        #update hover state, repainting only the nodes whose highlight changed
+        hover_connector = self._get_connector_at_pos(pos)
+        if hover_connector != self.hover_connector:
+            for connector in (self.hover_connector, hover_connector):
+                if connector:
+                    self.update_node(connector[0])
+            self.hover_connector = hover_connector
         self.hover_node_id = self._get_node_at_pos(pos)
         
         if self.dragging_node and self.selected_node_id:
@@ -370,16 +744,13 @@ class NodeCanvas(QWidget):
             new_x = self.node_start_pos[0] + delta_x
             new_y = self.node_start_pos[1] + delta_y
             
-            #udate node position
+            #udate node position, the canvas repaints the old and new area through the graph listener
             self.node_graph.nodes[self.selected_node_id].set_position(new_x, new_y)
-            
-            #update canvas
-            self.update()
         
         #handle creating connection
         if self.creating_connection:
             self.connection_end_pos = pos
-            self.update()
+            self._update_temp_connection()
         
         #update cursor
         if self.hover_connector or self.creating_connection:
@@ -399,19 +770,17 @@ class NodeCanvas(QWidget):
             # ed creating connection
             if self.creating_connection:
                 #check if released on an input connector
-                connector = self._get_connector_at_pos(event.pos())
+                connector = self._get_connector_at_pos(self.to_scene(event.pos()))
                 if connector:
                     node_id, connector_name, is_input = connector
                     
                     if is_input:
                         #connect the nodes
-                        target_node = self.node_graph.nodes[node_id]
-                        source_node = self.node_graph.nodes[self.connection_start_node]
-                        
-                        target_node.connect_input(
-                            connector_name, 
-                            source_node, 
-                            self.connection_start_output
+                        self.node_graph.connect_nodes(
+                            self.connection_start_node,
+                            self.connection_start_output,
+                            node_id,
+                            connector_name
                         )
                 
                 #reset connection state
@@ -420,18 +789,20 @@ class NodeCanvas(QWidget):
                 self.connection_start_output = None
                 self.connection_end_pos = None
                 
-                self.update()
+                self._update_temp_connection()
     
     def keyPressEvent(self, event):
         if event.key() == Qt.Key_Delete and self.selected_node_id:
             self.node_graph.remove_node(self.selected_node_id)
-            self.selected_node_id = None
+            self.select_node(None)
             self.update()
     
     def select_node(self, node_id):
         if self.selected_node_id != node_id:
+            previous_node_id = self.selected_node_id
             self.selected_node_id = node_id
             self.node_selected.emit(node_id)
-            self.update()
+            self.update_node(previous_node_id)
+            self.update_node(node_id)
 
 
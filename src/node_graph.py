@@ -1,4 +1,16 @@
-import networkx as nx
+import json
+import os
+import threading
+import time
+import numpy as np
+from concurrent.futures import Future, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from src.result_cache import ResultCache
+from src.buffer_pool import BufferPool
+from src.graph_core import DependencyGraph, CycleError
+from src.tiling import TiledExecutor, DEFAULT_TILE_SIZE
+from src.fusion import find_fused_chains
+from src.image_writer import write_image
+from src.profiler import Profiler
 from src.nodes.basic.input_node import InputNode
 from src.nodes.basic.output_node import OutputNode
 from src.nodes.basic.brightness_contrast_node import BrightnessContrastNode
@@ -8,11 +20,82 @@ from src.nodes.intermediate.blend_node import BlendNode
 from src.nodes.intermediate.threshold_node import ThresholdNode
 from src.nodes.intermediate.edge_detection_node import EdgeDetectionNode
 
+NODE_TYPES = {
+    "image_input": InputNode,
+    "output": OutputNode,
+    "brightness_contrast": BrightnessContrastNode,
+    "color_channel_splitter": ColorChannelSplitterNode,
+    "blur": BlurNode,
+    "blend": BlendNode,
+    "threshold": ThresholdNode,
+    "edge_detection": EdgeDetectionNode,
+}
+
+GRAPH_FORMAT_VERSION = 1
+
+#memory budget for cached node outputs
+DEFAULT_CACHE_BYTES = 1024**3
+
+#memory kept around for node output buffers between executions
+DEFAULT_POOL_BYTES = 512 * 1024**2
+
+#longest side of the inputs while a slider is being dragged
+DEFAULT_PROXY_SIZE = 1024
+
 class NodeGraph:
     
-    def __init__(self):
+    def __init__(self, cache_max_bytes=DEFAULT_CACHE_BYTES, max_workers=1):
         self.nodes = {} 
-        self.execution_order = []
+        self.dependencies = DependencyGraph()
+        self.result_cache = ResultCache(cache_max_bytes)
+        self.buffer_pool = BufferPool(DEFAULT_POOL_BYTES)
+        
+        #more than one worker runs independent branches concurrently
+        self.max_workers = max_workers
+        self._executor = None
+        
+        #below 1.0 every input is downscaled, see begin_interactive
+        self.proxy_scale = 1.0
+        self.interactive = False
+        
+        #runs of per-pixel nodes execute as one kernel, switch off to debug them
+        self.fusion_enabled = True
+        self._fused_chains = None
+        
+        #bumped by every evaluation, see invalidate_downstream
+        self.evaluation_epoch = 0
+        
+        #callbacks(event, node) for views that mirror the graph, e.g. the canvas hit-test index
+        self.listeners = []
+        
+        #called before every structural edit, e.g. to let a background evaluation finish
+        self.edit_guard = None
+        
+        #set only while profiling, so evaluations skip all instrumentation otherwise;
+        #the last profile stays readable after profiling is switched off
+        self.profiler = None
+        self._last_profiler = None
+    
+    def add_listener(self, callback):
+        if callback not in self.listeners:
+            self.listeners.append(callback)
+    
+    def remove_listener(self, callback):
+        if callback in self.listeners:
+            self.listeners.remove(callback)
+    
+    def set_edit_guard(self, callback):
+        self.edit_guard = callback
+    
+    def before_edit(self):
+        #nodes and connections must not change under a running evaluation
+        if self.edit_guard is not None:
+            self.edit_guard()
+    
+    def notify_listeners(self, event, node=None):
+        #events: node_added, node_removed, node_moved, connection_changed, cleared
+        for callback in list(self.listeners):
+            callback(event, node)
     
     def add_node(self, node):
         
@@ -20,8 +103,18 @@ class NodeGraph:
             print(f"Error: Node with ID {node.id} already exists")
             return False
         
+        self.before_edit()
         self.nodes[node.id] = node
-        self.update_execution_order()
+        node.graph = self
+        self.dependencies.add_node(node.id)
+        
+        #a node can arrive already wired to nodes of this graph
+        for input_name, connection in node.inputs.items():
+            if connection and not self.on_input_changed(node, input_name, connection, added=True):
+                node.inputs[input_name] = None
+        
+        self._fused_chains = None
+        self.notify_listeners("node_added", node)
         return True
     
     def remove_node(self, node_id):
@@ -30,9 +123,28 @@ class NodeGraph:
             print(f"Error: Node with ID {node_id} does not exist")
             return False
         
+        self.before_edit()
+        removed_node = self.nodes.pop(node_id)
+        removed_node.graph = None
+        
+        #consumers of the removed node lose that input
+        consumers = []
+        for consumer_id in self.downstream.get(node_id, ()):
+            consumer = self.nodes.get(consumer_id)
+            if consumer is None:
+                continue
+            for input_name, connection in consumer.inputs.items():
+                if connection and connection[0] is removed_node:
+                    consumer.inputs[input_name] = None
+            self.invalidate_downstream(consumer_id)
+            consumers.append(consumer)
         
-        del self.nodes[node_id]
-        self.update_execution_order()
+        self.dependencies.remove_node(node_id)
+        self._fused_chains = None
+        
+        self.notify_listeners("node_removed", removed_node)
+        for consumer in consumers:
+            self.notify_listeners("connection_changed", consumer)
         return True
     
     def connect_nodes(self, source_node_id, output_name, target_node_id, input_name):
@@ -49,12 +161,7 @@ class NodeGraph:
         target_node = self.nodes[target_node_id]
         
         
-        success = target_node.connect_input(input_name, source_node, output_name)
-        
-        if success:
-            self.update_execution_order()
-        
-        return success
+        return target_node.connect_input(input_name, source_node, output_name)
     
     def disconnect_nodes(self, target_node_id, input_name):
        
@@ -62,87 +169,512 @@ class NodeGraph:
             print(f"Error: Target node with ID {target_node_id} does not exist")
             return False
         
-        target_node = self.nodes[target_node_id]
-        success = target_node.disconnect_input(input_name)
+        return self.nodes[target_node_id].disconnect_input(input_name)
+    
+    @property
+    def execution_order(self):
+        return self.dependencies.order
+    
+    @property
+    def downstream(self):
+        return self.dependencies.successors
+    
+    def on_input_changed(self, node, input_name, connection, added=False):
+        #every connect and disconnect goes through here so the order stays current
+        self.before_edit()
+        previous = None if added else node.inputs.get(input_name)
         
-        if success:
-            self.update_execution_order()
+        if connection:
+            source_node = connection[0]
+            if self.nodes.get(source_node.id) is not source_node:
+                print(f"Error: Node {source_node.name} is not part of this graph")
+                return False
+            
+            try:
+                self.dependencies.add_edge(source_node.id, node.id)
+            except CycleError:
+                print(f"Error: Connecting {source_node.name} to {node.name} would create a cycle")
+                return False
         
-        return success
+        if previous:
+            self.dependencies.remove_edge(previous[0].id, node.id)
+        
+        node.inputs[input_name] = connection
+        self._fused_chains = None
+        self.invalidate_downstream(node.id)
+        
+        if not added:
+            self.notify_listeners("connection_changed", node)
+        return True
     
-    def update_execution_order(self):
-        try:
-            graph = nx.DiGraph()
-            
-            for node_id in self.nodes:
-                graph.add_node(node_id)
-            
-            for node_id, node in self.nodes.items():
-                for input_name, connection in node.inputs.items():
-                    if connection:
-                        source_node, _ = connection
-                        graph.add_edge(source_node.id, node_id)
+    def invalidate_downstream(self, node_id):
+        #mark the node and its transitive consumers stale, touching nothing else.
+        #A consumer marked by an earlier walk with nothing evaluated since still has
+        #all of its own consumers stale, so the walk stops there; without that,
+        #connecting a graph edge by edge would walk it quadratically often
+        epoch = self.evaluation_epoch
+        stale_ids = set()
+        pending = [node_id]
+        
+        while pending:
+            current_id = pending.pop()
+            if current_id in stale_ids:
+                continue
+            stale_ids.add(current_id)
             
-            self.execution_order = list(nx.topological_sort(graph))
-            return True
+            node = self.nodes.get(current_id)
+            if node is None:
+                continue
+            if current_id != node_id and node.dirty and node._stale_epoch == epoch:
+                continue
             
-        except nx.NetworkXUnfeasible:
+            node.mark_stale()
+            node._stale_epoch = epoch
+            pending.extend(self.downstream.get(current_id, ()))
+        
+        return stale_ids
+    
+    def update_execution_order(self):
+        #full re-sort, only needed after editing node.inputs directly
+        edges = []
+        for node_id, node in self.nodes.items():
+            for connection in node.inputs.values():
+                if connection and connection[0].id in self.nodes:
+                    edges.append((connection[0].id, node_id))
+        
+        try:
+            self.dependencies.rebuild(edges)
+        except CycleError:
             print("Error: Graph contains a cycle")
-            self.execution_order = []
             return False
+        
+        self._fused_chains = None
+        return True
     
-    
-    def execute(self, output_node_id=None):
+    def execute(self, output_node_id=None, should_cancel=None):
+        #should_cancel is polled between nodes; a cancelled run returns False
         
         if not self.execution_order:
-            self.update_execution_order()
-            
-            if not self.execution_order:
-                print("Error: Failed to determine execution order")
-                return False
+            print("Error: Failed to determine execution order")
+            return False
         
         if output_node_id:
             if output_node_id not in self.nodes:
                 print(f"Error: Output node with ID {output_node_id} does not exist")
                 return False
             
-            return self.nodes[output_node_id].process()
+            upstream_ids = self.get_upstream(output_node_id)
+            node_ids = [node_id for node_id in self.execution_order if node_id in upstream_ids]
+        else:
+            node_ids = self.execution_order
+        
+        return self._execute_nodes(node_ids, should_cancel)
+    
+    def _execute_nodes(self, node_ids, should_cancel=None):
+        profiler = self.profiler
+        start = profiler.start() if profiler is not None else None
+        
+        #fused chains and tiles produce results without Node.evaluate
+        self.evaluation_epoch += 1
+        self.refresh_sources()
+        
+        if self.max_workers > 1:
+            success = self._execute_parallel(node_ids, should_cancel)
         else:
-            success = True
-            for node_id in self.execution_order:
-                if not self.nodes[node_id].process():
+            success = self._execute_serial(node_ids, should_cancel)
+        
+        if profiler is not None:
+            profiler.record("execute", "execute", start, success, args={"nodes": len(node_ids)})
+        return success
+    
+    def refresh_sources(self):
+        #input files edited on disk make their nodes and everything downstream stale
+        for node in self.nodes.values():
+            if isinstance(node, InputNode) and not node.dirty and node.source_changed():
+                node.invalidate()
+    
+    def _execute_serial(self, node_ids, should_cancel=None):
+        fused_chains = self.get_fused_chains() if self.fusion_enabled else {}
+        selected_ids = set(node_ids)
+        
+        #only stale nodes run, so an edit costs the size of its downstream set
+        success = True
+        for node_id in node_ids:
+            if should_cancel is not None and should_cancel():
+                return False
+            
+            node = self.nodes[node_id]
+            
+            chain = fused_chains.get(node_id)
+            if chain is not None and chain.output_node.id in selected_ids:
+                #the whole chain runs once, when its output node comes up
+                if chain.output_node is node and node.dirty and not chain.run():
                     success = False
+                continue
+            
+            if node.dirty and not node.evaluate():
+                success = False
+        
+        return success
+    
+    def _execute_parallel(self, node_ids, should_cancel=None):
+        #nodes are submitted as soon as all of their stale inputs have finished
+        stale_ids = [node_id for node_id in node_ids if self.nodes[node_id].dirty]
+        stale_set = set(stale_ids)
+        
+        waiting_on = {}
+        for node_id in stale_ids:
+            sources = set()
+            for connection in self.nodes[node_id].inputs.values():
+                if connection and connection[0].id in stale_set:
+                    sources.add(connection[0].id)
+            waiting_on[node_id] = len(sources)
+        
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="node-graph"
+            )
+        
+        running = {}
+        for node_id in stale_ids:
+            if waiting_on[node_id] == 0:
+                running[self._executor.submit(self.nodes[node_id].evaluate)] = node_id
+        
+        success = True
+        failed = set()
+        cancelled = False
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            
+            #nodes already running finish, nothing new is started
+            if not cancelled and should_cancel is not None and should_cancel():
+                cancelled = True
+                success = False
+            
+            for future in done:
+                node_id = running.pop(future)
+                
+                try:
+                    node_success = future.result()
+                except Exception as e:
+                    print(f"Error executing node {self.nodes[node_id].name}: {str(e)}")
+                    node_success = False
+                
+                if not node_success:
+                    success = False
+                    #consumers of a failed node would only retry it concurrently
+                    failed.update(self.get_downstream(node_id))
+                    continue
+                
+                for consumer_id in self.downstream.get(node_id, ()):
+                    if cancelled or consumer_id not in waiting_on or consumer_id in failed:
+                        continue
+                    
+                    waiting_on[consumer_id] -= 1
+                    if waiting_on[consumer_id] == 0:
+                        future = self._executor.submit(self.nodes[consumer_id].evaluate)
+                        running[future] = consumer_id
+        
+        return success
+    
+    def execute_tiled(self, output_node_id=None, tile_size=DEFAULT_TILE_SIZE):
+        #intermediate results only ever exist one tile at a time
+        if output_node_id:
+            if output_node_id not in self.nodes:
+                print(f"Error: Output node with ID {output_node_id} does not exist")
+                return False
+            output_node_ids = [output_node_id]
+        else:
+            output_node_ids = [node_id for node_id, node in self.nodes.items()
+                               if node.__class__.__name__ == "OutputNode"]
+        
+        profiler = self.profiler
+        start = profiler.start() if profiler is not None else None
+        
+        #fused chains and tiles produce results without Node.evaluate
+        self.evaluation_epoch += 1
+        self.refresh_sources()
+        
+        executor = TiledExecutor(self, tile_size)
+        success = True
+        for node_id in output_node_ids:
+            if not executor.run(node_id):
+                success = False
+        
+        if profiler is not None:
+            profiler.record("execute", "execute_tiled", start, success, args={"tile_size": tile_size})
+        return success
+    
+    def save_all_outputs(self, output_dir=None, progress=None, max_workers=None, blocking=True):
+        #runs everything upstream of the Output nodes once, then encodes and writes
+        #all of them concurrently. Output nodes without a path are saved into
+        #output_dir. Returns the report, or a future of it when blocking is False;
+        #progress(completed, total, entry) is called as each file finishes
+        start = time.perf_counter()
+        output_nodes = [node for node in self.nodes.values()
+                        if node.__class__.__name__ == "OutputNode"]
+        
+        #a proxy preview is never written to disk
+        self.end_interactive()
+        
+        upstream_ids = set()
+        for node in output_nodes:
+            upstream_ids |= self.get_upstream(node.id)
+        self._execute_nodes([node_id for node_id in self.execution_order if node_id in upstream_ids])
+        
+        report = {
+            "total": len(output_nodes),
+            "succeeded": 0,
+            "failed": [],
+            "files": [],
+            "execute_seconds": time.perf_counter() - start,
+            "elapsed": 0.0,
+        }
+        result = Future()
+        lock = threading.Lock()
+        
+        def finish(entry):
+            with lock:
+                report["files"].append(entry)
+                if entry["success"]:
+                    report["succeeded"] += 1
+                else:
+                    report["failed"].append({"file": entry["file"], "error": entry["error"]})
+                completed = len(report["files"])
+            
+            if progress:
+                progress(completed, report["total"], entry)
+            
+            if completed == report["total"]:
+                report["elapsed"] = time.perf_counter() - start
+                result.set_result(report)
+        
+        def write(entry, job):
+            write_start = time.perf_counter()
+            entry["success"] = write_image(*job)
+            entry["seconds"] = time.perf_counter() - write_start
+            if not entry["success"]:
+                entry["error"] = "Failed to write image"
+            finish(entry)
+        
+        jobs = []
+        for node in output_nodes:
+            #the default path is only used for this save, the node keeps its own
+            file_path = node.parameters["file_path_save"]
+            if not file_path and output_dir:
+                file_path = os.path.join(output_dir, node.default_file_name())
+            
+            entry = {
+                "node_id": node.id,
+                "name": node.name,
+                "file": file_path,
+                "success": False,
+                "seconds": 0.0,
+                "error": None,
+            }
+            
+            #a stale node upstream means its branch failed, never save an old result
+            if any(self.is_stale(node_id) for node_id in self.get_upstream(node.id)):
+                entry["error"] = "Processing failed"
+                jobs.append((entry, None))
+                continue
+            
+            job = node.prepare_save(file_path)
+            if job is None:
+                entry["error"] = "No file path specified" if not entry["file"] else "Failed to prepare image"
+            jobs.append((entry, job))
+        
+        if not jobs:
+            report["elapsed"] = time.perf_counter() - start
+            result.set_result(report)
+        
+        writes = [(entry, job) for entry, job in jobs if job is not None]
+        for entry, job in jobs:
+            if job is None:
+                finish(entry)
+        
+        if writes:
+            #encoders release the GIL, so threads write in parallel
+            executor = ThreadPoolExecutor(
+                max_workers=max_workers or min(len(writes), os.cpu_count() or 1),
+                thread_name_prefix="save-all"
+            )
+            for entry, job in writes:
+                executor.submit(write, entry, job)
+            executor.shutdown(wait=False)
+        
+        return result.result() if blocking else result
+    
+    def is_fused_intermediate(self, node):
+        #members before the last node of a fused chain get no result of their own
+        if not self.fusion_enabled:
+            return False
+        chain = self.get_fused_chains().get(node.id)
+        return chain is not None and chain.output_node is not node
+    
+    def is_stale(self, node_id):
+        #a fused intermediate is up to date whenever its chain's result is
+        node = self.nodes[node_id]
+        if not node.dirty:
+            return False
+        if self.is_fused_intermediate(node):
+            return self.get_fused_chains()[node_id].output_node.dirty
+        return True
+    
+    def fill_fused_intermediates(self, should_cancel=None):
+        #evaluates the chain members a fused run skipped, for views that show every node;
+        #returns whether any of them got a result
+        if not self.fusion_enabled:
+            return False
+        
+        filled = False
+        for node_id in self.execution_order:
+            if should_cancel is not None and should_cancel():
+                return filled
+            
+            node = self.nodes[node_id]
+            if node.dirty and self.is_fused_intermediate(node) and not self.is_stale(node_id):
+                filled = node.evaluate() or filled
+        
+        return filled
+    
+    def get_fused_chains(self):
+        if self._fused_chains is None:
+            self._fused_chains = find_fused_chains(self)
+        return self._fused_chains
+    
+    def set_fusion_enabled(self, enabled):
+        self.fusion_enabled = enabled
+        self._fused_chains = None
+    
+    def set_proxy_scale(self, scale):
+        scale = min(1.0, scale)
+        if scale <= 0.0 or scale == self.proxy_scale:
+            return
+        
+        self.proxy_scale = scale
+        
+        #full and proxy results have different cache keys, so switching back is cheap
+        for node_id, node in self.nodes.items():
+            if isinstance(node, InputNode):
+                self.invalidate_downstream(node_id)
+    
+    def set_interactive(self, interactive):
+        if interactive == self.interactive:
+            return
+        
+        self.interactive = interactive
+        
+        #inputs with a fixed proxy size switch between it and the full file
+        for node_id, node in self.nodes.items():
+            if isinstance(node, InputNode) and node.fixed_reduction() > 1:
+                self.invalidate_downstream(node_id)
+    
+    def begin_interactive(self, max_size=DEFAULT_PROXY_SIZE):
+        #run on proxies no larger than max_size until end_interactive
+        self.set_interactive(True)
+        largest = 0
+        for node in self.nodes.values():
+            #inputs with a fixed proxy size do not depend on the others
+            if isinstance(node, InputNode) and node.parameters["file_path"] and node.fixed_reduction() == 1:
+                size = node.image_size()
+                if size is not None:
+                    largest = max(largest, max(size))
+        
+        if largest > max_size:
+            self.set_proxy_scale(max_size / largest)
+    
+    def end_interactive(self):
+        self.set_interactive(False)
+        self.set_proxy_scale(1.0)
+    
+    def get_upstream(self, node_id):
+        upstream_ids = set()
+        pending = [node_id]
+        
+        while pending:
+            current_id = pending.pop()
+            if current_id in upstream_ids or current_id not in self.nodes:
+                continue
+            upstream_ids.add(current_id)
             
-            return success
+            for connection in self.nodes[current_id].inputs.values():
+                if connection:
+                    pending.append(connection[0].id)
+        
+        return upstream_ids
+    
+    def get_downstream(self, node_id):
+        downstream_ids = set()
+        pending = [node_id]
+        
+        while pending:
+            current_id = pending.pop()
+            if current_id in downstream_ids:
+                continue
+            downstream_ids.add(current_id)
+            pending.extend(self.downstream.get(current_id, ()))
+        
+        return downstream_ids
+    
+    def set_max_workers(self, max_workers):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        self.max_workers = max(1, int(max_workers))
     
     def clear(self):
 
+        self.before_edit()
+        for node in self.nodes.values():
+            node.graph = None
         self.nodes = {}
-        self.execution_order = []
+        self.dependencies.clear()
+        self.result_cache.clear()
+        self.buffer_pool.clear()
+        self.notify_listeners("cleared")
+    
+    def set_cache_budget(self, max_bytes):
+        self.result_cache.set_max_bytes(max_bytes)
+    
+    def cache_stats(self):
+        return self.result_cache.stats()
+    
+    def set_profiling_enabled(self, enabled):
+        #a new profile starts every time profiling is switched on
+        if enabled:
+            self.profiler = Profiler()
+            self._last_profiler = self.profiler
+        else:
+            self.profiler = None
+    
+    def profile_report(self):
+        #per-node wall and CPU time, output bytes, input shapes and cache hits
+        profiler = self.profiler or self._last_profiler
+        if profiler is None:
+            print("Error: Profiling has not been enabled")
+            return None
+        return profiler.report()
+    
+    def export_chrome_trace(self, file_path):
+        profiler = self.profiler or self._last_profiler
+        if profiler is None:
+            print("Error: Profiling has not been enabled")
+            return False
+        return profiler.export_chrome_trace(file_path)
+    
+    def buffer_stats(self):
+        return self.buffer_pool.stats()
     
-    def create_node(self, node_type):
+    def create_node(self, node_type, id=None):
         
         try:
-            if node_type == "image_input":
-                node = InputNode()
-            elif node_type == "output":
-                node = OutputNode()
-            elif node_type == "brightness_contrast":
-                node = BrightnessContrastNode()
-            elif node_type == "color_channel_splitter":
-                node = ColorChannelSplitterNode()
-            elif node_type == "blur":
-                node = BlurNode()
-            elif node_type == "blend":
-                node = BlendNode()
-            elif node_type == "threshold":
-                node = ThresholdNode()
-            elif node_type == "edge_detection":
-                node = EdgeDetectionNode()
-            else:
+            if node_type not in NODE_TYPES:
                 print(f"Error: Unknown node type: {node_type}")
                 return None
             
+            node = NODE_TYPES[node_type](id=id)
+            
             self.add_node(node)
             
             return node
@@ -150,3 +682,96 @@ class NodeGraph:
         except Exception as e:
             print(f"Error creating node: {str(e)}")
             return None
+    
+    def to_dict(self):
+        
+        nodes = []
+        connections = []
+        
+        for node_id in self.execution_order or list(self.nodes):
+            node = self.nodes[node_id]
+            
+            #previews and other arrays are results, not settings
+            parameters = {
+                name: value for name, value in node.parameters.items()
+                if not isinstance(value, np.ndarray)
+            }
+            
+            nodes.append({
+                "id": node.id,
+                "type": get_node_type(node),
+                "name": node.name,
+                "position": list(node.position),
+                "parameters": parameters,
+            })
+            
+            for input_name, connection in node.inputs.items():
+                if connection:
+                    source_node, output_name = connection
+                    connections.append({
+                        "source": source_node.id,
+                        "output": output_name,
+                        "target": node.id,
+                        "input": input_name,
+                    })
+        
+        return {
+            "version": GRAPH_FORMAT_VERSION,
+            "nodes": nodes,
+            "connections": connections,
+        }
+    
+    def load_dict(self, data):
+        
+        self.clear()
+        
+        for node_data in data.get("nodes", []):
+            node = self.create_node(node_data["type"], id=node_data.get("id"))
+            if node is None:
+                return False
+            
+            node.name = node_data.get("name", node.name)
+            node.set_position(*node_data.get("position", (0, 0)))
+            
+            for name, value in node_data.get("parameters", {}).items():
+                if name in node.parameters:
+                    node.parameters[name] = value
+        
+        for connection in data.get("connections", []):
+            if not self.connect_nodes(
+                connection["source"],
+                connection["output"],
+                connection["target"],
+                connection["input"]
+            ):
+                return False
+        
+        return True
+    
+    def save(self, file_path):
+        
+        try:
+            with open(file_path, "w") as f:
+                json.dump(self.to_dict(), f, indent=2)
+            return True
+        except Exception as e:
+            print(f"Error saving graph: {str(e)}")
+            return False
+    
+    def load(self, file_path):
+        
+        try:
+            with open(file_path) as f:
+                data = json.load(f)
+        except Exception as e:
+            print(f"Error loading graph: {str(e)}")
+            return False
+        
+        return self.load_dict(data)
+
+
+def get_node_type(node):
+    for node_type, node_class in NODE_TYPES.items():
+        if type(node) is node_class:
+            return node_type
+    return None
@@ -1,8 +1,43 @@
 import cv2
 import numpy as np
+from functools import lru_cache
 from src.node import Node
 
+
+def adjust_float(image, brightness, contrast):
+    result = image.copy()
+    
+    if brightness != 0:
+        if result.dtype != np.float32:
+            result = result.astype(np.float32)
+        
+        brightness_factor = brightness / 100.0 * 255.0
+        
+        #applied to every channel, cv2.add would only offset the first one on older OpenCV
+        result += np.float32(brightness_factor)
+    
+    if contrast != 1.0:
+        if result.dtype != np.float32:
+            result = result.astype(np.float32)
+        
+        result = (result - 128.0) * contrast + 128.0
+    
+    if image.dtype == np.uint8:
+        return np.clip(result, 0, 255).astype(np.uint8)
+    return np.clip(result, 0, 1.0).astype(image.dtype)
+
+
+@lru_cache(maxsize=256)
+def build_lut(brightness, contrast):
+    #the float path evaluated once per possible 8-bit value
+    lut = adjust_float(np.arange(256, dtype=np.uint8), brightness, contrast)
+    lut.flags.writeable = False
+    return lut
+
+
 class BrightnessContrastNode(Node):
+
+    pointwise = True
     
     def __init__(self, name="Brightness/Contrast", id=None):
         super().__init__(name, id)
@@ -20,6 +55,16 @@ class BrightnessContrastNode(Node):
             "contrast": 1.0,    
         }
     
+    def tile_halo(self):
+        return 0
+    
+    def pointwise_stages(self, channels, dtype):
+        if dtype != np.uint8:
+            return None
+        
+        lut = build_lut(self.parameters["brightness"], self.parameters["contrast"])
+        return [("lut", lut)], channels
+    
     def process(self):
         input_image = self.get_input_data("image")
         
@@ -28,29 +73,17 @@ class BrightnessContrastNode(Node):
             return False
         
         try:
-            result = input_image.copy()
-            
             brightness = self.parameters["brightness"]  
             contrast = self.parameters["contrast"]      
             
-            if brightness != 0:
-                if result.dtype != np.float32:
-                    result = result.astype(np.float32)
-                
-                brightness_factor = brightness / 100.0 * 255.0
-                
-                result = cv2.add(result, brightness_factor)
-            
-            if contrast != 1.0:
-                if result.dtype != np.float32:
-                    result = result.astype(np.float32)
-                
-                result = (result - 128.0) * contrast + 128.0
-            
+            #on 8-bit data the whole adjustment is a 256 entry mapping
             if input_image.dtype == np.uint8:
-                result = np.clip(result, 0, 255).astype(np.uint8)
+                result = cv2.LUT(
+                    input_image, build_lut(brightness, contrast),
+                    dst=self.request_buffer(input_image.shape)
+                )
             else:
-                result = np.clip(result, 0, 1.0).astype(input_image.dtype)
+                result = adjust_float(input_image, brightness, contrast)
             
             self.processed_data["image"] = result
             
@@ -64,8 +97,8 @@ class BrightnessContrastNode(Node):
     
     def reset_brightness(self):
         self.parameters["brightness"] = 0
-        self.dirty = True
+        self.invalidate()
     
     def reset_contrast(self):
         self.parameters["contrast"] = 1.0
-        self.dirty = True
+        self.invalidate()
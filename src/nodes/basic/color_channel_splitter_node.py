@@ -1,7 +1,21 @@
-import cv2
-import numpy as np
+from functools import partial
 from src.node import Node
 
+#images are RGB(A) once loaded
+CHANNEL_INDEX = {
+    "red": 0,
+    "green": 1,
+    "blue": 2,
+    "alpha": 3,
+}
+
+#channel shown by each tinted output
+TINT_INDEX = {
+    "grayscale_r": 0,
+    "grayscale_g": 1,
+    "grayscale_b": 2,
+}
+
 class ColorChannelSplitterNode(Node):    
     def __init__(self, name="Color Channel Splitter", id=None):
         
@@ -27,10 +41,56 @@ class ColorChannelSplitterNode(Node):
         self.parameters = {
             "output_grayscale": True,  
         }
+        
+        #nothing is split until a consumer or preview asks for an output
+        self.lazy_outputs = {}
+        for output_name in CHANNEL_INDEX:
+            self.lazy_outputs[output_name] = partial(self.get_channel, output_name)
+        for output_name in ("grayscale_r", "grayscale_g", "grayscale_b", "grayscale_a"):
+            self.lazy_outputs[output_name] = partial(self.get_tinted_channel, output_name)
+    
+    def tile_halo(self):
+        return 0
+    
+    def get_channel(self, output_name):
+        input_image = self.output_state.get("input")
+        if input_image is None:
+            return None
+        
+        index = CHANNEL_INDEX[output_name]
+        if index >= input_image.shape[2]:
+            return None
+        
+        #a strided view into the upstream image, nothing is copied
+        channel = input_image[:, :, index]
+        channel.flags.writeable = False
+        return channel
+    
+    def get_tinted_channel(self, output_name):
+        input_image = self.output_state.get("input")
+        if input_image is None or not self.parameters["output_grayscale"]:
+            return None
+        
+        channels = input_image.shape[2]
+        tinted = self.request_buffer(input_image.shape, input_image.dtype)
+        tinted.fill(0)
+        
+        if output_name == "grayscale_a":
+            if channels != 4:
+                return None
+            tinted[:, :, :3] = input_image[:, :, 3:4]
+        else:
+            index = TINT_INDEX[output_name]
+            tinted[:, :, index] = input_image[:, :, index]
+        
+        if channels == 4:
+            tinted[:, :, 3] = 255
+        
+        return tinted
     
     def process(self):
         """
-        Split the input image into separate color channels.
+        Check the input image; channels are split out when an output is requested.
         
         Returns:
             bool: True if processing was successful, False otherwise
@@ -42,78 +102,19 @@ class ColorChannelSplitterNode(Node):
             print("Error: No input image connected")
             return False
         
-        try:
-            
-            if len(input_image.shape) < 3:
-                print("Error: Input image must have color channels")
-                return False
-            
-            height, width, channels = input_image.shape
-            
-            if channels == 3:  # RGB
-                b, g, r = cv2.split(input_image)
-                
-                self.processed_data["red"] = r
-                self.processed_data["green"] = g
-                self.processed_data["blue"] = b
-                self.processed_data["alpha"] = None
-                
-                if self.parameters["output_grayscale"]:
-                    grayscale_r = np.zeros_like(input_image)
-                    grayscale_r[:,:,0] = r
-                    
-                    grayscale_g = np.zeros_like(input_image)
-                    grayscale_g[:,:,1] = g
-                    
-                    grayscale_b = np.zeros_like(input_image)
-                    grayscale_b[:,:,2] = b
-                    
-                    self.processed_data["grayscale_r"] = grayscale_r
-                    self.processed_data["grayscale_g"] = grayscale_g
-                    self.processed_data["grayscale_b"] = grayscale_b
-                    self.processed_data["grayscale_a"] = None
-                
-            elif channels == 4:  # RGBA
-                b, g, r, a = cv2.split(input_image)
-                
-                self.processed_data["red"] = r
-                self.processed_data["green"] = g
-                self.processed_data["blue"] = b
-                self.processed_data["alpha"] = a
-                
-                if self.parameters["output_grayscale"]:
-                    grayscale_r = np.zeros_like(input_image)
-                    grayscale_r[:,:,0] = r
-                    grayscale_r[:,:,3] = 255  
-                    
-                    grayscale_g = np.zeros_like(input_image)
-                    grayscale_g[:,:,1] = g
-                    grayscale_g[:,:,3] = 255  
-                    
-                    grayscale_b = np.zeros_like(input_image)
-                    grayscale_b[:,:,2] = b
-                    grayscale_b[:,:,3] = 255 
-                    
-                    grayscale_a = np.zeros_like(input_image)
-                    grayscale_a[:,:,0] = a  
-                    grayscale_a[:,:,1] = a  
-                    grayscale_a[:,:,2] = a 
-                    grayscale_a[:,:,3] = 255  
-                    
-                    self.processed_data["grayscale_r"] = grayscale_r
-                    self.processed_data["grayscale_g"] = grayscale_g
-                    self.processed_data["grayscale_b"] = grayscale_b
-                    self.processed_data["grayscale_a"] = grayscale_a
-            
-            else:
-                print(f"Error: Unsupported number of channels: {channels}")
-                return False
-            
-           
-            self.dirty = False
-            
-            return True
-            
-        except Exception as e:
-            print(f"Error processing image: {str(e)}")
+        if len(input_image.shape) < 3:
+            print("Error: Input image must have color channels")
+            return False
+        
+        channels = input_image.shape[2]
+        if channels not in (3, 4):
+            print(f"Error: Unsupported number of channels: {channels}")
             return False
+        
+        self.output_state = {
+            "input": input_image
+        }
+        
+        self.dirty = False
+        
+        return True
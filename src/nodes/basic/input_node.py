@@ -1,7 +1,18 @@
 import os
 import cv2
-import numpy as np
 from src.node import Node
+from src.decode_cache import decode_image, file_signature, read_jpeg_header, reduced_size, reduced_source_size
+from src.raw_image import is_mapped_image, open_mapped_image
+
+#fixed proxy sizes as fractions of the file's size; "auto" follows the graph's proxy scale.
+#Full resolution runs and saves always decode the whole file
+DECODE_REDUCTIONS = {
+    "auto": 1,
+    "full": 1,
+    "1/2": 2,
+    "1/4": 4,
+    "1/8": 8,
+}
 
 class InputNode(Node):
 
@@ -18,6 +29,7 @@ class InputNode(Node):
         self.parameters = {
             "file_path": "", 
             "preserve_alpha": True,  
+            "decode_scale": "auto",
         }
         
         #initialize processed data
@@ -25,45 +37,227 @@ class InputNode(Node):
             "image": None,
             "metadata": None
         }
+        
+        #(file signature, decode flags, reduction, image) of the last decode, kept so
+        #proxy edits and images larger than the decode cache do not decode again
+        self._decoded = None
+        
+        #signature of the file the current result was made from
+        self._source_signature = None
+        
+        #in-memory frame that replaces the file while streaming video
+        self._frame = None
     
 
-    def process(self):
+    def cache_key(self):
+        #streamed frames are never revisited, so neither they nor anything downstream is cached
+        if self._frame is not None:
+            return None
+        if not os.path.exists(self.parameters["file_path"]):
+            return None
+        return super().cache_key()
+
+    def set_frame(self, image):
+        #feeds an RGB(A) or grayscale frame instead of the file; only this node and
+        #its downstream nodes run again, other branches keep their results
+        self._frame = image
+        self.invalidate()
+
+    def clear_frame(self):
+        if self._frame is not None:
+            self._frame = None
+            self.invalidate()
+
+    def file_signature(self):
+        #a file edited on disk must not be served from the cache
+        return file_signature(self.parameters["file_path"])
+
+    def cache_key_extra(self):
+        #everything downstream inherits the proxy scale through this key
+        self._source_signature = self.file_signature()
+        return self._source_signature + (self.decode_plan()[1],)
+
+    def decode_flags(self):
+        if self.parameters["preserve_alpha"]:
+            return cv2.IMREAD_UNCHANGED
+        return cv2.IMREAD_COLOR
+
+    def source_changed(self):
+        #true when the file on disk differs from the one the current result came from
+        if self._source_signature is None or self._frame is not None:
+            return False
+        try:
+            return self._source_signature != self.file_signature()
+        except OSError:
+            return True
 
+    def decode_plan(self):
+        #(reduction to decode at, scale of the result relative to the file)
+        decode_scale = self.parameters["decode_scale"]
+        scale = self.proxy_scale()
+        
+        #a fixed fraction replaces the automatic proxy size, it never applies at full resolution
+        fixed_reduction = self.fixed_reduction()
+        interactive = self.graph is not None and self.graph.interactive
+        if fixed_reduction > 1 and (interactive or scale < 1):
+            scale = 1 / fixed_reduction
+        
+        #frames and memory mapped files are used whole and resized by the caller
+        if self._frame is not None or self.is_mapped():
+            return 1, scale
+        
+        #a smaller decode is only used when it is still at least as large as the result
+        reduction = 1
+        if decode_scale != "full":
+            for candidate in (8, 4, 2):
+                if 1 / candidate >= scale:
+                    reduction = candidate
+                    break
+        
+        return reduction, scale
+
+    def fixed_reduction(self):
+        return DECODE_REDUCTIONS.get(self.parameters["decode_scale"], 1)
+
+    def source_scale(self):
+        return self.decode_plan()[1]
+
+    def decode(self, reduction=1):
         file_path = self.parameters["file_path"]
         
         if not file_path or not os.path.exists(file_path):
             print(f"Error: File not found: {file_path}")
-            return False
+            return None
+        
+        signature = self.file_signature()
+        flags = self.decode_flags()
+        if self._decoded is not None and self._decoded[:3] == (signature, flags, reduction):
+            return self._decoded[3]
+        
+        if self.is_mapped():
+            image = self.open_mapped(reduction)
+        else:
+            #decoded images are shared with every other node reading the same file
+            image = decode_image(file_path, flags, reduction)
+        if image is None:
+            return None
+        
+        self._decoded = (signature, flags, reduction, image)
+        self._source_signature = signature
+        return image
+
+    def is_mapped(self):
+        return is_mapped_image(self.parameters["file_path"])
+
+    def open_mapped(self, reduction=1):
+        #.npy and raw frames hold RGB(A) pixels already, they are mapped rather than
+        #decoded, so only the pages a consumer reads are loaded
+        image = open_mapped_image(self.parameters["file_path"])
+        if image is None:
+            return None
+        
+        if not self.parameters["preserve_alpha"] and image.ndim == 3 and image.shape[2] == 4:
+            image = image[:, :, :3]
+        
+        if reduction != 1:
+            height, width = image.shape[:2]
+            image = cv2.resize(image, reduced_size(width, height, reduction), interpolation=cv2.INTER_AREA)
+        
+        return image
+
+    def image_size(self):
+        #(width, height) of the file, JPEGs are not decoded for this
+        if self._frame is not None:
+            return (self._frame.shape[1], self._frame.shape[0])
+        
+        header = read_jpeg_header(self.parameters["file_path"])
+        if header is not None:
+            return header[:2]
+        
+        image = self.decode()
+        if image is None:
+            return None
+        return (image.shape[1], image.shape[0])
+
+    def source_size(self, image, reduction):
+        #(width, height) of the file a decode at 1/reduction came from
+        height, width = image.shape[:2]
+        if reduction == 1:
+            return (width, height)
+        
+        header = read_jpeg_header(self.parameters["file_path"])
+        if header is None:
+            #formats without reduced decoding were resized from a full decode that recorded the size
+            size = reduced_source_size(self.parameters["file_path"], self.decode_flags(), reduction)
+            if size is not None:
+                return size
+            full_image = decode_image(self.parameters["file_path"], self.decode_flags())
+            return (full_image.shape[1], full_image.shape[0])
+        
+        #an EXIF rotation swaps the decoded image against the header
+        file_width, file_height = header[:2]
+        if reduced_size(file_width, file_height, reduction) != (width, height):
+            file_width, file_height = file_height, file_width
+        return (file_width, file_height)
+
+    def build_metadata(self, width, height, scale=1.0):
+        file_path = self.parameters["file_path"]
+        
+        file_size = os.path.getsize(file_path)
+        file_extension = os.path.splitext(file_path)[1].lower()
+        
+        return {
+            "width": str(width) + " px",
+            "height": str(height) + " px",
+            "file_size": str(round(file_size/1024**2, 2)) + " MB" ,
+            "file_format": file_extension[1:],
+            #size of the output image relative to the file
+            "scale": str(round(scale, 4)),
+        }
+
+    def build_frame_metadata(self, width, height, scale=1.0):
+        return {
+            "width": str(width) + " px",
+            "height": str(height) + " px",
+            "file_format": "frame",
+            "scale": str(round(scale, 4)),
+        }
+
+    def read_metadata(self):
+        #metadata without running the node, anything decoded is cached for when it does run
+        if self._frame is not None:
+            width, height = self.image_size()
+            return self.build_frame_metadata(width, height, self.decode_plan()[1])
+        
+        size = self.image_size()
+        if size is None:
+            return None
+        return self.build_metadata(size[0], size[1], self.decode_plan()[1])
+
+    def process(self):
         
         try:
-            if self.parameters["preserve_alpha"]:
-                image = cv2.imread(file_path, cv2.IMREAD_UNCHANGED)
+            #while a slider is dragged the graph runs on a downscaled proxy, which
+            #JPEGs can decode directly at 1/2, 1/4 or 1/8 of their size
+            reduction, scale = self.decode_plan()
+            if self._frame is not None:
+                image = self.frame_image()
             else:
-                image = cv2.imread(file_path, cv2.IMREAD_COLOR)
-            
+                image = self.decode(reduction)
             if image is None:
-                print(f"Error: Failed to load image: {file_path}")
                 return False
             
-            #convert BGR to RGB 
-            if len(image.shape) == 3 and image.shape[2] == 3:
-                image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-            elif len(image.shape) == 3 and image.shape[2] == 4:
-                image = cv2.cvtColor(image, cv2.COLOR_BGRA2RGBA)
+            width, height = self.source_size(image, reduction)
+            if scale != 1 / reduction:
+                target_size = (max(1, round(width * scale)), max(1, round(height * scale)))
+                if target_size != (image.shape[1], image.shape[0]):
+                    image = cv2.resize(image, target_size, interpolation=cv2.INTER_AREA)
             
             #extract metadata
-            height, width = image.shape[:2]
-            channels = 1 if len(image.shape) == 2 else image.shape[2]
-            file_size = os.path.getsize(file_path)
-            file_extension = os.path.splitext(file_path)[1].lower()
-            
-            metadata = {
-                "width": str(width) + " px",
-                "height": str(height) + " px",
-                "file_size": str(round(file_size/1024**2, 2)) + " MB" ,
-                "file_format": file_extension[1:],
-            }
-
+            if self._frame is not None:
+                metadata = self.build_frame_metadata(width, height, image.shape[1] / width)
+            else:
+                metadata = self.build_metadata(width, height, image.shape[1] / width)
             
             self.processed_data["image"] = image
             self.processed_data["metadata"] = metadata
@@ -76,10 +270,23 @@ class InputNode(Node):
             print(f"Error processing image: {str(e)}")
             return False
     
+    def frame_image(self):
+        image = self._frame
+        if not self.parameters["preserve_alpha"] and image.ndim == 3 and image.shape[2] == 4:
+            image = image[:, :, :3]
+        return image
+
+    def set_parameter(self, param_name, value):
+        #a newly chosen file replaces a streamed frame, whichever way it is set
+        if param_name == "file_path":
+            self._frame = None
+        return super().set_parameter(param_name, value)
+
     def set_file_path(self, file_path):
         if os.path.exists(file_path):
             self.parameters["file_path"] = file_path
-            self.dirty = True
+            self._frame = None
+            self.invalidate()
             return True
         else:
             print(f"Warning: File does not exist: {file_path}")
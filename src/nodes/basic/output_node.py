@@ -1,10 +1,12 @@
-import os
-import cv2
-import numpy as np
+from concurrent.futures import Future
 from src.node import Node
+from src.image_writer import FORMAT_EXTENSIONS, ensure_directory, image_writer
 
 class OutputNode(Node):
 
+    #the preview lives in parameters and saving has side effects
+    cacheable = False
+
     def __init__(self, name="Output", id=None):
         
         super().__init__(name, id)
@@ -24,9 +26,13 @@ class OutputNode(Node):
             "file_path_save": "",  
             "format": "png",
             "quality": 95,    
+            "preset": "balanced",
             "preview": None   
         }
 
+    def tile_halo(self):
+        return 0
+
     def process(self):
         input_image = self.get_input_data("image")
         
@@ -37,62 +43,68 @@ class OutputNode(Node):
         self.parameters["preview"] = input_image
         self.dirty = False
         
+        #saving calls process() directly, outside evaluate()
+        self.result_version += 1
+        
         return True
     
     def save_image(self):
+        #blocks until the file is written
+        return self.save_image_async().result()
+    
+    def save_image_async(self):
+        #prepares the image on this thread and hands encoding and writing to the
+        #background writer; the returned future resolves to True or False
+        job = self.prepare_save()
+        if job is None:
+            return self._failed()
+        
+        return image_writer.submit(*job)
+    
+    def prepare_save(self, file_path=None):
+        #(file_path, image, format, preset, quality) for write_image, or None;
+        #file_path overrides the node's own path for this save only
+        #a proxy preview is never written to disk
+        if self.graph is not None:
+            self.graph.end_interactive()
+        
         if self.dirty:
             success = self.process()
             if not success:
-                return False
+                return None
         
-        file_path = self.parameters["file_path_save"]
+        file_path = file_path or self.parameters["file_path_save"]
         if not file_path:
             print("Error: No file path specified")
-            return False
+            return None
         
         #create directory if it doesn't exist
-        directory = os.path.dirname(file_path)
-        if directory and not os.path.exists(directory):
-            try:
-                os.makedirs(directory)
-            except Exception as e:
-                print(f"Error creating directory: {str(e)}")
-                return False
+        if not ensure_directory(file_path):
+            return None
         
         image = self.parameters.get("preview")
         if image is None:
             print("Error: No processed image available")
-            return False
+            return None
         
-        try:
-            #xonvert to BGR for OpenCV
-            if len(image.shape) == 3 and image.shape[2] == 3:
-                save_image = cv2.cvtColor(image, cv2.COLOR_RGB2BGR)
-            elif len(image.shape) == 3 and image.shape[2] == 4:
-                save_image = cv2.cvtColor(image, cv2.COLOR_RGBA2BGRA)
-            else:
-                save_image = image
-            
-            #save with appropriate format and quality
-            format_lower = self.parameters["format"].lower()
-            
-            if format_lower == "jpg" or format_lower == "jpeg":
-                quality = self.parameters["quality"]
-                cv2.imwrite(file_path, save_image, [cv2.IMWRITE_JPEG_QUALITY, quality])
-            elif format_lower == "png":
-                cv2.imwrite(file_path, save_image, [cv2.IMWRITE_PNG_COMPRESSION, 9])
-            elif format_lower == "bmp":
-                cv2.imwrite(file_path, save_image)
-            else:
-                print(f"Error: Unsupported format: {format_lower}")
-                return False
-            
-            print(f"Image saved successfully to: {file_path}")
-            return True
-            
-        except Exception as e:
-            print(f"Error saving image: {str(e)}")
-            return False
+        return (
+            file_path,
+            image,
+            self.parameters["format"],
+            self.parameters.get("preset", "balanced"),
+            self.parameters["quality"],
+        )
+    
+    def default_file_name(self):
+        #used when all outputs are saved into one directory
+        stem = "".join(c if c.isalnum() else "_" for c in self.name.lower()).strip("_") or "output"
+        extension = FORMAT_EXTENSIONS.get(self.parameters["format"].lower(), self.parameters["format"])
+        return f"{stem}_{self.id[:8]}.{extension}"
+    
+    def _failed(self):
+        future = Future()
+        future.set_result(False)
+        return future
     
     def set_file_path(self, file_path):
 
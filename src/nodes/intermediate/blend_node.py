@@ -2,6 +2,121 @@ import cv2
 import numpy as np
 from src.node import Node
 
+
+BLEND_MODES = ["normal", "multiply", "screen", "overlay", "difference"]
+
+
+def scratch_buffer(scratch, name, like):
+    #intermediate buffers never leave blend_images, so they can be kept between runs
+    if scratch is None:
+        return np.empty(like.shape, like.dtype)
+    
+    buffer = scratch.get(name)
+    if buffer is None or buffer.shape != like.shape or buffer.dtype != like.dtype:
+        buffer = np.empty(like.shape, like.dtype)
+        scratch[name] = buffer
+    return buffer
+
+
+def blend_uint8(image1, image2, blend_mode, opacity, dst, scratch=None):
+    #fixed-point kernels; cv2.multiply with scale 1/255 rounds to nearest, and a*b/255
+    #never lands exactly on .5, so products are exact
+    if blend_mode == "normal":
+        return cv2.addWeighted(image1, 1.0 - opacity, image2, opacity, 0, dst=dst)
+    
+    blended = dst if opacity >= 1.0 else scratch_buffer(scratch, "blended", image1)
+    
+    if blend_mode == "multiply":
+        cv2.multiply(image1, image2, dst=blended, scale=1.0 / 255.0)
+        
+    elif blend_mode == "screen":
+        #1 - (1 - a)(1 - b)
+        inverse1 = cv2.bitwise_not(image1, dst=scratch_buffer(scratch, "inverse1", image1))
+        inverse2 = cv2.bitwise_not(image2, dst=scratch_buffer(scratch, "inverse2", image1))
+        cv2.multiply(inverse1, inverse2, dst=blended, scale=1.0 / 255.0)
+        cv2.bitwise_not(blended, dst=blended)
+        
+    elif blend_mode == "overlay":
+        #2ab where a < 0.5, 1 - 2(1 - a)(1 - b) elsewhere, selected with a mask instead of branches
+        low = cv2.multiply(image1, image2, dst=scratch_buffer(scratch, "low", image1), scale=2.0 / 255.0)
+        
+        inverse1 = cv2.bitwise_not(image1, dst=scratch_buffer(scratch, "inverse1", image1))
+        inverse2 = cv2.bitwise_not(image2, dst=scratch_buffer(scratch, "inverse2", image1))
+        cv2.multiply(inverse1, inverse2, dst=blended, scale=2.0 / 255.0)
+        cv2.bitwise_not(blended, dst=blended)
+        
+        _, mask = cv2.threshold(image1, 127, 255, cv2.THRESH_BINARY_INV, dst=inverse2)
+        cv2.bitwise_and(low, mask, dst=low)
+        cv2.bitwise_not(mask, dst=mask)
+        cv2.bitwise_and(blended, mask, dst=blended)
+        cv2.bitwise_or(blended, low, dst=blended)
+        
+    elif blend_mode == "difference":
+        cv2.absdiff(image1, image2, dst=blended)
+        
+    else:
+        raise ValueError(f"Unsupported blend mode: {blend_mode}")
+    
+    if opacity < 1.0:
+        return cv2.addWeighted(image1, 1.0 - opacity, blended, opacity, 0, dst=dst)
+    return blended
+
+
+def blend_float(image1, image2, blend_mode, opacity):
+    #anything that is not 8 bit is blended in [0, 1] and rounded back to the type of image1
+    def to_unit(image):
+        scale = np.iinfo(image.dtype).max if image.dtype.kind in "ui" else 1.0
+        return image.astype(np.float32) / scale
+    
+    img1_float = to_unit(image1)
+    img2_float = to_unit(image2)
+    
+    if blend_mode == "normal":
+        blended = img2_float
+    elif blend_mode == "multiply":
+        blended = img1_float * img2_float
+    elif blend_mode == "screen":
+        blended = 1.0 - (1.0 - img1_float) * (1.0 - img2_float)
+    elif blend_mode == "overlay":
+        blended = np.where(
+            img1_float < 0.5,
+            2.0 * img1_float * img2_float,
+            1.0 - 2.0 * (1.0 - img1_float) * (1.0 - img2_float)
+        )
+    elif blend_mode == "difference":
+        blended = np.abs(img1_float - img2_float)
+    else:
+        raise ValueError(f"Unsupported blend mode: {blend_mode}")
+    
+    if opacity < 1.0:
+        blended = img1_float * (1.0 - opacity) + blended * opacity
+    
+    if image1.dtype.kind in "ui":
+        blended = np.rint(blended * np.iinfo(image1.dtype).max)
+    
+    return blended.astype(image1.dtype)
+
+
+def blend_images(image1, image2, blend_mode, opacity, dst=None, scratch=None):
+    if len(image1.shape) != len(image2.shape):
+        if len(image1.shape) == 2:
+            image1 = cv2.cvtColor(image1, cv2.COLOR_GRAY2RGB)
+        elif len(image2.shape) == 2:
+            image2 = cv2.cvtColor(image2, cv2.COLOR_GRAY2RGB)
+    
+    #ensure both images have the same dimensions
+    if image1.shape[:2] != image2.shape[:2]:
+        image2 = cv2.resize(image2, (image1.shape[1], image1.shape[0]))
+    
+    if image1.dtype != np.uint8 or image2.dtype != np.uint8:
+        return blend_float(image1, image2, blend_mode, opacity)
+    
+    if dst is None or dst.shape != image1.shape or dst.dtype != np.uint8:
+        dst = np.empty(image1.shape, np.uint8)
+    
+    return blend_uint8(image1, image2, blend_mode, opacity, dst, scratch)
+
+
 class BlendNode(Node):
     
     def __init__(self, name="Blend", id=None):
@@ -20,6 +135,35 @@ class BlendNode(Node):
             "blend_mode": "normal",  #blend mode (normal, multiply, screen, overlay, difference)
             "opacity": 1.0           
         }
+        
+        self._scratch = {}
+    
+    def tile_halo(self):
+        return 0
+    
+    def blend(self, image1, image2, blend_mode, opacity):
+        #a gray input is expanded to RGB before blending
+        if image1.ndim == 2 and image2.ndim == 3:
+            shape = image1.shape + (3,)
+        else:
+            shape = image1.shape
+        
+        return blend_images(image1, image2, blend_mode, opacity, self.request_buffer(shape), self._scratch)
+    
+    def fused_result(self, input_name, image):
+        #blend the output of a fused chain feeding input_name with the other input
+        other_name = "image2" if input_name == "image1" else "image1"
+        other_image = self.get_input_data(other_name)
+        
+        blend_mode = self.parameters["blend_mode"]
+        opacity = max(0.0, min(1.0, self.parameters["opacity"]))
+        
+        if other_image is None or blend_mode not in BLEND_MODES:
+            return None
+        
+        if input_name == "image1":
+            return self.blend(image, other_image, blend_mode, opacity)
+        return self.blend(other_image, image, blend_mode, opacity)
     
     def process(self):
         
@@ -30,75 +174,15 @@ class BlendNode(Node):
             print("Error: Both input images must be connected")
             return False
         
+        blend_mode = self.parameters["blend_mode"]
+        opacity = max(0.0, min(1.0, self.parameters["opacity"]))
+        
+        if blend_mode not in BLEND_MODES:
+            print(f"Error: Unsupported blend mode: {blend_mode}")
+            return False
+        
         try:
-            if len(image1.shape) != len(image2.shape):
-                if len(image1.shape) == 2:
-                    image1 = cv2.cvtColor(image1, cv2.COLOR_GRAY2RGB)
-                elif len(image2.shape) == 2:
-                    image2 = cv2.cvtColor(image2, cv2.COLOR_GRAY2RGB)
-            
-            #ensure both images have the same dimensions
-            if image1.shape[:2] != image2.shape[:2]:
-                image2 = cv2.resize(image2, (image1.shape[1], image1.shape[0]))
-            
-            blend_mode = self.parameters["blend_mode"]
-            opacity = max(0.0, min(1.0, self.parameters["opacity"]))
-            
-            #apply blend mode
-            if blend_mode == "normal":
-                result = cv2.addWeighted(image1, 1.0 - opacity, image2, opacity, 0)
-                
-            elif blend_mode == "multiply":
-                img1_float = image1.astype(np.float32) / 255.0
-                img2_float = image2.astype(np.float32) / 255.0
-                
-                blended = img1_float * img2_float
-                
-                if opacity < 1.0:
-                    blended = img1_float * (1.0 - opacity) + blended * opacity
-                
-                result = (blended * 255.0).astype(np.uint8)
-                
-            elif blend_mode == "screen":
-                img1_float = image1.astype(np.float32) / 255.0
-                img2_float = image2.astype(np.float32) / 255.0
-                
-                blended = 1.0 - (1.0 - img1_float) * (1.0 - img2_float)
-                
-                if opacity < 1.0:
-                    blended = img1_float * (1.0 - opacity) + blended * opacity
-                
-                result = (blended * 255.0).astype(np.uint8)
-                
-            elif blend_mode == "overlay":
-                #overlay blend mode
-                img1_float = image1.astype(np.float32) / 255.0
-                img2_float = image2.astype(np.float32) / 255.0
-                
-                mask = img1_float < 0.5
-                blended = np.zeros_like(img1_float)
-                blended[mask] = 2.0 * img1_float[mask] * img2_float[mask]
-                blended[~mask] = 1.0 - 2.0 * (1.0 - img1_float[~mask]) * (1.0 - img2_float[~mask])
-                
-                if opacity < 1.0:
-                    blended = img1_float * (1.0 - opacity) + blended * opacity
-                
-                result = (blended * 255.0).astype(np.uint8)
-                
-            elif blend_mode == "difference":
-                img1_float = image1.astype(np.float32) / 255.0
-                img2_float = image2.astype(np.float32) / 255.0
-                
-                blended = np.abs(img1_float - img2_float)
-                
-                if opacity < 1.0:
-                    blended = img1_float * (1.0 - opacity) + blended * opacity
-                
-                result = (blended * 255.0).astype(np.uint8)
-                
-            else:
-                print(f"Error: Unsupported blend mode: {blend_mode}")
-                return False
+            result = self.blend(image1, image2, blend_mode, opacity)
             
             self.processed_data["image"] = result
             
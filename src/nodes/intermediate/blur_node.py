@@ -3,6 +3,9 @@ import numpy as np
 from src.node import Node
 
 class BlurNode(Node):    
+
+    non_spatial_outputs = ("kernel",)
+
     def __init__(self, name="Blur", id=None):
         super().__init__(name, id)
         
@@ -21,6 +24,36 @@ class BlurNode(Node):
             "direction_angle": 0,    
             "direction_strength": 1.0  
         }
+        
+        self.lazy_outputs = {
+            "kernel": self.get_kernel_visualization
+        }
+    
+    def effective_radius(self):
+        #the radius is in full resolution pixels, a proxy image needs a smaller one
+        radius = max(1, min(20, self.parameters["radius"]))
+        return max(1, round(radius * self.working_scale()))
+    
+    def tile_halo(self):
+        #both the gaussian and directional kernels span 2 * radius + 1 pixels
+        return self.effective_radius()
+    
+    def get_kernel_visualization(self):
+        if "kernel_size" not in self.output_state:
+            return None
+        
+        kernel = self.output_state["kernel"]
+        if kernel is None:
+            kernel_size = self.output_state["kernel_size"]
+            kernel = cv2.getGaussianKernel(kernel_size, 0)
+            kernel = kernel * kernel.T  # Outer product to get 2D kernel
+        
+        kernel_vis = (kernel / kernel.max() * 255).astype(np.uint8)
+        
+        if self.output_state["color"]:
+            kernel_vis = cv2.cvtColor(kernel_vis, cv2.COLOR_GRAY2RGB)
+        
+        return kernel_vis
     
     def process(self):
         
@@ -31,21 +64,19 @@ class BlurNode(Node):
             return False
         
         try:
-            radius = max(1, min(20, self.parameters["radius"]))
+            radius = self.effective_radius()
             directional = self.parameters["directional"]
             
             kernel_size = 2 * radius + 1
             
             if not directional:
-                result = cv2.GaussianBlur(input_image, (kernel_size, kernel_size), 0)
-                
-                kernel = cv2.getGaussianKernel(kernel_size, 0)
-                kernel = kernel * kernel.T  # Outer product to get 2D kernel
+                result = cv2.GaussianBlur(
+                    input_image, (kernel_size, kernel_size), 0,
+                    dst=self.request_buffer(input_image.shape, input_image.dtype)
+                )
                 
-                kernel_vis = (kernel / kernel.max() * 255).astype(np.uint8)
-                
-                if len(input_image.shape) == 3:
-                    kernel_vis = cv2.cvtColor(kernel_vis, cv2.COLOR_GRAY2RGB)
+                #the 2D gaussian is only built if the kernel output is requested
+                kernel = None
             
             else:
                 angle = self.parameters["direction_angle"]
@@ -71,15 +102,17 @@ class BlurNode(Node):
                     gaussian_kernel = gaussian_kernel * gaussian_kernel.T
                     kernel = kernel * strength + gaussian_kernel * (1 - strength)
                 
-                result = cv2.filter2D(input_image, -1, kernel)
-                
-                kernel_vis = (kernel / kernel.max() * 255).astype(np.uint8)
-                
-                if len(input_image.shape) == 3:
-                    kernel_vis = cv2.cvtColor(kernel_vis, cv2.COLOR_GRAY2RGB)
+                result = cv2.filter2D(
+                    input_image, -1, kernel,
+                    dst=self.request_buffer(input_image.shape, input_image.dtype)
+                )
             
             self.processed_data["image"] = result
-            self.processed_data["kernel"] = kernel_vis
+            self.output_state = {
+                "kernel_size": kernel_size,
+                "kernel": kernel,
+                "color": len(input_image.shape) == 3,
+            }
             
             self.dirty = False
             
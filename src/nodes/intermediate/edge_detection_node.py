@@ -26,6 +26,56 @@ class EdgeDetectionNode(Node):
             "overlay_color": [0, 255, 0],  
             "overlay_opacity": 0.7    
         }
+        
+        self.lazy_outputs = {
+            "image": self.get_edge_image
+        }
+    
+    def tile_halo(self):
+        if self.parameters["algorithm"] == "sobel":
+            ksize = self.parameters["sobel_ksize"]
+            if ksize not in [1, 3, 5, 7]:
+                ksize = 3
+            return max(1, ksize // 2)
+        
+        #canny hysteresis can follow an edge across the whole image
+        return None
+    
+    def get_edge_image(self):
+        #edges drawn over or expanded to the layout of the input image
+        if "input" not in self.output_state:
+            return None
+        
+        input_image = self.output_state["input"]
+        gray_image = self.output_state["gray"]
+        edges = self.processed_data["edges"]
+        
+        if self.parameters["overlay"]:
+            if len(input_image.shape) == 3:
+                overlay_color = self.parameters["overlay_color"]
+                overlay_opacity = self.parameters["overlay_opacity"]
+                
+                edge_mask = self.request_buffer(input_image.shape, input_image.dtype)
+                edge_mask.fill(0)
+                edge_mask[edges > 0] = overlay_color
+                
+                return cv2.addWeighted(
+                    input_image, 
+                    1.0, 
+                    edge_mask, 
+                    overlay_opacity, 
+                    0,
+                    dst=self.request_buffer(input_image.shape, input_image.dtype)
+                )
+            else:
+                return cv2.addWeighted(gray_image, 0.7, edges, 0.3, 0,
+                                       dst=self.request_buffer(gray_image.shape, gray_image.dtype))
+        else:
+            if len(input_image.shape) == 3:
+                return cv2.cvtColor(edges, cv2.COLOR_GRAY2RGB,
+                                    dst=self.request_buffer(edges.shape + (3,), edges.dtype))
+            else:
+                return edges
     
     def process(self):
        
@@ -37,33 +87,41 @@ class EdgeDetectionNode(Node):
         
         try:
             if len(input_image.shape) > 2:
-                gray_image = cv2.cvtColor(input_image, cv2.COLOR_RGB2GRAY)
+                gray_image = cv2.cvtColor(
+                    input_image, cv2.COLOR_RGB2GRAY,
+                    dst=self.request_buffer(input_image.shape[:2], input_image.dtype)
+                )
             else:
-                gray_image = input_image.copy()
+                gray_image = input_image
+            
+            edges = self.request_buffer(gray_image.shape, np.uint8)
             
             algorithm = self.parameters["algorithm"]
             
             if algorithm == "sobel":
                 ksize = self.parameters["sobel_ksize"]
-                scale = self.parameters["sobel_scale"]
+                #gradients of a downscaled proxy are steeper per pixel
+                scale = self.parameters["sobel_scale"] * self.working_scale()
                 delta = self.parameters["sobel_delta"]
                 
                 if ksize not in [1, 3, 5, 7]:
                     ksize = 3
                 
-                grad_x = cv2.Sobel(gray_image, cv2.CV_16S, 1, 0, ksize=ksize, scale=scale, delta=delta)
-                grad_y = cv2.Sobel(gray_image, cv2.CV_16S, 0, 1, ksize=ksize, scale=scale, delta=delta)
+                grad_x = cv2.Sobel(gray_image, cv2.CV_16S, 1, 0, ksize=ksize, scale=scale, delta=delta,
+                                   dst=self.request_buffer(gray_image.shape, np.int16))
+                grad_y = cv2.Sobel(gray_image, cv2.CV_16S, 0, 1, ksize=ksize, scale=scale, delta=delta,
+                                   dst=self.request_buffer(gray_image.shape, np.int16))
                 
-                abs_grad_x = cv2.convertScaleAbs(grad_x)
-                abs_grad_y = cv2.convertScaleAbs(grad_y)
+                abs_grad_x = cv2.convertScaleAbs(grad_x, dst=self.request_buffer(gray_image.shape, np.uint8))
+                abs_grad_y = cv2.convertScaleAbs(grad_y, dst=self.request_buffer(gray_image.shape, np.uint8))
                 
-                edges = cv2.addWeighted(abs_grad_x, 0.5, abs_grad_y, 0.5, 0)
+                edges = cv2.addWeighted(abs_grad_x, 0.5, abs_grad_y, 0.5, 0, dst=edges)
                 
             elif algorithm == "canny":
                 threshold1 = self.parameters["threshold1"]
                 threshold2 = self.parameters["threshold2"]
                 
-                edges = cv2.Canny(gray_image, threshold1, threshold2)
+                edges = cv2.Canny(gray_image, threshold1, threshold2, edges=edges)
                 
             else:
                 print(f"Error: Unsupported edge detection algorithm: {algorithm}")
@@ -71,30 +129,11 @@ class EdgeDetectionNode(Node):
             
             self.processed_data["edges"] = edges
             
-            if self.parameters["overlay"]:
-                if len(input_image.shape) == 3:
-                    overlay_color = self.parameters["overlay_color"]
-                    overlay_opacity = self.parameters["overlay_opacity"]
-                    
-                    edge_mask = np.zeros_like(input_image)
-                    edge_mask[edges > 0] = overlay_color
-                    
-                    result = cv2.addWeighted(
-                        input_image, 
-                        1.0, 
-                        edge_mask, 
-                        overlay_opacity, 
-                        0
-                    )
-                else:
-                    result = cv2.addWeighted(gray_image, 0.7, edges, 0.3, 0)
-            else:
-                if len(input_image.shape) == 3:
-                    result = cv2.cvtColor(edges, cv2.COLOR_GRAY2RGB)
-                else:
-                    result = edges
-            
-            self.processed_data["image"] = result
+            #the image output is built from these when it is first requested
+            self.output_state = {
+                "input": input_image,
+                "gray": gray_image,
+            }
             
             self.dirty = False
             
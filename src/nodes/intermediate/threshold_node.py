@@ -1,9 +1,65 @@
 import cv2
 import numpy as np
-import matplotlib.pyplot as plt
+from functools import lru_cache
 from src.node import Node
 
+
+@lru_cache(maxsize=256)
+def build_binary_lut(threshold_value, max_value):
+    #cv2.threshold itself decides every 8-bit value, so the table is exact
+    values = np.arange(256, dtype=np.uint8).reshape(1, 256)
+    _, lut = cv2.threshold(values, threshold_value, max_value, cv2.THRESH_BINARY)
+    lut = lut.ravel()
+    lut.flags.writeable = False
+    return lut
+
+
+def render_histogram(counts, threshold_value=None, width=800, height=400):
+    #line plot of a 256 bin histogram with a dashed marker at the threshold
+    image = np.full((height, width, 3), 255, dtype=np.uint8)
+    
+    left, right, top, bottom = 60, 20, 35, 45
+    plot_width = width - left - right
+    plot_height = height - top - bottom
+    
+    #grid
+    for value in range(0, 257, 32):
+        x = left + int(round(value * plot_width / 256))
+        cv2.line(image, (x, top), (x, top + plot_height), (225, 225, 225), 1)
+    for i in range(1, 5):
+        y = top + int(round(i * plot_height / 5))
+        cv2.line(image, (left, y), (left + plot_width, y), (225, 225, 225), 1)
+    cv2.rectangle(image, (left, top), (left + plot_width, top + plot_height), (0, 0, 0), 1)
+    
+    counts = np.asarray(counts, dtype=np.float64).ravel()
+    peak = max(counts.max(), 1.0)
+    xs = left + np.arange(counts.size) * plot_width / 256.0
+    ys = top + plot_height - counts / peak * plot_height
+    points = np.round(np.stack([xs, ys], axis=1)).astype(np.int32)
+    cv2.polylines(image, [points], False, (31, 119, 180), 1, cv2.LINE_AA)
+    
+    if threshold_value is not None:
+        x = left + int(round(float(threshold_value) * plot_width / 256))
+        for y in range(top, top + plot_height, 10):
+            cv2.line(image, (x, y), (x, min(y + 5, top + plot_height)), (255, 0, 0), 1)
+    
+    font = cv2.FONT_HERSHEY_SIMPLEX
+    cv2.putText(image, "Image Histogram with Threshold", (left, 22), font, 0.55, (0, 0, 0), 1, cv2.LINE_AA)
+    cv2.putText(image, "Pixel Value", (left + plot_width // 2 - 45, height - 8), font, 0.45, (0, 0, 0), 1, cv2.LINE_AA)
+    for value in range(0, 257, 64):
+        x = left + int(round(value * plot_width / 256))
+        cv2.putText(image, str(value), (x - 10, top + plot_height + 18), font, 0.4, (0, 0, 0), 1, cv2.LINE_AA)
+    cv2.putText(image, str(int(peak)), (5, top + 5), font, 0.4, (0, 0, 0), 1, cv2.LINE_AA)
+    cv2.putText(image, "0", (left - 15, top + plot_height), font, 0.4, (0, 0, 0), 1, cv2.LINE_AA)
+    
+    return image
+
+
 class ThresholdNode(Node):    
+
+    non_spatial_outputs = ("histogram",)
+    pointwise = True
+
     def __init__(self, name="Threshold", id=None):
         
         super().__init__(name, id)
@@ -25,6 +81,64 @@ class ThresholdNode(Node):
             "block_size": 11,           #block size for adaptive threshold (must be odd)
             "c_value": 2                #constant subtracted from mean/gaussian
         }
+        
+        self.lazy_outputs = {
+            "histogram": self.get_histogram
+        }
+        
+        #histogram counts only change with the input, not with the threshold
+        self._histogram_source = None
+        self._histogram_counts = None
+    
+    def tile_halo(self):
+        threshold_type = self.parameters["threshold_type"]
+        
+        if threshold_type == "binary":
+            return 0
+        elif threshold_type == "adaptive":
+            return self.effective_block_size() // 2
+        
+        #otsu picks its threshold from the histogram of the whole image
+        return None
+    
+    def effective_block_size(self):
+        #odd and at least 3, scaled down along with a proxy image
+        block_size = max(3, round(self.parameters["block_size"] * self.working_scale()))
+        if block_size % 2 == 0:
+            block_size += 1
+        return block_size
+    
+    def histogram_counts(self, input_image, gray_image=None):
+        if self._histogram_source is not input_image:
+            if gray_image is None and len(input_image.shape) > 2:
+                gray_image = cv2.cvtColor(input_image, cv2.COLOR_RGB2GRAY)
+            elif gray_image is None:
+                gray_image = input_image
+            
+            self._histogram_counts = cv2.calcHist([gray_image], [0], None, [256], [0, 256])
+            self._histogram_source = input_image
+        
+        return self._histogram_counts
+    
+    def get_histogram(self):
+        if "input" not in self.output_state:
+            return None
+        
+        counts = self.histogram_counts(self.output_state["input"])
+        return render_histogram(counts, self.output_state["threshold"])
+    
+    def pointwise_stages(self, channels, dtype):
+        if self.parameters["threshold_type"] != "binary" or dtype != np.uint8:
+            return None
+        
+        lut = build_binary_lut(self.parameters["threshold_value"], self.parameters["max_value"])
+        
+        if channels is None:
+            return [("lut", lut)], None
+        elif channels in (3, 4):
+            return [("gray",), ("lut", lut), ("to_rgb",)], 3
+        
+        return None
     
     def process(self):
        
@@ -36,25 +150,28 @@ class ThresholdNode(Node):
         
         try:
             if len(input_image.shape) > 2:
-                gray_image = cv2.cvtColor(input_image, cv2.COLOR_RGB2GRAY)
+                gray_image = cv2.cvtColor(
+                    input_image, cv2.COLOR_RGB2GRAY,
+                    dst=self.request_buffer(input_image.shape[:2], input_image.dtype)
+                )
             else:
-                gray_image = input_image.copy()
+                gray_image = input_image
+            
+            #the thresholded mask lands in a pooled buffer as well
+            result = self.request_buffer(gray_image.shape, gray_image.dtype)
             
             threshold_value = self.parameters["threshold_value"]
             max_value = self.parameters["max_value"]
             threshold_type = self.parameters["threshold_type"]
             
             if threshold_type == "binary":
-                _, result = cv2.threshold(gray_image, threshold_value, max_value, cv2.THRESH_BINARY)
+                _, result = cv2.threshold(gray_image, threshold_value, max_value, cv2.THRESH_BINARY, dst=result)
                 
             elif threshold_type == "adaptive":
                 adaptive_method = self.parameters["adaptive_method"]
-                block_size = self.parameters["block_size"]
+                block_size = self.effective_block_size()
                 c_value = self.parameters["c_value"]
                 
-                if block_size % 2 == 0:
-                    block_size += 1
-                
                 if adaptive_method == "mean":
                     result = cv2.adaptiveThreshold(
                         gray_image, 
@@ -62,7 +179,8 @@ class ThresholdNode(Node):
                         cv2.ADAPTIVE_THRESH_MEAN_C, 
                         cv2.THRESH_BINARY, 
                         block_size, 
-                        c_value
+                        c_value,
+                        dst=result
                     )
                 else: 
                     result = cv2.adaptiveThreshold(
@@ -71,40 +189,34 @@ class ThresholdNode(Node):
                         cv2.ADAPTIVE_THRESH_GAUSSIAN_C, 
                         cv2.THRESH_BINARY, 
                         block_size, 
-                        c_value
+                        c_value,
+                        dst=result
                     )
                     
             elif threshold_type == "otsu":
-                _, result = cv2.threshold(gray_image, 0, max_value, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+                threshold_value, result = cv2.threshold(
+                    gray_image, 0, max_value, cv2.THRESH_BINARY + cv2.THRESH_OTSU, dst=result
+                )
             
             else:
                 print(f"Error: Unsupported threshold type: {threshold_type}")
                 return False
             
-            hist = cv2.calcHist([gray_image], [0], None, [256], [0, 256])
-            
-            fig = plt.figure(figsize=(8, 4))
-            plt.plot(hist)
-            plt.xlim([0, 256])
-            plt.axvline(x=threshold_value, color='r', linestyle='--')
-            plt.title('Image Histogram with Threshold')
-            plt.xlabel('Pixel Value')
-            plt.ylabel('Frequency')
-            plt.grid(True)
-            
-            fig.canvas.draw()
-            hist_image = np.frombuffer(fig.canvas.tostring_rgb(), dtype=np.uint8)
-            hist_image = hist_image.reshape(fig.canvas.get_width_height()[::-1] + (3,))
-            plt.close(fig)
+            #the histogram is only drawn when a consumer or preview asks for it
+            self.output_state = {
+                "input": input_image,
+                "threshold": threshold_value,
+            }
             
             if len(input_image.shape) == 3:
-                result_rgb = cv2.cvtColor(result, cv2.COLOR_GRAY2RGB)
+                result_rgb = cv2.cvtColor(
+                    result, cv2.COLOR_GRAY2RGB,
+                    dst=self.request_buffer(result.shape + (3,), result.dtype)
+                )
                 self.processed_data["image"] = result_rgb
             else:
                 self.processed_data["image"] = result
             
-            self.processed_data["histogram"] = hist_image
-            
             self.dirty = False
             
             return True
@@ -0,0 +1,240 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+import numpy as np
+from src.result_cache import estimate_size
+
+#trace events kept for export; aggregates cover every event regardless
+DEFAULT_MAX_EVENTS = 100000
+
+
+def describe_array(value):
+    if isinstance(value, np.ndarray):
+        return {"shape": list(value.shape), "dtype": str(value.dtype)}
+    return None
+
+
+def describe_inputs(node):
+    #shapes and dtypes of what the node read, without producing lazy outputs
+    inputs = {}
+    for input_name, connection in node.inputs.items():
+        if connection:
+            source_node, output_name = connection
+            inputs[input_name] = describe_array(source_node.processed_data.get(output_name))
+    return inputs
+
+
+class Profiler:
+    #records one event per node evaluation, fused chain run, tile and graph execution.
+    #Graphs only hold a Profiler while profiling is enabled, so disabled profiling
+    #costs a single attribute check per evaluation
+
+    def __init__(self, max_events=DEFAULT_MAX_EVENTS):
+        self.events = deque(maxlen=max_events)
+        self.stats = {}
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _open_events(self):
+        #events started but not yet recorded on this thread, innermost last
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def start(self):
+        #thread_time is the calling thread's CPU time, OpenCV's own worker threads are not included.
+        #The list collects the wall and CPU time of events nested in this one, e.g. an
+        #upstream node pulled by a downstream node's evaluation
+        nested = [0.0, 0.0]
+        self._open_events().append(nested)
+        return (time.perf_counter(), time.thread_time(), nested)
+
+    def record(self, category, name, start, success=True, cache_hit=False, node=None,
+               node_ids=None, inputs=None, output_bytes=0, args=None):
+        end_wall = time.perf_counter()
+        end_cpu = time.thread_time()
+        wall = end_wall - start[0]
+        cpu = end_cpu - start[1]
+
+        #an event that raised before being recorded leaves its entry behind, drop it too
+        nested = start[2]
+        stack = self._open_events()
+        while stack:
+            if stack.pop() is nested:
+                break
+        if stack:
+            stack[-1][0] += wall
+            stack[-1][1] += cpu
+
+        event = {
+            "category": category,
+            "name": name,
+            "node_id": node.id if node is not None else None,
+            "node_type": node.__class__.__name__ if node is not None else None,
+            "node_ids": node_ids,
+            "start": start[0] - self._origin,
+            "wall": wall,
+            "cpu": cpu,
+            #without the time of nested events, so per-node totals add up
+            "self_wall": wall - nested[0],
+            "self_cpu": cpu - nested[1],
+            "thread": threading.get_native_id(),
+            "thread_name": threading.current_thread().name,
+            "success": success,
+            "cache_hit": cache_hit,
+            "output_bytes": output_bytes,
+            "inputs": inputs,
+            "args": args,
+        }
+
+        key = (category, event["node_id"] or name)
+        with self._lock:
+            self.events.append(event)
+
+            stats = self.stats.get(key)
+            if stats is None:
+                stats = self.stats[key] = {
+                    "category": category,
+                    "name": name,
+                    "node_id": event["node_id"],
+                    "node_type": event["node_type"],
+                    "calls": 0,
+                    "cache_hits": 0,
+                    "failures": 0,
+                    "wall_seconds": 0.0,
+                    "cpu_seconds": 0.0,
+                    "self_seconds": 0.0,
+                    "self_cpu_seconds": 0.0,
+                    "max_wall_seconds": 0.0,
+                    "output_bytes": 0,
+                    "inputs": None,
+                }
+
+            stats["calls"] += 1
+            stats["cache_hits"] += int(cache_hit)
+            stats["failures"] += int(not success)
+            stats["wall_seconds"] += event["wall"]
+            stats["cpu_seconds"] += event["cpu"]
+            stats["self_seconds"] += event["self_wall"]
+            stats["self_cpu_seconds"] += event["self_cpu"]
+            stats["max_wall_seconds"] = max(stats["max_wall_seconds"], event["wall"])
+            stats["output_bytes"] += output_bytes
+            if inputs is not None:
+                stats["inputs"] = inputs
+
+        return event
+
+    def record_node(self, node, start, success, cache_hit):
+        #a cache hit allocates nothing, a fresh result is charged with its output arrays
+        output_bytes = 0 if cache_hit or not success else estimate_size(node.processed_data)
+        return self.record(
+            "node", node.name, start, success, cache_hit,
+            node=node,
+            inputs=describe_inputs(node),
+            output_bytes=output_bytes,
+        )
+
+    def record_fused(self, chain, start, success, cache_hit):
+        output_node = chain.output_node
+        output_bytes = 0 if cache_hit or not success else estimate_size(output_node.processed_data)
+        return self.record(
+            "fused", " + ".join(node.name for node in chain.nodes + ([chain.blend_node] if chain.blend_node else [])),
+            start, success, cache_hit,
+            node=output_node,
+            node_ids=chain.node_ids,
+            inputs=describe_inputs(chain.nodes[0]),
+            output_bytes=output_bytes,
+        )
+
+    def record_tile(self, node, start, success, tile_inputs, region):
+        return self.record(
+            "tile", node.name, start, success,
+            node=node,
+            inputs={name: describe_array(value) for name, value in tile_inputs.items()},
+            output_bytes=estimate_size(node.processed_data) if success else 0,
+            args={"region": list(region)},
+        )
+
+    def clear(self):
+        with self._lock:
+            self.events.clear()
+            self.stats.clear()
+            self._origin = time.perf_counter()
+
+    def report(self):
+        with self._lock:
+            entries = [dict(stats) for stats in self.stats.values()]
+            recorded = len(self.events)
+
+        for entry in entries:
+            entry["mean_wall_seconds"] = entry["wall_seconds"] / entry["calls"]
+
+        #graph executions contain the node events, so they are totalled separately
+        node_entries = [entry for entry in entries if entry["category"] != "execute"]
+        executions = [entry for entry in entries if entry["category"] == "execute"]
+        node_entries.sort(key=lambda entry: entry["self_seconds"], reverse=True)
+
+        return {
+            "nodes": node_entries,
+            "executions": sum(entry["calls"] for entry in executions),
+            "execute_seconds": sum(entry["wall_seconds"] for entry in executions),
+            "node_seconds": sum(entry["self_seconds"] for entry in node_entries if entry["category"] != "tile"),
+            "cache_hits": sum(entry["cache_hits"] for entry in node_entries),
+            "events_recorded": recorded,
+        }
+
+    def to_chrome_trace(self):
+        #trace-event JSON for chrome://tracing or Perfetto
+        with self._lock:
+            events = list(self.events)
+
+        pid = os.getpid()
+        trace = []
+        threads = {}
+        for event in events:
+            threads[event["thread"]] = event["thread_name"]
+
+            args = {
+                "node_id": event["node_id"],
+                "node_type": event["node_type"],
+                "cpu_ms": round(event["cpu"] * 1000, 3),
+                "self_ms": round(event["self_wall"] * 1000, 3),
+                "cache_hit": event["cache_hit"],
+                "success": event["success"],
+                "output_bytes": event["output_bytes"],
+            }
+            if event["node_ids"]:
+                args["node_ids"] = event["node_ids"]
+            if event["inputs"]:
+                args["inputs"] = event["inputs"]
+            if event["args"]:
+                args.update(event["args"])
+
+            trace.append({
+                "name": event["name"],
+                "cat": event["category"],
+                "ph": "X",
+                "ts": event["start"] * 1e6,
+                "dur": event["wall"] * 1e6,
+                "pid": pid,
+                "tid": event["thread"],
+                "args": args,
+            })
+
+        for tid, name in threads.items():
+            trace.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}})
+
+        return {"traceEvents": trace, "displayTimeUnit": "ms"}
+
+    def export_chrome_trace(self, file_path):
+        try:
+            with open(file_path, "w") as f:
+                json.dump(self.to_chrome_trace(), f)
+            return True
+        except Exception as e:
+            print(f"Error writing trace: {str(e)}")
+            return False
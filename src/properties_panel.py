@@ -2,13 +2,16 @@ from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QFormLayout, QLabel,
                             QSlider, QComboBox, QPushButton, QDoubleSpinBox,
                             QSpinBox, QCheckBox, QColorDialog, QGroupBox,
                             QScrollArea, QSizePolicy, QHBoxLayout, QLineEdit, QMessageBox, QFileDialog)
-from PyQt5.QtCore import Qt, pyqtSlot
+from PyQt5.QtCore import Qt, pyqtSlot, pyqtSignal
 from PyQt5.QtGui import QColor, QPixmap, QImage
 from src.nodes.basic.output_node import OutputNode
-import numpy as np
+from src.evaluation_worker import EvaluationWorker
+from src.thumbnails import numpy_to_qimage
 
 class PropertiesPanel(QScrollArea):
 
+    #emitted from the image writer thread with file_path and success
+    save_finished = pyqtSignal(object)
     
     def __init__(self, node_graph, parent=None):
         super().__init__(parent)
@@ -18,6 +21,7 @@ class PropertiesPanel(QScrollArea):
 
         #store the node graph
         self.node_graph = node_graph
+        self.save_finished.connect(self.on_save_finished)
 
         #widget properties
         self.setWidgetResizable(True)
@@ -70,6 +74,12 @@ class PropertiesPanel(QScrollArea):
         #initialize state variables
         self.selected_node = None
         self.parameter_widgets = {}
+        self.node_preview_label = None
+        self.output_preview_label = None
+        
+        #the graph runs off the UI thread and posts previews back
+        self.evaluation_worker = EvaluationWorker(node_graph, self)
+        self.evaluation_worker.result_ready.connect(self.on_evaluation_finished)
 
     @pyqtSlot(str)
     def set_selected_node(self, node_id):
@@ -122,6 +132,8 @@ class PropertiesPanel(QScrollArea):
                 item.widget().deleteLater()
         
         self.parameter_widgets = {}
+        self.node_preview_label = None
+        self.output_preview_label = None
     
     def add_parameter_widgets(self):
         if not self.selected_node:
@@ -198,7 +210,7 @@ class PropertiesPanel(QScrollArea):
                     else:
                         save_button.clicked.connect(self.save_result)
 
-                elif param_name in ["blend_mode",  "threshold_type", "algorithm", "format"]:
+                elif param_name in ["blend_mode",  "threshold_type", "algorithm", "format", "preset", "decode_scale"]:
                     widget = QComboBox()
                     
                     if param_name == "blend_mode":
@@ -208,7 +220,11 @@ class PropertiesPanel(QScrollArea):
                     elif param_name == "algorithm":
                         widget.addItems(["sobel", "canny"])
                     elif param_name == "format":
-                        widget.addItems(["png", "jpg", "bmp"])
+                        widget.addItems(["png", "jpg", "webp", "bmp"])
+                    elif param_name == "preset":
+                        widget.addItems(["fast", "balanced", "smallest"])
+                    elif param_name == "decode_scale":
+                        widget.addItems(["auto", "full", "1/2", "1/4", "1/8"])
 
                     widget.setCurrentText(param_value)
                     widget.currentTextChanged.connect(
@@ -230,6 +246,8 @@ class PropertiesPanel(QScrollArea):
                     widget.valueChanged.connect(
                         lambda value, name=param_name: self.on_parameter_changed(name, value)
                     )
+                    widget.sliderPressed.connect(self.begin_interactive)
+                    widget.sliderReleased.connect(self.end_interactive)
                 elif param_name == "threshold_value":
                     widget = QSlider(Qt.Horizontal)
                     widget.setRange(0, 255)
@@ -237,6 +255,8 @@ class PropertiesPanel(QScrollArea):
                     widget.valueChanged.connect(
                         lambda value, name=param_name: self.on_parameter_changed(name, value)
                     )
+                    widget.sliderPressed.connect(self.begin_interactive)
+                    widget.sliderReleased.connect(self.end_interactive)
                 
                 elif param_name == "radius" or param_name == "block_size":
                     widget = QSpinBox()
@@ -301,11 +321,11 @@ class PropertiesPanel(QScrollArea):
             if param_name in ["brightness", "contrast"]:
                 reset_button = QPushButton("Reset")
                 if param_name == "brightness":
-                    reset_button.clicked.connect(self.selected_node.reset_brightness)
-                    reset_button.clicked.connect(lambda: self.update_widget_value(param_name, 0))
+                    reset_button.clicked.connect(lambda: self.on_parameter_changed("brightness", 0))
+                    reset_button.clicked.connect(lambda: self.update_widget_value("brightness", 0))
                 elif param_name == "contrast":
-                    reset_button.clicked.connect(self.selected_node.reset_contrast)
-                    reset_button.clicked.connect(lambda: self.update_widget_value(param_name, 1.0))
+                    reset_button.clicked.connect(lambda: self.on_parameter_changed("contrast", 1.0))
+                    reset_button.clicked.connect(lambda: self.update_widget_value("contrast", 1.0))
                 
                 self.params_layout.addRow("", reset_button)
 
@@ -315,29 +335,14 @@ class PropertiesPanel(QScrollArea):
                     
                     widget = QLabel(str(metadata_value))
                     self.params_layout.addRow(self.format_label(metadata_name), widget)
-            else:
-                if self.selected_node.parameters["file_path"]:
-                    file_path = self.selected_node.parameters["file_path"]
-                    import cv2
-                    import os
-                    image = cv2.imread(file_path)
-                    height, width = image.shape[:2]
-                    channels = 1 if len(image.shape) == 2 else image.shape[2]
-                    file_size = os.path.getsize(file_path)
-                    file_extension = os.path.splitext(file_path)[1].lower()
-                    
-                    metadata = {
-                        "width": str(width) + " px",
-                        "height": str(height) + " px",
-                        "file_size": str(round(file_size/1024**2, 2)) + " MB" ,
-                        "file_format": file_extension[1:],
-                    }
-
-                    self.selected_node.processed_data["image"] = image
+            elif self.selected_node.parameters["file_path"]:
+                #read through the shared decode cache, so running the node later decodes nothing
+                metadata = self.selected_node.read_metadata()
+                if metadata:
                     self.selected_node.processed_data["metadata"] = metadata
-                    for metadata_name, metadata_value in self.selected_node.processed_data["metadata"].items():
+                    for metadata_name, metadata_value in metadata.items():
                         widget = QLabel(metadata_value)
-                        self.params_layout.addRow(self.format_label(metadata_name), widget)     
+                        self.params_layout.addRow(self.format_label(metadata_name), widget)
             
     
     def add_input_widgets(self):
@@ -372,46 +377,55 @@ class PropertiesPanel(QScrollArea):
             widget = QLabel(output_type)
             
             self.outputs_layout.addRow(self.format_label(output_name), widget)
+        
+        #live preview of the node's own result while its parameters are edited
+        if "image" in self.selected_node.outputs:
+            self.node_preview_label = QLabel()
+            self.node_preview_label.setAlignment(Qt.AlignCenter)
+            self.outputs_layout.addRow(self.node_preview_label)
+            self.update_node_preview()
 
 
     def numpy_to_qimage(self, array):
-        if array is None:
-            return QImage()
-        
-        array = np.ascontiguousarray(array)
-        
-        if array.dtype == np.float32 or array.dtype == np.float64:
-            array = (array * 255).astype(np.uint8)
-        
-        if len(array.shape) == 2:  # Grayscale
-            height, width = array.shape
-            return QImage(array.data, width, height, width, QImage.Format_Grayscale8)
-        elif array.shape[2] == 3:  # RGB
-            height, width, _ = array.shape
-            return QImage(array.data, width, height, 3 * width, QImage.Format_RGB888)
-        elif array.shape[2] == 4:  # RGBA
-            height, width, _ = array.shape
-            return QImage(array.data, width, height, 4 * width, QImage.Format_RGBA8888)
-        else:
-            return QImage()   
+        return numpy_to_qimage(array)
     
     def update_output_preview(self):
         if not self.selected_node or not isinstance(self.selected_node, OutputNode):
             return
         
-        #process the node if needed
-        if self.selected_node.dirty:
-            success = self.selected_node.process()
-            if not success:
-                return
+        #the result arrives in on_evaluation_finished
+        self.evaluation_worker.request(self.selected_node)
+    
+    def update_node_preview(self):
+        if not self.selected_node or self.node_preview_label is None:
+            return
         
-        #get the preview image
-        preview_image = self.selected_node.parameters.get("preview")
-        if preview_image is None:
+        #only shows results that exist, a node that never ran is not forced to;
+        #members of a fused chain are evaluated on their own once their chain has run
+        if "image" not in self.selected_node.processed_data and self.node_graph.is_stale(self.selected_node.id):
             return
         
+        self.evaluation_worker.request(self.selected_node)
+    
+    def on_evaluation_finished(self, result):
+        if not self.selected_node or result["node_id"] != self.selected_node.id:
+            return
+        
+        if result["image"] is None:
+            return
+        
+        if isinstance(self.selected_node, OutputNode):
+            label = self.output_preview_label
+        else:
+            label = self.node_preview_label
+        
+        if label is not None:
+            self.show_preview(label, result["image"])
+            self.evaluation_worker.record_latency(result)
+    
+    def show_preview(self, label, image):
         #convert numpy array to QImage
-        qimage = self.numpy_to_qimage(preview_image)
+        qimage = self.numpy_to_qimage(image)
         if qimage.isNull():
             return
         
@@ -422,7 +436,16 @@ class PropertiesPanel(QScrollArea):
             pixmap = pixmap.scaled(max_size, max_size, Qt.KeepAspectRatio)
         
         #set the pixmap
-        self.output_preview_label.setPixmap(pixmap)
+        label.setPixmap(pixmap)
+    
+    def begin_interactive(self):
+        #dragging runs the graph on proxies, releasing goes back to full resolution
+        if self.selected_node:
+            self.evaluation_worker.request(self.selected_node, interactive=True)
+    
+    def end_interactive(self):
+        if self.selected_node:
+            self.evaluation_worker.request(self.selected_node, interactive=False)
     
     def format_label(self, name):
         return " ".join(word.capitalize() for word in name.split("_"))
@@ -430,9 +453,8 @@ class PropertiesPanel(QScrollArea):
     def on_parameter_changed(self, param_name, value):
 
         if self.selected_node:
-            self.selected_node.set_parameter(param_name, value)
-            
-            self.selected_node.dirty = True
+            #applied on the worker thread, between evaluations
+            self.evaluation_worker.request(self.selected_node, {param_name: value})
     
     def update_widget_value(self, param_name, value):
 
@@ -453,25 +475,25 @@ class PropertiesPanel(QScrollArea):
     def disconnect_input(self, input_name):
 
         if self.selected_node:
-            self.selected_node.disconnect_input(input_name)
+            self.node_graph.disconnect_nodes(self.selected_node.id, input_name)
             
             self.set_selected_node(self.selected_node.id)
     
     def browse_input_file(self):        
         
         file_path, _ = QFileDialog.getOpenFileName(
-            self, "Open Image", "", "Image Files (*.png *.jpg *.jpeg *.bmp)"
+            self, "Open Image", "", "Image Files (*.png *.jpg *.jpeg *.bmp *.webp *.npy *.raw)"
         )
         
         if file_path and self.selected_node:
-            self.selected_node.set_parameter("file_path", file_path)
+            self.on_parameter_changed("file_path", file_path)
             
             self.update_widget_value("file_path", file_path)
     
     def browse_output_file(self):        
         
         file_path_save, _ = QFileDialog.getSaveFileName(
-            self, "Save Image", "", "PNG Files (*.png);;JPEG Files (*.jpg);;BMP Files (*.bmp)"
+            self, "Save Image", "", "PNG Files (*.png);;JPEG Files (*.jpg);;WebP Files (*.webp);;BMP Files (*.bmp)"
         )
         
         if file_path_save and self.selected_node:
@@ -490,14 +512,21 @@ class PropertiesPanel(QScrollArea):
             )
             return
         
-        output_node = output_nodes[0]
+        #the button belongs to the selected Output node
+        if self.selected_node in output_nodes:
+            output_node = self.selected_node
+        else:
+            output_node = output_nodes[0]
         
         
         file_path_save, _ = QFileDialog.getSaveFileName(
-            self, "Save Result", "", "PNG Files (*.png);;JPEG Files (*.jpg);;BMP Files (*.bmp)"
+            self, "Save Result", "", "PNG Files (*.png);;JPEG Files (*.jpg);;WebP Files (*.webp);;BMP Files (*.bmp)"
         )
         
         if file_path_save:
+            #the worker may be evaluating this node, the edits below must not overlap it
+            self.evaluation_worker.wait()
+            
             output_node.set_parameter("file_path_save", file_path_save)
             
             #determine format from file extension
@@ -506,9 +535,14 @@ class PropertiesPanel(QScrollArea):
                 output_node.set_parameter("format", "jpg")
             elif ext == "png":
                 output_node.set_parameter("format", "png")
+            elif ext == "webp":
+                output_node.set_parameter("format", "webp")
             elif ext == "bmp":
                 output_node.set_parameter("format", "bmp")
             
+            #saving always runs at full resolution, on this thread
+            self.node_graph.end_interactive()
+            
             if not output_node.process():
                 QMessageBox.warning(
                     self, "Processing Failed", 
@@ -517,24 +551,32 @@ class PropertiesPanel(QScrollArea):
                 return
             
 
-            success = output_node.save_image()
+            #encoding and writing happen on the image writer thread
+            future = output_node.save_image_async()
+            future.add_done_callback(
+                lambda done, path=file_path_save: self.save_finished.emit({
+                    "file_path": path,
+                    "success": done.result(),
+                })
+            )
             
-            if success:
-                msg = QMessageBox()
-                msg.setText(f"Saved result to: {file_path_save}")
-                msg.setStandardButtons(QMessageBox.StandardButton.Ok)
-                msg.exec()
-
-            else:
-                QMessageBox.warning(
-                    self, "Save Failed", 
-                    "Failed to save the result. Please check the connections and try again."
-                )
         else:
             QMessageBox.warning(
                 self, "Save Failed", 
                 "path not defined"
             )
+    def on_save_finished(self, result):
+        if result["success"]:
+            msg = QMessageBox()
+            msg.setText(f"Saved result to: {result['file_path']}")
+            msg.setStandardButtons(QMessageBox.StandardButton.Ok)
+            msg.exec()
+        else:
+            QMessageBox.warning(
+                self, "Save Failed", 
+                "Failed to save the result. Please check the connections and try again."
+            )
+    
     def choose_color(self, param_name):
         from PyQt5.QtWidgets import QColorDialog
         
@@ -546,7 +588,7 @@ class PropertiesPanel(QScrollArea):
             
             if new_color.isValid():
                 color_list = [new_color.red(), new_color.green(), new_color.blue()]
-                self.selected_node.set_parameter(param_name, color_list)
+                self.on_parameter_changed(param_name, color_list)
                 
                 button = self.parameter_widgets.get(param_name)
                 if button:
@@ -0,0 +1,91 @@
+import json
+import mmap
+import os
+import struct
+import numpy as np
+
+#raw frame layout: magic, header length, JSON header, padding, then the pixels in
+#C order starting at a multiple of RAW_ALIGNMENT
+RAW_MAGIC = b"NBIRAW01"
+RAW_ALIGNMENT = 4096
+
+MAPPED_EXTENSIONS = (".npy",)
+
+
+def is_mapped_image(file_path):
+    #.npy files and raw frames are memory mapped instead of decoded
+    if os.path.splitext(file_path)[1].lower() in MAPPED_EXTENSIONS:
+        return True
+    try:
+        with open(file_path, "rb") as f:
+            return f.read(len(RAW_MAGIC)) == RAW_MAGIC
+    except OSError:
+        return False
+
+
+def is_file_backed(array):
+    #true for memory maps and views of them, whose pages live in the file, not in RAM
+    base = array
+    while isinstance(base, np.ndarray):
+        if isinstance(base, np.memmap):
+            return True
+        base = base.base
+    return isinstance(base, mmap.mmap)
+
+
+def save_raw(file_path, image):
+    #writes an RGB(A) or grayscale frame so open_raw can map it without decoding
+    image = np.ascontiguousarray(image)
+    header = json.dumps({
+        "shape": list(image.shape),
+        "dtype": image.dtype.str,
+    }).encode("utf-8")
+
+    offset = len(RAW_MAGIC) + 4 + len(header)
+    padding = -offset % RAW_ALIGNMENT
+
+    with open(file_path, "wb") as f:
+        f.write(RAW_MAGIC)
+        f.write(struct.pack("<I", len(header) + padding))
+        f.write(header)
+        f.write(b" " * padding)
+        image.tofile(f)
+
+
+def open_raw(file_path):
+    with open(file_path, "rb") as f:
+        if f.read(len(RAW_MAGIC)) != RAW_MAGIC:
+            raise ValueError("Not a raw image file")
+        header_length = struct.unpack("<I", f.read(4))[0]
+        header = json.loads(f.read(header_length).decode("utf-8"))
+
+    offset = len(RAW_MAGIC) + 4 + header_length
+    return np.memmap(
+        file_path,
+        dtype=np.dtype(header["dtype"]),
+        mode="r",
+        offset=offset,
+        shape=tuple(header["shape"]),
+    )
+
+
+def open_mapped_image(file_path):
+    #read-only view of the pixels; nothing is read from disk until it is touched
+    try:
+        if os.path.splitext(file_path)[1].lower() == ".npy":
+            image = np.load(file_path, mmap_mode="r", allow_pickle=False)
+        else:
+            image = open_raw(file_path)
+    except Exception as e:
+        print(f"Error: Failed to map image: {file_path}: {str(e)}")
+        return None
+
+    if image.ndim == 3 and image.shape[2] == 1:
+        image = image[:, :, 0]
+
+    if image.ndim not in (2, 3) or (image.ndim == 3 and image.shape[2] not in (3, 4)):
+        print(f"Error: Unsupported image shape {image.shape} in {file_path}")
+        return None
+
+    #a plain ndarray view, so results computed from it are not mistaken for memory maps
+    return np.asarray(image)
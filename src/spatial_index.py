@@ -0,0 +1,84 @@
+import math
+
+#side of a grid cell in canvas pixels, about one node wide
+DEFAULT_CELL_SIZE = 200
+
+
+class SpatialIndex:
+    #uniform grid of axis-aligned boxes; a point query only looks at the one cell
+    #the point falls into, so its cost does not grow with the number of items
+
+    def __init__(self, cell_size=DEFAULT_CELL_SIZE):
+        self.cell_size = cell_size
+        self._cells = {}
+
+        #key -> (x0, y0, x1, y1, order, cells)
+        self._items = {}
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def __len__(self):
+        return len(self._items)
+
+    def _cell_range(self, x0, y0, x1, y1):
+        size = self.cell_size
+        for cx in range(math.floor(x0 / size), math.floor(x1 / size) + 1):
+            for cy in range(math.floor(y0 / size), math.floor(y1 / size) + 1):
+                yield (cx, cy)
+
+    def insert(self, key, x0, y0, x1, y1, order=0):
+        #order decides which item a query reports first; inserting an existing key moves it
+        self.remove(key)
+
+        cells = list(self._cell_range(x0, y0, x1, y1))
+        for cell in cells:
+            self._cells.setdefault(cell, set()).add(key)
+        self._items[key] = (x0, y0, x1, y1, order, cells)
+
+    def remove(self, key):
+        item = self._items.pop(key, None)
+        if item is None:
+            return False
+
+        for cell in item[5]:
+            keys = self._cells[cell]
+            keys.discard(key)
+            if not keys:
+                del self._cells[cell]
+        return True
+
+    def query_point(self, x, y):
+        #keys whose box contains the point, sorted by order
+        size = self.cell_size
+        keys = self._cells.get((math.floor(x / size), math.floor(y / size)))
+        if not keys:
+            return []
+
+        hits = []
+        for key in keys:
+            x0, y0, x1, y1, order, _ = self._items[key]
+            if x0 <= x <= x1 and y0 <= y <= y1:
+                hits.append((order, key))
+
+        hits.sort(key=lambda hit: hit[0])
+        return [key for _, key in hits]
+
+    def query_rect(self, x0, y0, x1, y1):
+        #keys whose box overlaps the rectangle, sorted by order
+        keys = set()
+        for cell in self._cell_range(x0, y0, x1, y1):
+            keys.update(self._cells.get(cell, ()))
+
+        hits = []
+        for key in keys:
+            kx0, ky0, kx1, ky1, order, _ = self._items[key]
+            if kx0 <= x1 and x0 <= kx1 and ky0 <= y1 and y0 <= ky1:
+                hits.append((order, key))
+
+        hits.sort(key=lambda hit: hit[0])
+        return [key for _, key in hits]
+
+    def clear(self):
+        self._cells = {}
+        self._items = {}
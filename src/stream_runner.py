@@ -0,0 +1,393 @@
+import argparse
+import glob
+import os
+import queue
+import re
+import sys
+import threading
+import time
+import cv2
+from src.batch_runner import IMAGE_PATTERNS, load_batch_graph
+from src.image_writer import ENCODER_PRESETS, write_image
+
+#frames held between two stages; caps memory at a few frames per queue
+DEFAULT_QUEUE_SIZE = 4
+
+#frame rate for sequences and for videos that do not report one
+DEFAULT_FPS = 30.0
+
+VIDEO_EXTENSIONS = (".mp4", ".avi", ".mov", ".mkv", ".m4v")
+
+VIDEO_FOURCC = {
+    ".mp4": "mp4v",
+    ".m4v": "mp4v",
+    ".mov": "mp4v",
+    ".mkv": "mp4v",
+    ".avi": "MJPG",
+}
+
+#marks the end of the stream in a queue
+_END = object()
+
+
+def is_video_path(path):
+    return os.path.splitext(path)[1].lower() in VIDEO_EXTENSIONS
+
+
+def frame_sort_key(path):
+    #numbers compare as numbers, so frame_2 comes before frame_10
+    return [int(part) if part.isdigit() else part for part in re.split(r"(\d+)", path)]
+
+
+def pattern_paths(pattern):
+    #frames of a printf pattern in index order, from the first of 0-4 that exists up to
+    #the first missing index, the same start range ffmpeg searches
+    for start in range(5):
+        if os.path.exists(pattern % start):
+            break
+    else:
+        return []
+
+    paths = []
+    index = start
+    while os.path.exists(pattern % index):
+        paths.append(pattern % index)
+        index += 1
+    return paths
+
+
+def sequence_paths(source):
+    #a directory, a glob such as frames/*.png or a printf pattern such as frame_%04d.png
+    if "%" in source and not os.path.isdir(source):
+        return pattern_paths(source)
+
+    if os.path.isdir(source):
+        patterns = [os.path.join(source, pattern) for pattern in IMAGE_PATTERNS]
+    else:
+        patterns = [source]
+
+    paths = set()
+    for pattern in patterns:
+        paths.update(glob.glob(pattern))
+    return sorted(paths, key=frame_sort_key)
+
+
+def to_rgb(frame):
+    #in place, the decoded frame is ours
+    if frame.ndim == 3 and frame.shape[2] == 3:
+        return cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=frame)
+    if frame.ndim == 3 and frame.shape[2] == 4:
+        return cv2.cvtColor(frame, cv2.COLOR_BGRA2RGBA, dst=frame)
+    return frame
+
+
+def open_source(source):
+    #(frame iterator, frames per second, frame count or None)
+    if is_video_path(source):
+        capture = cv2.VideoCapture(source)
+        if not capture.isOpened():
+            raise ValueError(f"Failed to open video: {source}")
+
+        fps = capture.get(cv2.CAP_PROP_FPS) or DEFAULT_FPS
+        count = int(capture.get(cv2.CAP_PROP_FRAME_COUNT)) or None
+
+        def frames():
+            try:
+                while True:
+                    ok, frame = capture.read()
+                    if not ok:
+                        return
+                    yield to_rgb(frame)
+            finally:
+                capture.release()
+
+        return frames(), fps, count
+
+    paths = sequence_paths(source)
+    if not paths:
+        raise ValueError(f"No frames found for: {source}")
+
+    def frames():
+        for path in paths:
+            frame = cv2.imread(path, cv2.IMREAD_UNCHANGED)
+            if frame is None:
+                raise ValueError(f"Failed to load frame: {path}")
+            yield to_rgb(frame)
+
+    return frames(), DEFAULT_FPS, len(paths)
+
+
+class VideoSink:
+    #the writer is opened with the size of the first frame
+
+    def __init__(self, file_path, fps):
+        self.file_path = file_path
+        self.fps = fps
+        self.writer = None
+        self.size = None
+
+    def write(self, index, image):
+        if image.ndim == 2:
+            frame = cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+        elif image.shape[2] == 4:
+            frame = cv2.cvtColor(image, cv2.COLOR_RGBA2BGR)
+        else:
+            frame = cv2.cvtColor(image, cv2.COLOR_RGB2BGR)
+
+        size = (frame.shape[1], frame.shape[0])
+        if self.writer is None:
+            fourcc = VIDEO_FOURCC.get(os.path.splitext(self.file_path)[1].lower(), "mp4v")
+            self.writer = cv2.VideoWriter(self.file_path, cv2.VideoWriter_fourcc(*fourcc), self.fps, size)
+            if not self.writer.isOpened():
+                print(f"Error: Failed to open video writer: {self.file_path}")
+                return False
+            self.size = size
+        elif size != self.size:
+            print(f"Error: Frame {index} is {size[0]}x{size[1]}, the video is {self.size[0]}x{self.size[1]}")
+            return False
+
+        self.writer.write(frame)
+        return True
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.release()
+
+
+class SequenceSink:
+    #one image per frame, named by a printf pattern such as out/frame_%05d.png
+
+    def __init__(self, pattern, format_name="png", preset="fast", quality=95):
+        self.pattern = pattern
+        self.format_name = format_name
+        self.preset = preset
+        self.quality = quality
+
+    def write(self, index, image):
+        file_path = self.pattern % index
+        return write_image(file_path, image, self.format_name, self.preset, self.quality, verbose=False)
+
+    def close(self):
+        pass
+
+
+def open_sink(destination, fps, format_name=None, preset="fast", quality=95):
+    if is_video_path(destination):
+        directory = os.path.dirname(destination)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        return VideoSink(destination, fps)
+
+    #a directory gets numbered frames
+    if "%" not in destination:
+        destination = os.path.join(destination, f"frame_%06d.{format_name or 'png'}")
+    os.makedirs(os.path.dirname(destination) or ".", exist_ok=True)
+
+    extension = os.path.splitext(destination)[1].lstrip(".").lower()
+    return SequenceSink(destination, format_name or extension or "png", preset, quality)
+
+
+def _put(target, item, stop):
+    #gives up once another stage has failed, so nothing blocks on a dead consumer
+    while not stop.is_set():
+        try:
+            target.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _get(source, stop):
+    while not stop.is_set():
+        try:
+            return source.get(timeout=0.1)
+        except queue.Empty:
+            continue
+    return _END
+
+
+def run_stream(graph_path, source, destination, input_node_id=None, output_node_id=None,
+               queue_size=DEFAULT_QUEUE_SIZE, fps=None, output_format=None, preset="fast",
+               max_frames=None, progress=None, trace_path=None):
+    #decodes, processes and encodes in three threads joined by bounded queues;
+    #progress(frames_written, frame_count) is called from the writer thread.
+    #With trace_path every node evaluation is profiled and written as a Chrome trace
+
+    graph, input_node, output_nodes = load_batch_graph(graph_path, input_node_id)
+    if output_node_id:
+        output_nodes = [node for node in output_nodes if node.id == output_node_id]
+    if len(output_nodes) != 1:
+        raise ValueError("Graph must have exactly one Output node, or pass --output-node")
+    output_node = output_nodes[0]
+    if trace_path:
+        graph.set_profiling_enabled(True)
+
+    frames, source_fps, count = open_source(source)
+    if max_frames is not None:
+        count = min(count, max_frames) if count else max_frames
+    sink = open_sink(destination, fps or source_fps, output_format, preset, output_node.parameters["quality"])
+
+    decoded = queue.Queue(maxsize=queue_size)
+    processed = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+
+    busy = {"decode": 0.0, "process": 0.0, "encode": 0.0}
+    errors = []
+    written = [0]
+
+    def decode_stage():
+        try:
+            index = 0
+            while max_frames is None or index < max_frames:
+                start = time.perf_counter()
+                frame = next(frames, None)
+                busy["decode"] += time.perf_counter() - start
+                if frame is None or not _put(decoded, (index, frame), stop):
+                    break
+                index += 1
+        except Exception as e:
+            errors.append(f"Error decoding frame: {str(e)}")
+            stop.set()
+        finally:
+            frames.close()
+            _put(decoded, _END, stop)
+
+    def encode_stage():
+        try:
+            while True:
+                item = _get(processed, stop)
+                if item is _END:
+                    break
+                index, image = item
+
+                start = time.perf_counter()
+                success = sink.write(index, image)
+                busy["encode"] += time.perf_counter() - start
+                if not success:
+                    errors.append(f"Error: Failed to write frame {index}")
+                    stop.set()
+                    break
+
+                written[0] += 1
+                if progress:
+                    progress(written[0], count)
+        except Exception as e:
+            errors.append(f"Error encoding frame: {str(e)}")
+            stop.set()
+        finally:
+            sink.close()
+
+    start_time = time.perf_counter()
+    decoder = threading.Thread(target=decode_stage, name="stream-decode", daemon=True)
+    encoder = threading.Thread(target=encode_stage, name="stream-encode", daemon=True)
+    decoder.start()
+    encoder.start()
+
+    #the graph runs on this thread; only the input node and its downstream nodes
+    #run again for each frame, other branches keep their results
+    try:
+        while True:
+            item = _get(decoded, stop)
+            if item is _END:
+                break
+            index, frame = item
+
+            start = time.perf_counter()
+            input_node.set_frame(frame)
+            success = graph.execute(output_node.id)
+            image = output_node.parameters["preview"]
+            busy["process"] += time.perf_counter() - start
+
+            if not success or image is None:
+                errors.append(f"Error: Failed to process frame {index}")
+                stop.set()
+                break
+
+            #the queue keeps the result referenced, so pooled buffers are not reused under it
+            if not _put(processed, (index, image), stop):
+                break
+    except Exception as e:
+        #the decoder may be blocked on a full queue, it only lets go once stop is set
+        errors.append(f"Error processing frame: {str(e)}")
+        stop.set()
+    finally:
+        _put(processed, _END, stop)
+        decoder.join()
+        encoder.join()
+        input_node.clear_frame()
+
+    elapsed = time.perf_counter() - start_time
+
+    if trace_path and not graph.export_chrome_trace(trace_path):
+        errors.append(f"Error: Failed to write trace: {trace_path}")
+    stages = {
+        name: {
+            "busy_seconds": seconds,
+            "utilization": seconds / elapsed if elapsed > 0 else 0.0,
+        }
+        for name, seconds in busy.items()
+    }
+
+    return {
+        "frames": written[0],
+        "elapsed": elapsed,
+        "fps": written[0] / elapsed if elapsed > 0 else 0.0,
+        #what the same work takes with the stages run one after another
+        "serial_seconds": sum(busy.values()),
+        "stages": stages,
+        "bottleneck": max(busy, key=busy.get),
+        "errors": errors,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Apply a saved node graph to every frame of a video or image sequence")
+    parser.add_argument("graph", help="graph file saved from the editor (File > Save Graph)")
+    parser.add_argument("source", help="video file, directory, glob or printf pattern of frames")
+    parser.add_argument("destination", help="video file, directory or printf pattern such as out/frame_%%05d.png")
+    parser.add_argument("--input-node", default=None, help="id of the Image Input node fed with each frame")
+    parser.add_argument("--output-node", default=None, help="id of the Output node whose result is written")
+    parser.add_argument("--queue-size", type=int, default=DEFAULT_QUEUE_SIZE, help="frames buffered between stages")
+    parser.add_argument("--fps", type=float, default=None, help="frame rate of the output video (default: the source's)")
+    parser.add_argument("--format", choices=["png", "jpg", "webp", "bmp"], default=None,
+                        help="image format for frame sequences")
+    parser.add_argument("--preset", choices=ENCODER_PRESETS, default="fast", help="encoder preset for frame sequences")
+    parser.add_argument("--max-frames", type=int, default=None)
+    parser.add_argument("--trace", default=None, help="write a Chrome trace of every node evaluation to this file")
+    args = parser.parse_args(argv)
+
+    def progress(written, total):
+        if written % 100 == 0 or written == total:
+            print(f"[{written}/{total or '?'}] frames", flush=True)
+
+    try:
+        report = run_stream(
+            args.graph, args.source, args.destination,
+            input_node_id=args.input_node,
+            output_node_id=args.output_node,
+            queue_size=args.queue_size,
+            fps=args.fps,
+            output_format=args.format,
+            preset=args.preset,
+            max_frames=args.max_frames,
+            progress=progress,
+            trace_path=args.trace
+        )
+    except ValueError as e:
+        print(f"Error: {str(e)}")
+        return 1
+
+    print(f"Processed {report['frames']} frames in {report['elapsed']:.1f} s: {report['fps']:.1f} fps "
+          f"({report['serial_seconds'] / report['elapsed'] if report['elapsed'] > 0 else 0:.2f}x over serial)")
+    for name, stage in report["stages"].items():
+        print(f"  {name:>7}: {stage['busy_seconds']:7.2f} s busy, {stage['utilization'] * 100:5.1f}% utilized")
+    print(f"Bottleneck: {report['bottleneck']}")
+
+    for error in report["errors"]:
+        print(error)
+    return 1 if report["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import cv2
+import numpy as np
+from PyQt5.QtCore import QObject, pyqtSignal
+from PyQt5.QtGui import QImage
+
+
+def numpy_to_qimage(array):
+    #the QImage shares memory with array, copy it if it has to outlive the array
+    if array is None:
+        return QImage()
+
+    array = np.ascontiguousarray(array)
+
+    if array.dtype == np.float32 or array.dtype == np.float64:
+        array = (array * 255).astype(np.uint8)
+
+    if len(array.shape) == 2:  # Grayscale
+        height, width = array.shape
+        return QImage(array.data, width, height, width, QImage.Format_Grayscale8)
+    elif array.shape[2] == 3:  # RGB
+        height, width, _ = array.shape
+        return QImage(array.data, width, height, 3 * width, QImage.Format_RGB888)
+    elif array.shape[2] == 4:  # RGBA
+        height, width, _ = array.shape
+        return QImage(array.data, width, height, 4 * width, QImage.Format_RGBA8888)
+    else:
+        return QImage()
+
+
+def make_thumbnail(image, max_width, max_height):
+    #area averaging of the full result down to at most max_width x max_height
+    height, width = image.shape[:2]
+    scale = min(max_width / width, max_height / height, 1.0)
+    size = (max(1, round(width * scale)), max(1, round(height * scale)))
+
+    if size != (width, height):
+        image = cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+
+    return numpy_to_qimage(image).copy()
+
+
+class ThumbnailGenerator(QObject):
+    #downsamples node results on a background thread; QPixmaps can only be made on
+    #the UI thread, so finished thumbnails are posted back as QImages
+
+    #a dict with node_id, version and image
+    thumbnail_ready = pyqtSignal(object)
+
+    def __init__(self, max_width, max_height, parent=None):
+        super().__init__(parent)
+
+        self.max_width = max_width
+        self.max_height = max_height
+
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="thumbnails")
+        self._lock = threading.Lock()
+        self._running = False
+
+        #node id -> (version, image); a newer result replaces one still waiting
+        self._queued = {}
+
+    def request(self, node_id, version, image):
+        with self._lock:
+            self._queued[node_id] = (version, image)
+
+            if not self._running:
+                self._running = True
+                self._executor.submit(self._run)
+
+    def discard(self, node_id):
+        with self._lock:
+            self._queued.pop(node_id, None)
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if not self._queued:
+                    self._running = False
+                    return
+                node_id, (version, image) = self._queued.popitem()
+
+            try:
+                thumbnail = make_thumbnail(image, self.max_width, self.max_height)
+            except Exception as e:
+                print(f"Error creating thumbnail: {str(e)}")
+                continue
+
+            #the result array is released here, so pooled buffers can be reused
+            image = None
+
+            if not thumbnail.isNull():
+                self.thumbnail_ready.emit({
+                    "node_id": node_id,
+                    "version": version,
+                    "image": thumbnail,
+                })
+
+    def shutdown(self):
+        with self._lock:
+            self._queued.clear()
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,197 @@
+import numpy as np
+
+DEFAULT_TILE_SIZE = 1024
+
+
+def expand_region(region, halo, height, width):
+    y0, y1, x0, x1 = region
+    return (max(0, y0 - halo), min(height, y1 + halo), max(0, x0 - halo), min(width, x1 + halo))
+
+
+def union_region(a, b):
+    if a is None:
+        return b
+    return (min(a[0], b[0]), max(a[1], b[1]), min(a[2], b[2]), max(a[3], b[3]))
+
+
+def crop_region(array, array_region, region):
+    #both regions are in full-image coordinates
+    top = region[0] - array_region[0]
+    left = region[2] - array_region[2]
+    return array[top:top + region[1] - region[0], left:left + region[3] - region[2]]
+
+
+class TiledExecutor:
+
+    def __init__(self, graph, tile_size=DEFAULT_TILE_SIZE):
+        self.graph = graph
+        self.tile_size = tile_size
+
+    def plan(self, output_node_id):
+        #returns (ordered node ids, sources, halos) or None if the subgraph cannot be tiled
+        upstream_ids = self.graph.get_upstream(output_node_id)
+        node_ids = [node_id for node_id in self.graph.execution_order if node_id in upstream_ids]
+
+        sources = []
+        halos = {}
+        for node_id in node_ids:
+            node = self.graph.nodes[node_id]
+            connections = [connection for connection in node.inputs.values() if connection]
+
+            if not node.inputs:
+                sources.append(node_id)
+                continue
+
+            halo = node.tile_halo()
+            if halo is None:
+                return None
+            halos[node_id] = halo
+
+            for source_node, output_name in connections:
+                if output_name in source_node.non_spatial_outputs:
+                    return None
+
+        return node_ids, sources, halos
+
+    def run(self, output_node_id):
+        output_node = self.graph.nodes[output_node_id]
+
+        plan = self.plan(output_node_id)
+        if plan is None:
+            print(f"Warning: {output_node.name} depends on nodes that cannot be tiled, running full frame")
+            return self.graph.execute(output_node_id)
+
+        node_ids, sources, halos = plan
+
+        #sources are read whole; everything after them works on tiles
+        source_images = {}
+        for node_id in sources:
+            source_node = self.graph.nodes[node_id]
+            if not source_node.evaluate():
+                return False
+            source_images[node_id] = source_node.processed_data
+
+        shapes = set()
+        for data in source_images.values():
+            image = data.get("image")
+            if image is None:
+                return False
+            shapes.add(image.shape[:2])
+
+        if len(shapes) != 1:
+            print("Warning: Tiled execution needs equally sized inputs, running full frame")
+            return self.graph.execute(output_node_id)
+
+        height, width = shapes.pop()
+        processing_ids = [node_id for node_id in node_ids if node_id not in source_images]
+
+        #tile processing overwrites processed_data, so keep the full-frame state
+        saved_state = {}
+        for node_id in processing_ids:
+            node = self.graph.nodes[node_id]
+            saved_state[node_id] = (node.processed_data, node.output_state, node.dirty, node._cache_key)
+
+        result = None
+        try:
+            for y0 in range(0, height, self.tile_size):
+                for x0 in range(0, width, self.tile_size):
+                    region = (y0, min(height, y0 + self.tile_size), x0, min(width, x0 + self.tile_size))
+                    tile = self._run_tile(region, node_ids, source_images, halos, output_node_id, height, width)
+                    if tile is None:
+                        return False
+
+                    if result is None:
+                        result = np.empty((height, width) + tile.shape[2:], dtype=tile.dtype)
+                    result[region[0]:region[1], region[2]:region[3]] = tile
+        finally:
+            for node_id, (processed_data, output_state, dirty, cache_key) in saved_state.items():
+                node = self.graph.nodes[node_id]
+                node._tile_inputs = None
+                node.processed_data = processed_data
+                node.output_state = output_state
+                node.dirty = dirty
+                node._cache_key = cache_key
+
+        output_node.parameters["preview"] = result
+        output_node.dirty = False
+        output_node.result_version += 1
+        return True
+
+    def _run_tile(self, region, node_ids, source_images, halos, output_node_id, height, width):
+        nodes = self.graph.nodes
+
+        #walk backwards to find the region each node has to produce
+        required = {output_node_id: region}
+        for node_id in reversed(node_ids):
+            if node_id not in required or node_id in source_images:
+                continue
+
+            input_region = expand_region(required[node_id], halos[node_id], height, width)
+            for connection in nodes[node_id].inputs.values():
+                if connection:
+                    source_id = connection[0].id
+                    required[source_id] = union_region(required.get(source_id), input_region)
+
+        results = {}
+        remaining_consumers = {}
+        consumed_outputs = {}
+        for node_id in node_ids:
+            for connection in nodes[node_id].inputs.values():
+                if connection:
+                    source_id = connection[0].id
+                    remaining_consumers[source_id] = remaining_consumers.get(source_id, 0) + 1
+                    consumed_outputs.setdefault(source_id, set()).add(connection[1])
+
+        full_region = (0, height, 0, width)
+        for node_id in source_images:
+            results[node_id] = (source_images[node_id], full_region)
+
+        for node_id in node_ids:
+            if node_id in source_images or node_id not in required:
+                continue
+
+            node = nodes[node_id]
+            input_region = expand_region(required[node_id], halos[node_id], height, width)
+
+            tile_inputs = {}
+            for input_name, connection in node.inputs.items():
+                if not connection:
+                    continue
+                source_node, output_name = connection
+                source_data, source_region = results[source_node.id]
+                source_array = source_data.get(output_name)
+                if source_array is not None:
+                    source_array = crop_region(source_array, source_region, input_region)
+                tile_inputs[input_name] = source_array
+
+                #drop upstream tiles as soon as their last consumer has read them
+                remaining_consumers[source_node.id] -= 1
+                if remaining_consumers[source_node.id] == 0 and source_node.id not in source_images:
+                    del results[source_node.id]
+
+            if node_id == output_node_id:
+                return tile_inputs.get("image")
+
+            node._tile_inputs = tile_inputs
+            node.processed_data = {}
+            profiler = self.graph.profiler
+            start = profiler.start() if profiler is not None else None
+            success = node.process()
+            node._tile_inputs = None
+            if profiler is not None:
+                profiler.record_tile(node, start, success, tile_inputs, required[node_id])
+            if not success:
+                return None
+
+            #only the outputs read downstream are produced for the tile
+            outputs = {}
+            for output_name in consumed_outputs.get(node_id, ()):
+                value = node.processed_data.get(output_name)
+                if value is None and output_name in node.lazy_outputs:
+                    value = node.lazy_outputs[output_name]()
+                if isinstance(value, np.ndarray) and output_name not in node.non_spatial_outputs:
+                    value = crop_region(value, input_region, required[node_id])
+                outputs[output_name] = value
+            results[node_id] = (outputs, required[node_id])
+
+        return None